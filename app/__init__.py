@@ -1,4 +1,4 @@
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from flask_migrate import Migrate
@@ -16,19 +16,38 @@ def create_app():
     # Load configuration
     app.config.from_object(Config)
     
-    # Initialize extensions
+    from app.logs import init_logging
+    init_logging(app)
+    
+    # Initialize extensions (the engine gets a sized pool that times checkouts,
+    # and drivers that cooperate with gevent)
+    from app.database import configure_engine, init_engine
+    from app.metrics import configure_pool, init_metrics
+    configure_engine(app)
+    configure_pool(app)
     CORS(app)
     db.init_app(app)
     migrate.init_app(app, db)
     
-    # Add route to serve uploaded files
-    @app.route('/uploads/<path:filename>')
-    def uploaded_file(filename):
-        directory = os.path.dirname(filename)
-        file_name = os.path.basename(filename)
-        return send_from_directory(os.path.join(app.config['UPLOAD_FOLDER'], directory), file_name)
+    # Keep session data server-side; the cookie only carries its id
+    from app.sessions import init_sessions
+    init_sessions(app, db)
+    
+    # Upload storage backend (local directory or S3-compatible bucket)
+    from app.storage import init_storage
+    init_storage(app)
+    
+    # Serve uploaded files (Range, conditional GET, optional sendfile offload)
+    from app.serving import init_upload_serving
+    init_upload_serving(app)
     
     with app.app_context():
+        # SQLite pragmas and the psycopg2 wait callback, before the first connection
+        init_engine(app, db)
+        
+        # Request latency, SQL and pool metrics at /metrics
+        init_metrics(app, db)
+        
         # Import models first
         from app.models import Job, Candidate
         
@@ -38,18 +57,38 @@ def create_app():
         app.register_blueprint(main)
         app.register_blueprint(admin)
         
-        try:
-            # Create tables only if they don't exist
-            db.create_all()
-        except Exception as e:
-            app.logger.error(f"Error creating database tables: {str(e)}")
+        # Rendered admin pages, reused while their data stamp is unchanged
+        from app.page_cache import init_page_cache
+        init_page_cache(app)
+
+        # Expiry sweeps, run by whichever worker holds the lease
+        from app.scheduler import init_scheduler
+        init_scheduler(app)
+
+        # Register CLI commands
+        from app.cli import register_commands
+        register_commands(app)
+        
+        # Create missing tables, or check the schema is at the migration
+        # head (SCHEMA_CHECK=alembic, see app/boot.py)
+        from app.boot import ensure_schema, init_templates
+        migrated = ensure_schema(app, db)
+        
+        # Full-text search index (FTS5 / tsvector) kept beside the candidate table
+        from app.search import init_search
+        init_search(app, db, create=not migrated)
+        
+        # Register background task handlers, the video and resume hooks and
+        # the upload garbage collector
+        from app import media, resume_text, upload_gc
+        
+        # Jinja bytecode cache and, for preloaded apps, every template compiled up front
+        init_templates(app)
             
-        # Ensure upload directories exist
+        # Scratch space for partial uploads and task work files
         try:
-            upload_folder = app.config['UPLOAD_FOLDER']
-            os.makedirs(os.path.join(upload_folder, 'resumes'), exist_ok=True)
-            os.makedirs(os.path.join(upload_folder, 'videos'), exist_ok=True)
+            os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
         except Exception as e:
-            app.logger.error(f"Error creating upload directories: {str(e)}")
+            app.logger.error(f"Error creating upload folder: {str(e)}")
     
     return app
@@ -1,7 +1,19 @@
 import logging
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort, Response, stream_with_context
 from app.models import db, Job, Candidate
+from app.queries import CandidateFilters, InvalidQuery, paginate_candidates, count_candidates, API_COLUMNS, LIST_COLUMNS
+from app.export import EXPORT_FORMATS, export_candidates, export_filename
+from app.stats import get_dashboard_stats
+from app.blobstore import release_job_references
+from app.upload_gc import job_upload_paths, schedule_file_cleanup
+from app.importer import IMPORT_FORMATS, import_candidates
+from app.search import search_candidates, remove_job
+from app.resume_text import resume_text_for, PREVIEW_CHARS
+from app.job_cache import get_job
+from app.page_cache import cached_page, candidate_stamp
+from sqlalchemy.orm import load_only
 from datetime import datetime, timedelta
+import json
 import secrets
 
 admin = Blueprint('admin', __name__, url_prefix='/admin')
@@ -12,13 +24,13 @@ logging.basicConfig(level=logging.INFO)  # Set the logging level
 
 @admin.route('/')
 def index():
-    jobs = Job.query.all()
-    active_jobs = sum(1 for job in jobs if job.is_active and not job.is_expired())
-    total_candidates = Candidate.query.count()
-    return render_template('admin/dashboard.html', 
-                         jobs=jobs, 
-                         active_jobs=active_jobs,
-                         total_candidates=total_candidates)
+    stats = get_dashboard_stats()
+    # The cached stats already reflect every change the page shows
+    return cached_page(stats, lambda: render_template('admin/dashboard.html', 
+                         jobs=stats.jobs, 
+                         stats=stats,
+                         active_jobs=stats.active_jobs,
+                         total_candidates=stats.total_candidates))
 
 @admin.route('/jobs/new', methods=['GET', 'POST'])
 def new_job():
@@ -46,9 +58,54 @@ def new_job():
 
 @admin.route('/view_job/<int:job_id>')
 def view_job(job_id):
+    job = get_job(job_id)
+    if job is None:
+        abort(404)
+    filters = CandidateFilters(job_id=job_id)
+
+    def render():
+        try:
+            candidates, next_cursor = paginate_candidates(filters, cursor=request.args.get('cursor'))
+        except InvalidQuery as e:
+            abort(400, str(e))
+        return render_template('admin/view_job.html', job=job, candidates=candidates,
+                               total_candidates=count_candidates(filters),
+                               next_cursor=next_cursor)
+    return cached_page((job, job.is_expired(), candidate_stamp(job_id)), render)
+
+def _ranked_rows(job_id, k):
+    """(ranked candidates paired with their Candidate rows, number scored)"""
+    from app.ranking import rank_candidates
+    ranked, scored = rank_candidates(job_id, k)
+    if ranked is None:
+        abort(404)
+    columns = [getattr(Candidate, name) for name in LIST_COLUMNS + ('relevant_experience',)]
+    rows = {c.id: c for c in Candidate.query.options(load_only(*columns)).filter(Candidate.id.in_([r.id for r in ranked]))}
+    return [(r, rows[r.id]) for r in ranked if r.id in rows], scored
+
+@admin.route('/job/<int:job_id>/ranking')
+def job_ranking(job_id):
+    """Best-scoring candidates for a job"""
+    # NumPy is only loaded by the workers that rank
+    from app.ranking import WEIGHTS, DEFAULT_TOP_K
     job = Job.query.get_or_404(job_id)
-    candidates = Candidate.query.filter_by(job_id=job_id).all()
-    return render_template('admin/view_job.html', job=job, candidates=candidates)
+    ranked, scored = _ranked_rows(job_id, request.args.get('k', DEFAULT_TOP_K, type=int))
+    return render_template('admin/ranking.html', job=job, ranked=ranked, scored=scored, weights=WEIGHTS)
+
+@admin.route('/api/jobs/<int:job_id>/ranking')
+def job_ranking_api(job_id):
+    """Top-k candidates for a job with their score breakdown (each component 0-100)"""
+    from app.ranking import WEIGHTS, DEFAULT_TOP_K
+    ranked, scored = _ranked_rows(job_id, request.args.get('k', DEFAULT_TOP_K, type=int))
+    return jsonify({
+        'job_id': job_id,
+        'scored': scored,
+        'weights': WEIGHTS,
+        'candidates': [dict(r._asdict(),
+                            name=f"{c.first_name} {c.last_name}",
+                            email=c.personal_email,
+                            skills=c.primary_skills) for r, c in ranked]
+    })
 
 @admin.route('/edit_job/<int:job_id>', methods=['GET', 'POST'])
 def edit_job(job_id):
@@ -73,10 +130,16 @@ def edit_job(job_id):
 def delete_job(job_id):
     job = Job.query.get_or_404(job_id)
     
-    # Delete associated candidates
+    # Delete associated candidates, releasing their file references first
+    # because the bulk delete skips per-row events
+    paths = job_upload_paths(job_id)
+    release_job_references(job_id)
+    remove_job(db.session.connection(), job_id)
     Candidate.query.filter_by(job_id=job_id).delete()
     
     db.session.delete(job)
+    # Files nobody else uses are deleted by the background worker, in chunks
+    schedule_file_cleanup(db.session.connection(), paths)
     db.session.commit()
     
     flash('Job deleted successfully!', 'success')
@@ -103,27 +166,177 @@ def toggle_job(job_id):
 
 @admin.route('/candidates')
 def view_candidates():
-    """View all candidates or filter by job"""
-    job_id = request.args.get('job_id', type=int)
-    if job_id:
-        candidates = Candidate.query.filter_by(job_id=job_id).all()
-        job = Job.query.get_or_404(job_id)
-        return render_template('admin/candidates.html', candidates=candidates, job=job)
-    else:
-        candidates = Candidate.query.all()
-        return render_template('admin/candidates.html', candidates=candidates)
+    """View all candidates or filter by job, one keyset page at a time.
+
+    With ?q= the page lists full-text search matches ranked by relevance.
+    """
+    search = (request.args.get('q') or '').strip()
+    try:
+        filters = CandidateFilters.from_args(request.args)
+    except InvalidQuery as e:
+        abort(400, str(e))
+    job = None
+    if filters.job_id:
+        job = get_job(filters.job_id)
+        if job is None:
+            abort(404)
+
+    def render():
+        next_cursor = next_page = None
+        try:
+            if search:
+                results, next_page = search_candidates(search, filters, page=request.args.get('page', 1, type=int),
+                                                       limit=request.args.get('limit', type=int))
+                candidates = [candidate for candidate, _ in results]
+            else:
+                candidates, next_cursor = paginate_candidates(filters, cursor=request.args.get('cursor'),
+                                                              limit=request.args.get('limit', type=int))
+        except InvalidQuery as e:
+            abort(400, str(e))
+        return render_template('admin/candidates.html', candidates=candidates, job=job, filters=filters,
+                               next_cursor=next_cursor, search=search, next_page=next_page)
+    return cached_page((job, candidate_stamp(filters.job_id)), render)
 
 @admin.route('/api/candidates')
 def get_candidates():
-    """API endpoint for candidates data"""
-    candidates = Candidate.query.all()
-    return jsonify([{
-        'id': c.id,
-        'job_id': c.job_id,
-        'name': f"{c.first_name} {c.last_name}",
-        'email': c.personal_email,
-        'mobile': c.mobile_no,
-        'experience': c.total_experience,
-        'skills': c.primary_skills,
-        'submitted_at': c.submitted_at.strftime('%Y-%m-%d %H:%M:%S')
-    } for c in candidates])
+    """API endpoint for candidates data.
+
+    Accepts the same filters as the candidates page plus `cursor` and `limit`.
+    Responds with {"candidates": [...], "next_cursor": token-or-null}; pass
+    `next_cursor` back unchanged (with the same filters) to fetch the next page.
+    """
+    try:
+        filters = CandidateFilters.from_args(request.args)
+        candidates, next_cursor = paginate_candidates(filters, cursor=request.args.get('cursor'),
+                                                      limit=request.args.get('limit', type=int),
+                                                      columns=API_COLUMNS)
+    except InvalidQuery as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'candidates': [{
+            'id': c.id,
+            'job_id': c.job_id,
+            'name': f"{c.first_name} {c.last_name}",
+            'email': c.personal_email,
+            'mobile': c.mobile_no,
+            'experience': c.total_experience,
+            'skills': c.primary_skills,
+            'submitted_at': c.submitted_at.strftime('%Y-%m-%d %H:%M:%S') if c.submitted_at else None
+        } for c in candidates],
+        'next_cursor': next_cursor
+    })
+
+@admin.route('/api/candidates/search')
+def search_candidates_api():
+    """Full-text candidate search over skills, name, company and designation.
+
+    Takes `q` plus the candidate filters, `page` and `limit`. Responds with
+    {"results": [...], "page": n, "next_page": n-or-null}, best matches first.
+    """
+    search = (request.args.get('q') or '').strip()
+    if not search:
+        return jsonify({'error': 'q is required'}), 400
+    page = request.args.get('page', 1, type=int)
+    try:
+        filters = CandidateFilters.from_args(request.args)
+        results, next_page = search_candidates(search, filters, page=page,
+                                               limit=request.args.get('limit', type=int),
+                                               columns=API_COLUMNS + ('current_company', 'current_designation'))
+    except InvalidQuery as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'results': [{
+            'id': c.id,
+            'job_id': c.job_id,
+            'name': f"{c.first_name} {c.last_name}",
+            'email': c.personal_email,
+            'experience': c.total_experience,
+            'skills': c.primary_skills,
+            'company': c.current_company,
+            'designation': c.current_designation,
+            'score': round(score, 4),
+            'submitted_at': c.submitted_at.strftime('%Y-%m-%d %H:%M:%S') if c.submitted_at else None
+        } for c, score in results],
+        'page': max(1, page),
+        'next_page': next_page
+    })
+
+@admin.route('/api/candidates/<int:candidate_id>/resume-text')
+def resume_text_api(candidate_id):
+    """Extracted resume text and sections for a candidate.
+
+    Responds 202 while extraction is pending. With `preview=1` the text is
+    cut to a short excerpt, for the hover preview on the job page.
+    """
+    candidate = Candidate.query.options(
+        load_only(Candidate.id, Candidate.resume_attachments, Candidate.resume_sha256)
+    ).get_or_404(candidate_id)
+    if not candidate.resume_attachments:
+        return jsonify({'error': 'Candidate has no resume'}), 404
+    extracted = resume_text_for(candidate)
+    if extracted is None:
+        return jsonify({'status': 'pending'}), 202
+    text = extracted.text or ''
+    if request.args.get('preview'):
+        text = text[:PREVIEW_CHARS]
+    return jsonify({
+        'status': extracted.status,
+        'sha256': extracted.sha256,
+        'page_count': extracted.page_count,
+        'sections': json.loads(extracted.sections or '{}'),
+        'text': text,
+        'error': extracted.error,
+    })
+
+
+@admin.route('/export/candidates')
+def export_candidates_view():
+    """Stream a CSV or NDJSON export of candidates.
+
+    Accepts the candidate list filters plus `format` (csv or ndjson) and
+    `gzip=1`. Rows are streamed as they are read, so memory use does not
+    depend on the number of candidates.
+    """
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    try:
+        filters = CandidateFilters.from_args(request.args)
+    except InvalidQuery as e:
+        return jsonify({'error': str(e)}), 400
+
+    logger.info(f"Streaming {fmt} export of candidates (job_id={filters.job_id}, gzip={compress})")
+    mimetype = 'application/gzip' if compress else EXPORT_FORMATS[fmt][0]
+    response = Response(stream_with_context(export_candidates(filters, fmt, compress)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{export_filename(filters, fmt, compress)}"'
+    # Stop proxies from buffering the whole export before sending it on
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@admin.route('/api/candidates/import', methods=['POST'])
+def import_candidates_view():
+    """Bulk-import candidates from an uploaded CSV or NDJSON file.
+
+    Form fields: `file`, optional `format` (inferred from the file
+    extension), `job_id` for rows without one, and `dry_run=1` to only
+    validate. Responds with the import report, including per-row errors.
+    """
+    file = request.files.get('file')
+    if not file or file.filename == '':
+        return jsonify({'error': 'No file provided'}), 400
+    fmt = request.form.get('format') or file.filename.rsplit('.', 1)[-1].lower()
+    if fmt == 'jsonl':
+        fmt = 'ndjson'
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(IMPORT_FORMATS)}"}), 400
+    job_id = request.form.get('job_id', type=int)
+    dry_run = request.form.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    try:
+        report = import_candidates(file.stream, fmt, default_job_id=job_id, dry_run=dry_run)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error importing candidates: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    return jsonify(report.to_dict())
@@ -0,0 +1,266 @@
+from flask import current_app
+from app.models import db, Candidate, UploadBlob, UploadAlias
+from app.storage import get_storage, LocalStorage
+from sqlalchemy import bindparam, event, select, update, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import get_history
+from collections import Counter
+from datetime import datetime
+import hashlib
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+COPY_BUFFER_SIZE = 64 * 1024
+# Scratch space for files being hashed, relative to UPLOAD_FOLDER
+TEMP_FOLDER = '.partial'
+
+# Candidate columns that hold upload paths
+REFERENCE_COLUMNS = ('resume_attachments', 'self_introduction_video')
+
+
+def _abs(relpath):
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], relpath)
+
+def blob_relpath(subfolder, digest, ext):
+    """Path of a blob relative to UPLOAD_FOLDER, sharded by the first digest byte"""
+    return f"{subfolder}/{digest[:2]}/{digest}{ext.lower()}"
+
+def stream_to_temp(stream):
+    """Copy `stream` into a temp file while hashing it.
+
+    Returns (temp path, hex SHA-256, size in bytes).
+    """
+    temp_dir = _abs(TEMP_FOLDER)
+    os.makedirs(temp_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=temp_dir, suffix='.tmp')
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for block in iter(lambda: stream.read(COPY_BUFFER_SIZE), b''):
+                out.write(block)
+                digest.update(block)
+                size += len(block)
+    except Exception:
+        os.remove(temp_path)
+        raise
+    return temp_path, digest.hexdigest(), size
+
+def file_digest(path):
+    """Hex SHA-256 and size of a file on disk"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+            digest.update(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+def _mark_used(relpath):
+    # A deduplicated upload keeps the blob's old file (and its old mtime), so
+    # record the use for garbage collection (see app/upload_gc.py). False if
+    # the collector dropped the row meanwhile
+    result = db.session.execute(
+        update(UploadBlob.__table__).where(UploadBlob.path == relpath)
+        .values(last_used_at=datetime.utcnow())
+    )
+    db.session.commit()
+    return result.rowcount > 0
+
+def store_blob(temp_path, digest, size, subfolder, ext):
+    """Move a hashed temp file into the blob store and return its relative path.
+
+    A blob is identified by its digest, `subfolder` and extension, which
+    together make its path. If that blob already exists the temp file is
+    discarded and its path returned, so identical uploads of one kind share
+    one file, while the same bytes uploaded as another kind get their own.
+    """
+    storage = get_storage()
+    relpath = blob_relpath(subfolder, digest, ext)
+    blob = db.session.get(UploadBlob, relpath)
+    if blob is not None and not _mark_used(relpath):
+        db.session.expunge(blob)
+        blob = None
+    if blob is not None and storage.exists(relpath):
+        os.remove(temp_path)
+        return relpath
+
+    storage.save(temp_path, relpath)
+    if blob is not None:
+        logger.warning(f"Restored missing file for blob {relpath}")
+        return relpath
+
+    try:
+        db.session.add(UploadBlob(path=relpath, sha256=digest, size=size, ref_count=0))
+        db.session.commit()
+    except IntegrityError:
+        # Another worker stored the same content first, at the same path
+        db.session.rollback()
+        return relpath
+    logger.info(f"Stored new blob {relpath} ({size} bytes)")
+    return relpath
+
+def resolve_upload_path(filename):
+    """Map a requested upload path to the file that holds its content.
+
+    Legacy paths that were deduplicated resolve through UploadAlias to their
+    blob; anything else is returned unchanged.
+    """
+    alias = db.session.get(UploadAlias, filename)
+    if alias is not None:
+        return alias.blob_path
+    return filename
+
+
+def adjust_references(connection, paths, delta):
+    """Add `delta` references to each blob path in `paths` (repeats count twice).
+
+    Needed wherever candidates are written with Core statements, which skip
+    the mapper events below.
+    """
+    counts = Counter(p for p in paths if p)
+    if not counts:
+        return
+    blob = UploadBlob.__table__
+    connection.execute(
+        update(blob).where(blob.c.path == bindparam('b_path'))
+        .values(ref_count=blob.c.ref_count + bindparam('b_delta')),
+        [{'b_path': path, 'b_delta': delta * count} for path, count in counts.items()]
+    )
+
+def _candidate_paths(candidate):
+    return [getattr(candidate, column) for column in REFERENCE_COLUMNS]
+
+@event.listens_for(Candidate, 'after_insert')
+def _candidate_inserted(mapper, connection, candidate):
+    adjust_references(connection, _candidate_paths(candidate), 1)
+
+@event.listens_for(Candidate, 'after_delete')
+def _candidate_deleted(mapper, connection, candidate):
+    adjust_references(connection, _candidate_paths(candidate), -1)
+
+@event.listens_for(Candidate, 'after_update')
+def _candidate_updated(mapper, connection, candidate):
+    added, removed = [], []
+    for column in REFERENCE_COLUMNS:
+        history = get_history(candidate, column)
+        if history.has_changes():
+            added.extend(history.added)
+            removed.extend(history.deleted)
+    adjust_references(connection, added, 1)
+    adjust_references(connection, removed, -1)
+
+def release_job_references(job_id):
+    """Drop the blob references held by a job's candidates.
+
+    Call before bulk-deleting candidates with Query.delete(), which skips the
+    per-row events that normally maintain ref_count.
+    """
+    paths = []
+    for column_name in REFERENCE_COLUMNS:
+        column = getattr(Candidate, column_name)
+        rows = db.session.execute(
+            select(column, func.count()).where(Candidate.job_id == job_id, column.isnot(None)).group_by(column)
+        )
+        for path, count in rows:
+            paths.extend([path] * count)
+    adjust_references(db.session.connection(), paths, -1)
+
+def recount_references():
+    """Recompute every blob's ref_count from the candidate table"""
+    blob = UploadBlob.__table__
+    counts = [
+        select(func.count()).where(getattr(Candidate, column) == blob.c.path).scalar_subquery()
+        for column in REFERENCE_COLUMNS
+    ]
+    db.session.execute(update(blob).values(ref_count=counts[0] + counts[1]))
+    db.session.commit()
+
+
+def dedupe_existing_uploads(subfolders=('resumes', 'videos')):
+    """Fold legacy timestamped uploads into the blob store.
+
+    Each top-level file is hashed and moved to (or matched with) its blob,
+    its old path is kept as an UploadAlias so existing URLs still resolve,
+    and candidates are pointed at the blob path. Returns (files, bytes freed).
+    """
+    # Imported here: both modules import this one
+    from app.media import enqueue_video_processing
+    from app.resume_text import enqueue_resume_extraction
+
+    storage = get_storage()
+    processed = 0
+    freed = 0
+    moved = {'resumes': [], 'videos': []}
+    for subfolder in subfolders:
+        directory = _abs(subfolder)
+        if not os.path.isdir(directory):
+            continue
+        with os.scandir(directory) as entries:
+            legacy = [entry for entry in entries if entry.is_file()]
+        for entry in legacy:
+            old_path = f"{subfolder}/{entry.name}"
+            digest, size = file_digest(entry.path)
+            new_path = blob_relpath(subfolder, digest, os.path.splitext(entry.name)[1])
+            blob = db.session.get(UploadBlob, new_path)
+            if blob is not None and storage.exists(new_path):
+                os.remove(entry.path)
+                freed += size
+            else:
+                storage.save(entry.path, new_path)
+                if blob is None:
+                    db.session.add(UploadBlob(path=new_path, sha256=digest, size=size, ref_count=0))
+                    db.session.flush()
+            db.session.merge(UploadAlias(path=old_path, blob_path=new_path))
+            for column in REFERENCE_COLUMNS:
+                db.session.execute(
+                    update(Candidate).where(getattr(Candidate, column) == old_path)
+                    .values({column: new_path})
+                    .execution_options(synchronize_session=False)
+                )
+            # Commit per file so the alias is recorded as soon as the file moves
+            db.session.commit()
+            moved.setdefault(subfolder, []).append(new_path)
+            processed += 1
+    recount_references()
+    # Tasks queued for the old paths can no longer find their files; queue the
+    # new paths (resumes already extracted are only relinked)
+    enqueue_resume_extraction(db.session.connection(), moved['resumes'])
+    enqueue_video_processing(db.session.connection(), moved['videos'])
+    db.session.commit()
+    return processed, freed
+
+
+def migrate_uploads(source=None, delete_local=False):
+    """Copy local uploads into the configured storage backend.
+
+    Legacy flat uploads are first folded into the sharded blob store, then
+    every file under `source` (default UPLOAD_FOLDER) that the backend does
+    not have yet is copied across, keeping its path. Safe to re-run after
+    an interruption. Returns (files copied, files already present).
+    """
+    storage = get_storage()
+    source = os.path.abspath(source or current_app.config['UPLOAD_FOLDER'])
+    if source == os.path.abspath(current_app.config['UPLOAD_FOLDER']):
+        dedupe_existing_uploads()
+    if isinstance(storage, LocalStorage) and os.path.abspath(storage.root) == source:
+        return 0, 0
+    copied = present = 0
+    for directory, subdirs, files in os.walk(source):
+        # Skip scratch space (.partial) and other hidden folders
+        subdirs[:] = [d for d in subdirs if not d.startswith('.')]
+        for name in files:
+            path = os.path.join(directory, name)
+            key = os.path.relpath(path, source).replace(os.sep, '/')
+            if storage.exists(key):
+                present += 1
+            else:
+                storage.save(path, key, move=False)
+                copied += 1
+            if delete_local:
+                os.remove(path)
+    logger.info(f"Copied {copied} files to {storage.name} storage ({present} already there)")
+    return copied, present
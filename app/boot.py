@@ -0,0 +1,87 @@
+"""Schema and template setup at boot.
+
+Development keeps the simple path: create_app() creates missing tables
+with db.create_all() and compiles templates on first use. gunicorn.conf.py
+instead loads the app once in the master (preload_app) and forks the
+workers from it, so this work is done once per deploy rather than once per
+worker:
+
+- SCHEMA_CHECK=alembic replaces create_all, which inspects every table,
+  with one read of alembic_version compared with the migration heads; boot
+  fails while migrations are pending. SCHEMA_CHECK=none skips both.
+- PRELOAD_TEMPLATES compiles every template in the master, and forked
+  workers inherit them. JINJA_CACHE_DIR keeps the compiled bytecode on
+  disk, so a restarted master skips Jinja's parser too.
+
+Connections opened during boot are dropped in the forked workers (see
+app/database.py).
+"""
+from jinja2 import FileSystemBytecodeCache
+import click
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_CHECKS = ('create', 'alembic', 'none')
+
+
+def migrations_directory(app):
+    return os.path.join(os.path.dirname(app.root_path), 'migrations')
+
+def migration_heads(directory):
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+    config = Config()
+    config.set_main_option('script_location', directory)
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+def current_revisions(connection):
+    from alembic.runtime.migration import MigrationContext
+    return set(MigrationContext.configure(connection).get_current_heads())
+
+
+def ensure_schema(app, db):
+    """Create missing tables or verify the schema is at the migration head.
+
+    Returns True when the schema was verified to be fully migrated.
+    """
+    mode = (app.config.get('SCHEMA_CHECK') or 'create').lower()
+    if mode not in SCHEMA_CHECKS:
+        raise ValueError(f"SCHEMA_CHECK must be one of {', '.join(SCHEMA_CHECKS)}, not {mode!r}")
+    if mode == 'create':
+        try:
+            # Create tables only if they don't exist
+            db.create_all()
+        except Exception as e:
+            app.logger.error(f"Error creating database tables: {str(e)}")
+        return False
+    if mode == 'alembic':
+        heads = migration_heads(migrations_directory(app))
+        with db.engine.connect() as connection:
+            current = current_revisions(connection)
+        if current == heads:
+            return True
+        message = (f"Database schema is at {', '.join(sorted(current)) or 'no revision'}, "
+                   f"expected {', '.join(sorted(heads))}; run 'flask db upgrade'")
+        if click.get_current_context(silent=True) is not None:
+            # flask commands (db upgrade itself) must still load on an old schema
+            logger.warning(message)
+            return False
+        raise RuntimeError(message)
+    return False
+
+
+def init_templates(app):
+    """Bytecode cache and optional up-front compilation of every template"""
+    cache_dir = app.config.get('JINJA_CACHE_DIR')
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+    if app.config.get('PRELOAD_TEMPLATES'):
+        start = time.perf_counter()
+        names = app.jinja_env.list_templates()
+        for name in names:
+            app.jinja_env.get_template(name)
+        logger.info(f"Compiled {len(names)} templates in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,191 @@
+"""Declarative definition of the application flow.
+
+The chat (`routes.chat`) walks the STEPS one message at a time; the one-shot
+application endpoint validates the same fields in a single pass. Field
+validation is delegated to the Candidate model's @validates hooks, so both
+paths enforce exactly the rules in app/models.py.
+"""
+from app.models import Candidate
+from datetime import datetime
+
+# Pseudo-state returned once the declaration is confirmed
+SUBMIT = 'submit'
+
+# Candidate fields collected from the applicant, in validation order
+# (total_experience must precede relevant_experience, which is checked against it)
+APPLICATION_FIELDS = (
+    'first_name', 'last_name', 'personal_email', 'mobile_no', 'alternate_contact_no',
+    'highest_educational_qualifications', 'academic_performance', 'current_company',
+    'current_designation', 'total_experience', 'relevant_experience', 'primary_skills',
+    'resume_attachments', 'self_introduction_video', 'referred_by',
+)
+OPTIONAL_FIELDS = {
+    'alternate_contact_no', 'current_company', 'current_designation',
+    'self_introduction_video', 'referred_by',
+}
+# Unemployed applicants may omit experience; the chat records 0 for them
+DEFAULT_VALUES = {'total_experience': 0.0, 'relevant_experience': 0.0}
+
+_TRUE_VALUES = {'yes', 'true', 'on', '1'}
+
+
+def validate_field(field, value, context=None):
+    """Validate one field through the model and return the cleaned value.
+
+    `context` supplies previously collected fields that a validator depends
+    on (relevant_experience is compared with total_experience). Raises
+    ValueError with the model's message.
+    """
+    scratch = Candidate()
+    if field == 'relevant_experience' and context and context.get('total_experience') is not None:
+        scratch.total_experience = context['total_experience']
+    setattr(scratch, field, value)
+    return getattr(scratch, field)
+
+
+class Step:
+    """One state of the chat flow.
+
+    prompt      -- message shown when the flow enters this state
+    next_state  -- state to move to once the step is satisfied
+    field       -- candidate_data key the reply is validated into
+    error       -- reply on validation failure (default: model message + retry hint)
+    skip_word   -- reply that skips the field, moving to `skip_next` (or next_state)
+                   after merging `skip_values` into candidate_data
+    expect      -- exact reply (case-insensitive) required to advance; `reminder` otherwise
+    """
+
+    def __init__(self, state, prompt, next_state=None, field=None, error=None,
+                 skip_word=None, skip_next=None, skip_values=None, expect=None, reminder=None):
+        self.state = state
+        self.prompt = prompt
+        self.next_state = next_state
+        self.field = field
+        self.error = error
+        self.skip_word = skip_word
+        self.skip_next = skip_next
+        self.skip_values = skip_values or {}
+        self.expect = expect
+        self.reminder = reminder
+
+    def handle(self, message, candidate_data):
+        """Process a reply; return (next state or None to stay, response text)"""
+        reply = message.strip()
+        if self.expect is not None:
+            if reply.lower() != self.expect:
+                return None, self.reminder
+            next_state = self.next_state
+        elif self.skip_word is not None and reply.lower() == self.skip_word:
+            candidate_data.update(self.skip_values)
+            next_state = self.skip_next or self.next_state
+        elif self.field is not None:
+            try:
+                candidate_data[self.field] = validate_field(self.field, reply, candidate_data)
+            except ValueError as e:
+                return None, self.error or f"{e}. Please try again:"
+            next_state = self.next_state
+        else:
+            next_state = self.next_state
+
+        if next_state == SUBMIT:
+            return SUBMIT, None
+        return next_state, FLOW[next_state].prompt
+
+
+GREETING = ("Hi! I'm the RecruitEase chatbot. I'll help you with your job application. "
+            "Let's start with your name. What should I call you?")
+EXPERIENCE_ERROR = 'Please enter a valid, non-negative number for experience (e.g., 2.5):'
+
+STEPS = (
+    Step('greeting', GREETING, next_state='asking_first_name'),
+    Step('asking_first_name', 'Great! What is your first name?', next_state='asking_last_name',
+         field='first_name', error='First name must contain only alphabets. Please try again:'),
+    Step('asking_last_name', 'What is your last name?', next_state='asking_email',
+         field='last_name', error='Last name must contain only alphabets. Please try again:'),
+    Step('asking_email', 'Please enter your personal email address:', next_state='asking_mobile',
+         field='personal_email', error='Invalid email format. Please enter a valid email address:'),
+    Step('asking_mobile', 'Please enter your 10-digit mobile number:', next_state='asking_alternate_mobile',
+         field='mobile_no', error='Mobile number must be exactly 10 digits. Please try again:'),
+    Step('asking_alternate_mobile',
+         'Would you like to provide an alternate contact number? (Enter the number or type "skip"):',
+         next_state='asking_education', field='alternate_contact_no', skip_word='skip',
+         error='Alternate number must be exactly 10 digits. Please try again or type "skip":'),
+    Step('asking_education', 'What is your highest educational qualification?', next_state='asking_academic',
+         field='highest_educational_qualifications'),
+    Step('asking_academic', 'Please enter your academic performance (e.g., "8.5 CGPA" or "75%"):',
+         next_state='asking_company', field='academic_performance'),
+    Step('asking_company',
+         'Are you currently employed? If yes, please enter your company name (or type "no"):',
+         next_state='asking_designation', field='current_company', skip_word='no',
+         skip_next='asking_skills', skip_values=DEFAULT_VALUES),
+    Step('asking_designation', 'What is your current designation?', next_state='asking_total_experience',
+         field='current_designation'),
+    Step('asking_total_experience', 'Please enter your total work experience in years (e.g., 2.5):',
+         next_state='asking_relevant_experience', field='total_experience', error=EXPERIENCE_ERROR),
+    Step('asking_relevant_experience', 'Please enter your relevant experience in years:',
+         next_state='asking_skills', field='relevant_experience'),
+    Step('asking_skills', 'Please enter your primary skills (comma-separated):', next_state='asking_resume',
+         field='primary_skills'),
+    Step('asking_resume', 'Please upload your resume (PDF/DOC format):', next_state='asking_video',
+         expect='resume uploaded', reminder='Please use the upload button to submit your resume.'),
+    Step('asking_video', 'Great! Now, please record a short self-introduction video (maximum 2 minutes):',
+         next_state='asking_referral', expect='video uploaded',
+         reminder='Please use the record button to submit your video.'),
+    Step('asking_referral', 'Were you referred by someone? If yes, please enter their name (or type "no"):',
+         next_state='asking_declaration', field='referred_by', skip_word='no'),
+    Step('asking_declaration',
+         'Please confirm that all information provided is true and accurate (type "yes" to confirm):',
+         next_state=SUBMIT, expect='yes',
+         reminder='You must confirm the declaration to proceed. Type "yes" to confirm:'),
+)
+FLOW = {step.state: step for step in STEPS}
+FIRST_STATE = STEPS[0].state
+
+
+def handle_message(state, message, candidate_data):
+    """Advance the chat from `state`; returns (next state or None, response)"""
+    step = FLOW.get(state)
+    if step is None:
+        return None, 'Invalid state. Please start over.'
+    return step.handle(message, candidate_data)
+
+
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+    return None if value in (None, '') else value
+
+def build_candidate(job_id, data, declared=True):
+    """Validate every application field in one pass.
+
+    Returns (candidate, errors): an unsaved Candidate when `errors` is empty,
+    otherwise a dict mapping each invalid field to its message.
+    """
+    candidate = Candidate()
+    errors = {}
+    for field in APPLICATION_FIELDS:
+        value = _clean(data.get(field))
+        if value is None:
+            value = DEFAULT_VALUES.get(field)
+        if value is None and field in OPTIONAL_FIELDS:
+            continue
+        try:
+            setattr(candidate, field, value)
+        except (ValueError, TypeError) as e:
+            errors[field] = str(e)
+
+    if isinstance(declared, str):
+        declared = declared.strip().lower() in _TRUE_VALUES
+    try:
+        candidate.self_declaration = bool(declared)
+    except ValueError as e:
+        errors['self_declaration'] = str(e)
+
+    if errors:
+        return None, errors
+    try:
+        candidate.job_id = job_id
+    except ValueError as e:
+        return None, {'job_id': str(e)}
+    candidate.submitted_at = datetime.utcnow()
+    return candidate, {}
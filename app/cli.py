@@ -0,0 +1,157 @@
+import signal
+import sys
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app.queries import CandidateFilters
+from app.export import EXPORT_FORMATS, export_candidates
+from app.blobstore import dedupe_existing_uploads, migrate_uploads
+from app.importer import IMPORT_FORMATS, import_candidates
+from app.search import reindex_candidates, search_enabled
+from app.tasks import run_worker
+from app.scheduler import expire_jobs
+from app.upload_gc import collect_uploads
+import json
+
+
+def _open_output(path):
+    """Binary file object for `path`, or stdout when path is '-'"""
+    if path == '-':
+        return sys.stdout.buffer, False
+    return open(path, 'wb'), True
+
+
+@click.command('export-candidates')
+@click.option('--job-id', type=int, help='Only export candidates for this job.')
+@click.option('--from', 'submitted_from', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Only candidates submitted on or after this date (YYYY-MM-DD).')
+@click.option('--to', 'submitted_to', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Only candidates submitted on or before this date (YYYY-MM-DD).')
+@click.option('--skill', help='Only candidates whose primary skills contain this text.')
+@click.option('--format', 'fmt', type=click.Choice(sorted(EXPORT_FORMATS)), default='csv', show_default=True)
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output.')
+@click.option('--output', '-o', default='-', show_default=True, help="Output file, or '-' for stdout.")
+@with_appcontext
+def export_candidates_command(job_id, submitted_from, submitted_to, skill, fmt, compress, output):
+    """Stream candidates to a CSV or NDJSON file."""
+    filters = CandidateFilters(job_id=job_id, submitted_from=submitted_from,
+                               submitted_to=submitted_to, skill=skill)
+    stream, should_close = _open_output(output)
+    written = 0
+    try:
+        for chunk in export_candidates(filters, fmt, compress):
+            stream.write(chunk)
+            written += len(chunk)
+    finally:
+        if should_close:
+            stream.close()
+        else:
+            stream.flush()
+    if output != '-':
+        click.echo(f"Wrote {written} bytes to {output}", err=True)
+
+
+@click.command('dedupe-uploads')
+@with_appcontext
+def dedupe_uploads_command():
+    """Move legacy timestamped uploads into the content-addressed store."""
+    processed, freed = dedupe_existing_uploads()
+    click.echo(f"Processed {processed} files, freed {freed / (1024 * 1024):.1f}MB")
+
+
+@click.command('migrate-uploads')
+@click.option('--source', type=click.Path(exists=True, file_okay=False),
+              help='Folder to copy from (defaults to UPLOAD_FOLDER).')
+@click.option('--delete-local', is_flag=True, help='Remove each local file once it is stored.')
+@with_appcontext
+def migrate_uploads_command(source, delete_local):
+    """Copy local uploads into the configured storage backend."""
+    copied, present = migrate_uploads(source, delete_local=delete_local)
+    click.echo(f"Copied {copied} files ({present} already stored)")
+
+
+@click.command('import-candidates')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS),
+              help='Input format (default: from the file extension).')
+@click.option('--job-id', type=int, help='Job for rows that do not name one.')
+@click.option('--dry-run', is_flag=True, help='Validate only; write nothing.')
+@click.option('--batch-size', type=int, default=1000, show_default=True, help='Rows per transaction.')
+@click.option('--report', 'report_path', type=click.Path(dir_okay=False),
+              help='Write the JSON import report (with row errors) here.')
+@with_appcontext
+def import_candidates_command(path, fmt, job_id, dry_run, batch_size, report_path):
+    """Bulk-import candidates from a CSV or NDJSON file."""
+    if fmt is None:
+        ext = path.rsplit('.', 1)[-1].lower()
+        fmt = 'ndjson' if ext in ('ndjson', 'jsonl') else 'csv'
+    with open(path, 'rb') as stream:
+        report = import_candidates(stream, fmt, default_job_id=job_id, dry_run=dry_run, batch_size=batch_size)
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(report.to_dict(), f, indent=2)
+    click.echo(f"{'Validated' if dry_run else 'Imported'} {report.imported} of {report.total} rows, "
+               f"{report.failed} failed")
+
+
+@click.command('reindex-candidates')
+@click.option('--batch-size', type=int, default=2000, show_default=True, help='Rows per insert.')
+@with_appcontext
+def reindex_candidates_command(batch_size):
+    """Rebuild the full-text candidate search index."""
+    if not search_enabled():
+        raise click.ClickException("No search index for this database; search falls back to ILIKE")
+    click.echo(f"Indexed {reindex_candidates(batch_size)} candidates")
+
+
+def _stop_worker(signum, frame):
+    raise KeyboardInterrupt
+
+
+@click.command('run-worker')
+@click.option('--processes', type=int, help='Pool size (default: number of CPUs).')
+@click.option('--kind', 'kinds', multiple=True,
+              help='Only run tasks of this kind, e.g. video_postprocess (repeatable).')
+@click.option('--once', is_flag=True, help='Exit when no tasks are due.')
+@with_appcontext
+def run_worker_command(processes, kinds, once):
+    """Run queued background tasks (video processing, ...)."""
+    # Let SIGTERM unwind like Ctrl-C so in-flight tasks are handed back
+    signal.signal(signal.SIGTERM, _stop_worker)
+    try:
+        finished = run_worker(current_app._get_current_object(), processes, once=once, kinds=kinds or None)
+    except KeyboardInterrupt:
+        click.echo("Worker stopped", err=True)
+        return
+    click.echo(f"Finished {finished} tasks")
+
+
+@click.command('expire-jobs')
+@with_appcontext
+def expire_jobs_command():
+    """Mark jobs past their end date expired and inactive."""
+    click.echo(f"Expired {expire_jobs()} jobs")
+
+
+@click.command('collect-uploads')
+@click.option('--grace-hours', type=float, help='Keep files younger than this (default: UPLOAD_GC_GRACE_HOURS).')
+@click.option('--rate', type=float, help='Deletes per second (default: UPLOAD_GC_RATE).')
+@click.option('--dry-run', is_flag=True, help='Report orphans; delete nothing.')
+@with_appcontext
+def collect_uploads_command(grace_hours, rate, dry_run):
+    """Delete stored uploads that no candidate or session refers to."""
+    report = collect_uploads(grace_hours=grace_hours, rate=rate, dry_run=dry_run)
+    click.echo(f"Scanned {report.scanned} files, {report.orphaned} orphaned, deleted {report.deleted} "
+               f"({report.bytes_freed / (1024 * 1024):.1f}MB freed)")
+
+
+def register_commands(app):
+    """Attach the project's CLI commands to the Flask app"""
+    app.cli.add_command(export_candidates_command)
+    app.cli.add_command(dedupe_uploads_command)
+    app.cli.add_command(migrate_uploads_command)
+    app.cli.add_command(import_candidates_command)
+    app.cli.add_command(reindex_candidates_command)
+    app.cli.add_command(run_worker_command)
+    app.cli.add_command(expire_jobs_command)
+    app.cli.add_command(collect_uploads_command)
@@ -0,0 +1,114 @@
+"""Engine setup for gevent workers.
+
+gunicorn runs gevent workers, where one blocking database call stalls every
+greenlet in the worker. With DB_COOPERATIVE set (gunicorn.conf.py sets it
+for gevent workers):
+
+- psycopg2 waits on the server through gevent (a psycogreen-style wait
+  callback), so other greenlets run during queries;
+- MySQL URLs use PyMySQL, a pure-Python driver that goes through gevent's
+  patched sockets, instead of mysqlclient, which cannot yield.
+
+Each worker's pool is an equal share of DB_CONNECTION_BUDGET across
+WEB_CONCURRENCY workers, a third of it as overflow; greenlets beyond that
+wait up to pool_timeout for a connection. db.session is scoped to the app
+context, which lives in a contextvar and so is already per greenlet.
+
+SQLite gets WAL journaling and a busy timeout, so readers don't block the
+writer and a busy writer is waited for instead of failing at once.
+
+A process forked after the engine connected (gunicorn workers of a
+preloaded app, task pool processes) starts with an empty pool instead of
+sharing the parent's connections.
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from functools import partial
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+SQLITE_PRAGMAS = ('PRAGMA journal_mode=WAL', 'PRAGMA synchronous=NORMAL')
+
+
+def pool_limits(budget, workers):
+    """(pool_size, max_overflow) for one worker's share of the connection budget"""
+    share = max(1, budget // max(1, workers))
+    overflow = share // 3
+    return share - overflow, overflow
+
+
+def gevent_wait_callback(conn, timeout=None):
+    """psycopg2 wait callback that parks the greenlet instead of the worker"""
+    from gevent.socket import wait_read, wait_write
+    from psycopg2 import extensions, OperationalError
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise OperationalError(f"Bad result from poll: {state}")
+
+def make_drivers_cooperative():
+    """Install the gevent wait callback in psycopg2 if it is installed"""
+    try:
+        from psycopg2 import extensions
+    except ImportError:
+        return False
+    extensions.set_wait_callback(gevent_wait_callback)
+    return True
+
+def gevent_patched():
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+
+def configure_engine(app):
+    """Size the pool and pick a cooperative driver; call before the engine is created"""
+    config = app.config
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    cooperative = config.get('DB_COOPERATIVE') or gevent_patched()
+    if cooperative and url.get_backend_name() == 'mysql' and url.get_driver_name() == 'mysqldb':
+        url = url.set(drivername='mysql+pymysql')
+        config['SQLALCHEMY_DATABASE_URI'] = url.render_as_string(hide_password=False)
+        logger.info("Using PyMySQL: mysqlclient would block the gevent worker")
+
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if url.get_backend_name() == 'sqlite':
+        connect_args = dict(options.get('connect_args') or {})
+        connect_args.setdefault('timeout', config.get('SQLITE_BUSY_TIMEOUT', 5.0))
+        options['connect_args'] = connect_args
+    else:
+        pool_size, max_overflow = pool_limits(config.get('DB_CONNECTION_BUDGET', 60),
+                                              config.get('WEB_CONCURRENCY', 4))
+        options.setdefault('pool_size', pool_size)
+        options.setdefault('max_overflow', max_overflow)
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+def init_engine(app, db):
+    engine = db.engine
+    if hasattr(os, 'register_at_fork'):
+        # close=False: the parent still owns those connections
+        os.register_at_fork(after_in_child=partial(engine.dispose, close=False))
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', _sqlite_pragmas)
+    if gevent_patched() and engine.dialect.driver == 'psycopg2':
+        make_drivers_cooperative()
+    logger.debug(f"Database pool: {engine.pool.status()}")
@@ -0,0 +1,115 @@
+from app.models import db, Candidate
+from datetime import datetime
+import csv
+import io
+import json
+import zlib
+
+# Columns in the order they appear in exports (same keys as Candidate.to_dict)
+EXPORT_FIELDS = (
+    'id', 'job_id', 'first_name', 'last_name', 'personal_email', 'mobile_no',
+    'alternate_contact_no', 'highest_educational_qualifications', 'academic_performance',
+    'current_company', 'current_designation', 'total_experience', 'relevant_experience',
+    'primary_skills', 'resume_attachments', 'self_introduction_video', 'referred_by',
+    'self_declaration', 'submitted_at',
+)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+# Rows fetched per round-trip from the server-side cursor
+BATCH_SIZE = 1000
+# Encoded bytes buffered before a chunk is handed to the response/file
+CHUNK_SIZE = 64 * 1024
+
+# Leading characters that make spreadsheet apps treat a cell as a formula
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def iter_rows(filters, batch_size=BATCH_SIZE):
+    """Yield plain column tuples for the matching candidates, in id order.
+
+    The query selects columns rather than ORM entities so nothing is kept in
+    the session identity map, and `yield_per` streams results from a
+    server-side cursor where the driver supports one.
+    """
+    columns = [getattr(Candidate, name) for name in EXPORT_FIELDS]
+    query = filters.apply(db.session.query(*columns)).order_by(Candidate.id)
+    for row in query.yield_per(batch_size):
+        yield row
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(rows):
+    """Encode rows as CSV, yielding UTF-8 chunks of roughly CHUNK_SIZE bytes"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        writer.writerow([_csv_value(v) for v in row])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def iter_ndjson(rows):
+    """Encode rows as newline-delimited JSON objects"""
+    parts = []
+    size = 0
+    for row in rows:
+        line = json.dumps({k: _json_value(v) for k, v in zip(EXPORT_FIELDS, row)},
+                          separators=(',', ':')) + '\n'
+        parts.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield ''.join(parts).encode('utf-8')
+            parts = []
+            size = 0
+    if parts:
+        yield ''.join(parts).encode('utf-8')
+
+
+def gzip_chunks(chunks, level=6):
+    """Gzip a stream of byte chunks incrementally"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_candidates(filters, fmt='csv', compress=False, batch_size=BATCH_SIZE):
+    """Stream the candidates matching `filters` as encoded (optionally gzipped) bytes"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    rows = iter_rows(filters, batch_size=batch_size)
+    chunks = iter_csv(rows) if fmt == 'csv' else iter_ndjson(rows)
+    if compress:
+        chunks = gzip_chunks(chunks)
+    return chunks
+
+
+def export_filename(filters, fmt, compress=False):
+    """Download filename describing the export"""
+    name = f"candidates_job{filters.job_id}" if filters.job_id else "candidates"
+    name = f"{name}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{EXPORT_FORMATS[fmt][1]}"
+    return name + '.gz' if compress else name
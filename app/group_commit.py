@@ -0,0 +1,153 @@
+"""Group commit for application submissions.
+
+With GROUP_COMMIT on, save_candidate() does not commit in the request.
+It hands the validated Candidate to this worker's batcher and waits. The
+batcher inserts everything queued within GROUP_COMMIT_WINDOW_MS (or
+GROUP_COMMIT_MAX_ROWS rows) in one transaction, so a burst of applicants
+costs one commit, and one fsync, per batch rather than per applicant. Each
+request gets back its own id or error: if the batch fails, its rows are
+retried one per transaction so one bad row cannot fail the others.
+
+The batcher is a thread per worker process, started on first use. Under
+gunicorn's gevent workers threading is monkey-patched, so it runs as a
+greenlet and the waits are cooperative.
+"""
+from flask import current_app
+from app.models import db
+from app.metrics import observe_commit_batch
+from collections import deque
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_MS = 5
+DEFAULT_MAX_ROWS = 50
+# How long a request waits for its batch before giving up
+SUBMIT_TIMEOUT_SECONDS = 30
+
+
+class GroupCommitTimeout(Exception):
+    """The batcher did not commit a submission in time"""
+
+
+class _Pending:
+    """One queued row and, once its batch is done, the outcome"""
+
+    __slots__ = ('candidate', 'done', 'id', 'error')
+
+    def __init__(self, candidate):
+        self.candidate = candidate
+        self.done = threading.Event()
+        self.id = None
+        self.error = None
+
+
+class CommitBatcher:
+    """Collects Candidate rows from requests and inserts them in batches"""
+
+    def __init__(self, app, window_ms=DEFAULT_WINDOW_MS, max_rows=DEFAULT_MAX_ROWS):
+        self.app = app
+        self.window = window_ms / 1000.0
+        self.max_rows = max_rows
+        self._queue = deque()
+        self._ready = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+        self._thread.start()
+
+    def submit(self, candidate, timeout=SUBMIT_TIMEOUT_SECONDS):
+        """Queue a row and wait for its batch; returns its id or raises its error"""
+        pending = _Pending(candidate)
+        with self._ready:
+            self._queue.append(pending)
+            self._ready.notify()
+        if not pending.done.wait(timeout):
+            raise GroupCommitTimeout(f"Submission not committed within {timeout}s")
+        if pending.error is not None:
+            raise pending.error
+        return pending.id
+
+    def _next_batch(self):
+        with self._ready:
+            while not self._queue:
+                self._ready.wait()
+            # Give the rest of the burst a moment to join this batch
+            deadline = time.monotonic() + self.window
+            while len(self._queue) < self.max_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._ready.wait(remaining)
+            return [self._queue.popleft() for _ in range(min(self.max_rows, len(self._queue)))]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            with self.app.app_context():
+                try:
+                    self._commit(batch)
+                except Exception as e:
+                    logger.warning(f"Group commit of {len(batch)} rows failed, retrying one by one: {str(e)}")
+                    for pending in batch:
+                        try:
+                            self._commit([pending])
+                        except Exception as row_error:
+                            pending.error = row_error
+            for pending in batch:
+                pending.done.set()
+
+    def _commit(self, batch):
+        try:
+            db.session.add_all([pending.candidate for pending in batch])
+            db.session.flush()
+            # Read ids before the commit expires the rows
+            ids = [pending.candidate.id for pending in batch]
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            db.session.expunge_all()
+            raise
+        for pending, candidate_id in zip(batch, ids):
+            pending.id = candidate_id
+        observe_commit_batch(len(batch))
+
+
+_batcher = None
+_batcher_pid = None
+_batcher_lock = threading.Lock()
+
+
+def _get_batcher():
+    global _batcher, _batcher_pid
+    # A forked worker does not inherit the parent's thread
+    if _batcher is None or _batcher_pid != os.getpid():
+        with _batcher_lock:
+            if _batcher is None or _batcher_pid != os.getpid():
+                config = current_app.config
+                _batcher = CommitBatcher(current_app._get_current_object(),
+                                         window_ms=config.get('GROUP_COMMIT_WINDOW_MS', DEFAULT_WINDOW_MS),
+                                         max_rows=config.get('GROUP_COMMIT_MAX_ROWS', DEFAULT_MAX_ROWS))
+                _batcher_pid = os.getpid()
+    return _batcher
+
+
+def save_candidate(candidate):
+    """Insert a validated Candidate and return its id.
+
+    Commits through the worker's batcher when GROUP_COMMIT is on, otherwise
+    in the request's session. Raises on failure, with the session rolled back.
+    """
+    if current_app.config.get('GROUP_COMMIT'):
+        # Hand this request's connection back while it waits, or a burst
+        # could hold the whole pool and leave the batcher none to commit with
+        db.session.close()
+        return _get_batcher().submit(candidate)
+    try:
+        db.session.add(candidate)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return candidate.id
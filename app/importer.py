@@ -0,0 +1,231 @@
+from app.models import db, Job, Candidate, CANDIDATE_FIELD_CHECKS
+from app.blobstore import REFERENCE_COLUMNS, adjust_references
+from app.stats import invalidate_dashboard_stats
+from app.search import index_candidates, search_enabled
+from app.media import enqueue_video_processing
+from app.resume_text import enqueue_resume_extraction
+from app.uploads import UPLOAD_KINDS
+from sqlalchemy import insert, select
+from datetime import datetime
+import csv
+import io
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+# Rows validated and inserted per transaction
+BATCH_SIZE = 1000
+# Row errors kept in the report; the failure count is always exact
+MAX_REPORTED_ERRORS = 1000
+
+OPTIONAL_FIELDS = {
+    'alternate_contact_no', 'current_company', 'current_designation',
+    'self_introduction_video', 'referred_by',
+}
+# Imported file paths must be storage keys inside their kind's upload folder
+UPLOAD_PATH_FOLDERS = {column: folder for folder, _, column, _ in UPLOAD_KINDS.values()}
+_TRUE_VALUES = {'yes', 'true', 'y', 'on', '1'}
+_FALSE_VALUES = {'no', 'false', 'n', 'off', '0'}
+
+
+class ImportReport:
+    """Outcome of a bulk import, with per-row errors"""
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.total = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row, 'errors': errors})
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'imported': self.imported,
+            'failed': self.failed,
+            'dry_run': self.dry_run,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def iter_records(stream, fmt):
+    """Yield (row number, record dict or None, parse error) from a binary stream"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        for number, record in enumerate(csv.DictReader(text), start=1):
+            yield number, record, None
+    elif fmt == 'ndjson':
+        number = 0
+        for line in text:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield number, None, "Each line must be a JSON object"
+                continue
+            yield number, record, None
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+    return None if value in (None, '') else value
+
+def _parse_bool(value):
+    if isinstance(value, str):
+        lowered = value.lower()
+        if lowered in _TRUE_VALUES:
+            return True
+        if lowered in _FALSE_VALUES:
+            return False
+    return bool(value)
+
+def _check_upload_path(field, value):
+    """Reject a file path that is absolute, climbs with '..' or leaves its upload folder"""
+    folder = UPLOAD_PATH_FOLDERS[field]
+    parts = value.replace('\\', '/').split('/')
+    # An absolute path starts with an empty part, and a drive letter is not the folder
+    if parts[0] != folder or '..' in parts:
+        raise ValueError(f"{field} must be a path under {folder}/")
+
+def _parse_submitted_at(value):
+    if value is None:
+        return datetime.utcnow()
+    if isinstance(value, datetime):
+        return value
+    for parse in (datetime.fromisoformat, lambda v: datetime.strptime(v, '%Y-%m-%d %H:%M:%S')):
+        try:
+            return parse(str(value)).replace(tzinfo=None)
+        except ValueError:
+            continue
+    raise ValueError("submitted_at must be an ISO date/time")
+
+
+def validate_batch(batch, job_ids, default_job_id=None):
+    """Validate a batch of (row number, record) pairs column by column.
+
+    Each field's check from app/models.py runs over the whole batch in one
+    loop, and job ids are checked against a set resolved once per import.
+    Returns (rows ready for insert, {row number: {field: message}}).
+    """
+    values = [{} for _ in batch]
+    errors = {}
+
+    for field, check in CANDIDATE_FIELD_CHECKS.items():
+        optional = field in OPTIONAL_FIELDS
+        for index, (number, record) in enumerate(batch):
+            raw = _clean(record.get(field))
+            if field == 'self_declaration' and raw is not None:
+                raw = _parse_bool(raw)
+            if raw is None and optional:
+                values[index][field] = None
+                continue
+            try:
+                values[index][field] = check(field, raw)
+            except (ValueError, TypeError) as e:
+                errors.setdefault(number, {})[field] = str(e)
+
+    for index, (number, record) in enumerate(batch):
+        row = values[index]
+        row_errors = errors.get(number, {})
+        total, relevant = row.get('total_experience'), row.get('relevant_experience')
+        if total is not None and relevant is not None and relevant > total:
+            row_errors['relevant_experience'] = "Relevant experience cannot exceed total experience"
+        for field in UPLOAD_PATH_FOLDERS:
+            if row.get(field) is not None and field not in row_errors:
+                try:
+                    _check_upload_path(field, row[field])
+                except ValueError as e:
+                    row_errors[field] = str(e)
+
+        job_id = _clean(record.get('job_id')) or default_job_id
+        try:
+            job_id = int(job_id) if job_id is not None else None
+        except (TypeError, ValueError):
+            job_id = None
+        if job_id is None:
+            row_errors['job_id'] = "Job ID is required"
+        elif job_id not in job_ids:
+            row_errors['job_id'] = "Invalid Job ID"
+        row['job_id'] = job_id
+
+        try:
+            row['submitted_at'] = _parse_submitted_at(_clean(record.get('submitted_at')))
+        except ValueError as e:
+            row_errors['submitted_at'] = str(e)
+
+        if row_errors:
+            errors[number] = row_errors
+
+    valid = [values[index] for index, (number, _) in enumerate(batch) if number not in errors]
+    return valid, errors
+
+
+def _insert_batch(rows):
+    """Insert validated rows with one executemany, counting file references and indexing them"""
+    table = Candidate.__table__
+    connection = db.session.connection()
+    if search_enabled():
+        ids = db.session.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), rows).scalars()
+        for row, candidate_id in zip(rows, ids):
+            row['id'] = candidate_id
+        index_candidates(connection, rows)
+    else:
+        db.session.execute(insert(table), rows)
+    # Core inserts skip the ORM events that maintain blob reference counts,
+    # the search index and the video processing queue
+    paths = [row[column] for row in rows for column in REFERENCE_COLUMNS]
+    adjust_references(connection, paths, 1)
+    enqueue_video_processing(connection, [row['self_introduction_video'] for row in rows])
+    enqueue_resume_extraction(connection, [row['resume_attachments'] for row in rows])
+    db.session.commit()
+
+
+def import_candidates(stream, fmt, default_job_id=None, dry_run=False, batch_size=BATCH_SIZE):
+    """Validate and insert candidates from a CSV or NDJSON byte stream.
+
+    Valid rows are written in chunked transactions of `batch_size`; invalid
+    rows are skipped and reported. Returns an ImportReport.
+    """
+    report = ImportReport(dry_run=dry_run)
+    job_ids = set(db.session.execute(select(Job.id)).scalars())
+    batch = []
+
+    def flush():
+        valid, errors = validate_batch(batch, job_ids, default_job_id)
+        for number, row_errors in sorted(errors.items()):
+            report.add_error(number, row_errors)
+        if valid and not dry_run:
+            _insert_batch(valid)
+        report.imported += len(valid)
+        batch.clear()
+
+    for number, record, parse_error in iter_records(stream, fmt):
+        report.total += 1
+        if parse_error:
+            report.add_error(number, {'_row': parse_error})
+            continue
+        batch.append((number, record))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    if report.imported and not dry_run:
+        invalidate_dashboard_stats()
+    logger.info(f"Imported {report.imported} of {report.total} candidates ({report.failed} failed, dry_run={dry_run})")
+    return report
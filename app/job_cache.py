@@ -0,0 +1,174 @@
+from app.models import db, Job, CacheVersion
+from sqlalchemy import event, select, update
+from sqlalchemy.exc import IntegrityError
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 1024
+ENTRY_TTL_SECONDS = 60
+# How often a worker checks the shared version stamp; bounds how long other
+# workers can serve a job after it was edited, toggled or deleted
+VERSION_CHECK_SECONDS = 2
+VERSION_NAME = 'jobs'
+# Expired links are answered from memory for this long; like cached jobs they
+# are dropped when the version stamp changes, so a reopened job is served
+# again within VERSION_CHECK_SECONDS
+EXPIRED_LINK_TTL_SECONDS = 10 * 60
+
+_JOB_FIELDS = ('id', 'title', 'description', 'link_hash', 'start_date', 'end_date', 'is_active', 'status')
+
+
+class JobSnapshot(namedtuple('JobSnapshot', _JOB_FIELDS)):
+    """Immutable, session-independent copy of a Job row"""
+    __slots__ = ()
+
+    def is_expired(self):
+        """Check if the job posting has expired"""
+        return datetime.utcnow() > self.end_date if self.end_date else False
+
+    def get_application_link(self):
+        return f"/apply/{self.link_hash}"
+
+
+class JobCache:
+    """Bounded LRU cache of JobSnapshots keyed by id and by link_hash.
+
+    Misses are cached too (as None), so repeated hits on a dead link do not
+    reach the database either.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=ENTRY_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (snapshot or None, expires at)
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked = 0.0
+
+    def get(self, key):
+        """Return (hit, snapshot)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[1] <= now:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[0]
+
+    def put(self, key, snapshot):
+        with self._lock:
+            self._entries[key] = (snapshot, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def sync_version(self):
+        """Clear the cache if another worker bumped the shared version stamp"""
+        now = time.monotonic()
+        if now - self._version_checked < VERSION_CHECK_SECONDS:
+            return
+        self._version_checked = now
+        try:
+            version = _read_version()
+        except Exception as e:
+            logger.error(f"Error reading job cache version: {str(e)}")
+            self.clear()
+            return
+        if version != self._version:
+            self.clear()
+            _expired_links.clear()
+            self._version = version
+
+
+_cache = JobCache()
+_expired_links = JobCache(ttl=EXPIRED_LINK_TTL_SECONDS)
+
+
+def _read_version():
+    with db.engine.connect() as conn:
+        version = conn.execute(
+            select(CacheVersion.version).where(CacheVersion.name == VERSION_NAME)
+        ).scalar()
+    if version is None:
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(CacheVersion.__table__.insert().values(name=VERSION_NAME, version=0))
+        except IntegrityError:
+            pass
+        version = 0
+    return version
+
+def _load(criterion):
+    columns = [getattr(Job, name) for name in _JOB_FIELDS]
+    row = db.session.execute(select(*columns).where(criterion)).first()
+    return JobSnapshot(*row) if row else None
+
+def get_job(job_id):
+    """JobSnapshot for `job_id`, or None if there is no such job"""
+    if job_id is None:
+        return None
+    _cache.sync_version()
+    key = ('id', int(job_id))
+    hit, snapshot = _cache.get(key)
+    if not hit:
+        snapshot = _load(Job.id == int(job_id))
+        _cache.put(key, snapshot)
+    return snapshot
+
+def get_job_by_link(link_hash):
+    """JobSnapshot for an application link, or None if no job uses it"""
+    _cache.sync_version()
+    key = ('link', link_hash)
+    hit, snapshot = _cache.get(key)
+    if not hit:
+        snapshot = _load(Job.link_hash == link_hash)
+        _cache.put(key, snapshot)
+    if snapshot is not None and snapshot.is_expired():
+        _expired_links.put(link_hash, True)
+    return snapshot
+
+def link_expired(link_hash):
+    """True if this worker recently saw `link_hash` belong to an expired job.
+
+    Costs at most the throttled version check, so dead links shared long
+    after a posting closed barely reach the database.
+    """
+    _cache.sync_version()
+    hit, _ = _expired_links.get(link_hash)
+    return hit
+
+def invalidate_jobs():
+    """Clear this worker's cache; other workers follow via the version stamp"""
+    _cache.clear()
+    _expired_links.clear()
+
+
+def bump_jobs_version(connection):
+    """Invalidate every worker's job cache after a change made outside the ORM"""
+    table = CacheVersion.__table__
+    result = connection.execute(
+        update(table).where(table.c.name == VERSION_NAME).values(version=table.c.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(name=VERSION_NAME, version=1))
+    invalidate_jobs()
+
+def _bump_version(mapper, connection, target):
+    # Runs inside the flush, so the bump commits or rolls back with the change
+    bump_jobs_version(connection)
+
+event.listen(Job, 'after_insert', _bump_version)
+event.listen(Job, 'after_update', _bump_version)
+event.listen(Job, 'after_delete', _bump_version)
@@ -0,0 +1,54 @@
+"""Log output: leveled, optionally one JSON object per line, and sampled.
+
+LOG_SAMPLE_RATE keeps that fraction of DEBUG/INFO records (warnings and
+errors are always kept), which bounds log I/O on busy endpoints. Values
+passed with `extra=` appear as fields in JSON output.
+"""
+from flask import has_request_context, request
+import json
+import logging
+import random
+import sys
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if has_request_context():
+            entry['method'] = request.method
+            entry['path'] = request.path
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS})
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Pass records below WARNING with probability `rate`"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+def init_logging(app):
+    handler = logging.StreamHandler(sys.stderr)
+    if app.config.get('LOG_FORMAT') == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    handler.addFilter(SamplingFilter(float(app.config.get('LOG_SAMPLE_RATE', 1.0))))
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(app.config.get('LOG_LEVEL', 'INFO').upper())
@@ -0,0 +1,212 @@
+"""Intro-video post-processing.
+
+Every candidate video gets a background task that decodes it once and
+writes a poster frame, a sprite sheet of thumbnails and a downscaled
+rendition under previews/, then records duration and resolution on every
+candidate that references the video. Outputs are keyed by the video's file
+name, which for content-addressed uploads is its SHA-256, so a video shared
+by several candidates is processed once.
+"""
+from app.models import db, Candidate
+from app.tasks import enqueue_many, register_task
+from app.storage import get_storage
+from app.page_cache import bump_candidates_version
+from app.blobstore import TEMP_FOLDER
+from app.video_analysis import ANALYSIS_TASK, DEFAULT_SAMPLE_FPS
+from flask import current_app
+from sqlalchemy import event, update
+from sqlalchemy.orm.attributes import get_history
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+VIDEO_TASK = 'video_postprocess'
+# Derived files, under the storage root
+PREVIEW_FOLDER = 'previews'
+
+POSTER_SECOND = 1.0
+SPRITE_INTERVAL_SECONDS = 5.0
+SPRITE_MAX_FRAMES = 48
+SPRITE_COLUMNS = 6
+SPRITE_THUMB_WIDTH = 160
+PREVIEW_MAX_HEIGHT = 360
+PREVIEW_FPS = 15.0
+JPEG_QUALITY = 80
+# Tried in order; pip builds of OpenCV do not all ship the same encoders
+PREVIEW_CODECS = (('VP80', '.webm'), ('avc1', '.mp4'), ('mp4v', '.mp4'))
+
+
+def preview_folder(video_path):
+    """Storage folder for a video's derived files"""
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    return f"{PREVIEW_FOLDER}/{stem[:2]}/{stem}"
+
+def derived_keys(video_path):
+    """Every file process_video() may store for a video"""
+    folder = preview_folder(video_path)
+    names = ['poster.jpg', 'sprite.jpg', 'meta.json'] + sorted({f"preview{ext}" for _, ext in PREVIEW_CODECS})
+    return [f"{folder}/{name}" for name in names]
+
+
+def _scaled(frame, max_height):
+    import cv2
+    height, width = frame.shape[:2]
+    if height <= max_height:
+        return frame
+    scale = max_height / height
+    # Even dimensions keep every codec happy
+    size = (int(width * scale) // 2 * 2, int(max_height) // 2 * 2)
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+def _open_writer(path_stem, fps, size):
+    import cv2
+    for fourcc, ext in PREVIEW_CODECS:
+        writer = cv2.VideoWriter(path_stem + ext, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+        if writer.isOpened():
+            return writer, ext
+        writer.release()
+    return None, None
+
+def _write_image(path, image):
+    import cv2
+    cv2.imwrite(path, image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+
+def _sprite_sheet(thumbs):
+    import numpy as np
+    rows = []
+    for start in range(0, len(thumbs), SPRITE_COLUMNS):
+        row = thumbs[start:start + SPRITE_COLUMNS]
+        row += [np.zeros_like(thumbs[0])] * (SPRITE_COLUMNS - len(row))
+        rows.append(np.hstack(row))
+    return np.vstack(rows)
+
+
+def process_video(payload, upload_folder):
+    """Decode a video once and store its poster, sprite sheet and preview.
+
+    Runs in a worker pool process. Frames are streamed, so memory stays
+    bounded by one frame plus the small sprite thumbnails. Outputs are
+    rendered in a private work folder and then stored, meta.json last.
+    """
+    storage = get_storage()
+    video_path = payload['path']
+    folder = preview_folder(video_path)
+    meta_key = f"{folder}/meta.json"
+    if storage.exists(meta_key):
+        with storage.local_copy(meta_key) as meta_path, open(meta_path) as f:
+            return json.load(f)
+
+    scratch = os.path.join(upload_folder, TEMP_FOLDER)
+    os.makedirs(scratch, exist_ok=True)
+    work_dir = tempfile.mkdtemp(dir=scratch, prefix='video-')
+    try:
+        with storage.local_copy(video_path) as source:
+            result, files = _render_outputs(source, video_path, work_dir)
+        for name in files:
+            storage.save(os.path.join(work_dir, name), f"{folder}/{name}")
+        result.update({'poster': f"{folder}/poster.jpg", 'sprite': f"{folder}/sprite.jpg",
+                       'preview': f"{folder}/{files[2]}" if len(files) > 2 else None})
+        # Its presence marks the outputs as complete
+        meta_path = os.path.join(work_dir, 'meta.json')
+        with open(meta_path, 'w') as f:
+            json.dump(result, f)
+        storage.save(meta_path, meta_key)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return result
+
+def _render_outputs(source, video_path, work_dir):
+    """Write poster.jpg, sprite.jpg and a preview into `work_dir`.
+
+    Returns (duration and resolution, names of the files written).
+    """
+    import cv2
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"Cannot decode video: {video_path}")
+    writer = preview_ext = None
+    poster = None
+    thumbs = []
+    width = height = 0
+    duration_ms = 0.0
+    next_sprite_ms = 0.0
+    next_preview_ms = 0.0
+    frame_ms = 1000.0 / PREVIEW_FPS
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            # MediaRecorder files often lack duration metadata, so go by frame timestamps
+            position_ms = capture.get(cv2.CAP_PROP_POS_MSEC)
+            duration_ms = max(duration_ms, position_ms)
+            height, width = frame.shape[:2]
+
+            if poster is None or (position_ms <= POSTER_SECOND * 1000 and position_ms > 0):
+                poster = frame
+            if position_ms >= next_sprite_ms and len(thumbs) < SPRITE_MAX_FRAMES:
+                scale = SPRITE_THUMB_WIDTH / width
+                thumbs.append(cv2.resize(frame, (SPRITE_THUMB_WIDTH, int(height * scale) // 2 * 2),
+                                         interpolation=cv2.INTER_AREA))
+                next_sprite_ms += SPRITE_INTERVAL_SECONDS * 1000
+            if position_ms >= next_preview_ms:
+                scaled = _scaled(frame, PREVIEW_MAX_HEIGHT)
+                if writer is None:
+                    writer, preview_ext = _open_writer(os.path.join(work_dir, 'preview'), PREVIEW_FPS,
+                                                       (scaled.shape[1], scaled.shape[0]))
+                    if writer is None:
+                        logger.warning(f"No usable video encoder; skipping preview for {video_path}")
+                        next_preview_ms = float('inf')
+                        continue
+                writer.write(scaled)
+                next_preview_ms += frame_ms
+        if poster is None:
+            raise ValueError(f"Video has no decodable frames: {video_path}")
+    finally:
+        capture.release()
+        if writer is not None:
+            writer.release()
+
+    _write_image(os.path.join(work_dir, 'poster.jpg'), _scaled(poster, PREVIEW_MAX_HEIGHT))
+    _write_image(os.path.join(work_dir, 'sprite.jpg'), _sprite_sheet(thumbs))
+    files = ['poster.jpg', 'sprite.jpg'] + (['preview' + preview_ext] if preview_ext else [])
+    return {'duration': round(duration_ms / 1000, 2), 'width': width, 'height': height}, files
+
+def store_video_metadata(payload, result):
+    """Record processing results on every candidate that uses the video"""
+    db.session.execute(
+        update(Candidate).where(Candidate.self_introduction_video == payload['path'])
+        .values(video_duration=result['duration'], video_width=result['width'],
+                video_height=result['height'], video_poster=result['poster'],
+                video_sprite=result['sprite'], video_preview=result['preview'])
+        .execution_options(synchronize_session=False)
+    )
+    bump_candidates_version(db.session.connection())
+    db.session.commit()
+
+register_task(VIDEO_TASK, process_video, store_video_metadata)
+
+
+def enqueue_video_processing(connection, paths):
+    """Queue post-processing and analysis for each distinct video path not already queued"""
+    paths = list(dict.fromkeys(p for p in paths if p))
+    if not paths:
+        return
+    sample_fps = current_app.config.get('VIDEO_SAMPLE_FPS', DEFAULT_SAMPLE_FPS)
+    enqueue_many(connection, VIDEO_TASK, {path: {'path': path} for path in paths})
+    enqueue_many(connection, ANALYSIS_TASK, {path: {'path': path, 'sample_fps': sample_fps} for path in paths})
+
+@event.listens_for(Candidate, 'after_insert')
+def _candidate_inserted(mapper, connection, candidate):
+    enqueue_video_processing(connection, [candidate.self_introduction_video])
+
+@event.listens_for(Candidate, 'after_update')
+def _candidate_updated(mapper, connection, candidate):
+    history = get_history(candidate, 'self_introduction_video')
+    if history.has_changes():
+        enqueue_video_processing(connection, history.added)
@@ -0,0 +1,126 @@
+"""Prometheus metrics served at /metrics.
+
+Per endpoint: request latency, and the number and total time of SQL
+queries each request ran (counted with engine events). Also connection
+pool checkout waits, upload throughput and group-commit batch sizes.
+Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+(set in gunicorn.conf.py) and /metrics merges them, so a scrape covers all
+workers.
+"""
+from flask import current_app, g, request, has_request_context, Response, abort
+from prometheus_client import (Counter, Histogram, CollectorRegistry, REGISTRY,
+                               generate_latest, CONTENT_TYPE_LATEST)
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+import hmac
+import os
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+THROUGHPUT_BUCKETS = (64e3, 256e3, 1e6, 4e6, 16e6, 64e6, 256e6)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency', ('endpoint', 'method', 'status'),
+    buckets=LATENCY_BUCKETS)
+REQUEST_QUERIES = Histogram(
+    'http_request_sql_queries', 'SQL queries run per request', ('endpoint',),
+    buckets=QUERY_COUNT_BUCKETS)
+REQUEST_SQL_TIME = Histogram(
+    'http_request_sql_duration_seconds', 'Total SQL time per request', ('endpoint',),
+    buckets=LATENCY_BUCKETS)
+POOL_CHECKOUT_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled connection',
+    buckets=(0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30))
+COMMIT_BATCH_SIZE = Histogram(
+    'group_commit_batch_rows', 'Applications inserted per group commit',
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200))
+UPLOAD_BYTES = Counter('upload_bytes_total', 'Uploaded bytes received', ('kind',))
+UPLOAD_THROUGHPUT = Histogram(
+    'upload_throughput_bytes_per_second', 'Receive rate of each upload request', ('kind',),
+    buckets=THROUGHPUT_BUCKETS)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+def observe_upload(kind, size, seconds):
+    """Record an upload request that received `size` bytes in `seconds`"""
+    UPLOAD_BYTES.labels(kind).inc(size)
+    if size and seconds > 0:
+        UPLOAD_THROUGHPUT.labels(kind).observe(size / seconds)
+
+
+def observe_commit_batch(rows):
+    COMMIT_BATCH_SIZE.observe(rows)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if has_request_context():
+        g.sql_queries = g.get('sql_queries', 0) + 1
+        g.sql_seconds = g.get('sql_seconds', 0.0) + elapsed
+
+def _query_failed(context):
+    if context.connection is not None and context.connection.info.get('query_start'):
+        context.connection.info['query_start'].pop()
+
+def _start_timer():
+    g.request_start = time.perf_counter()
+
+def _record_request(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.labels(endpoint, request.method, response.status_code).observe(time.perf_counter() - start)
+        REQUEST_QUERIES.labels(endpoint).observe(g.get('sql_queries', 0))
+        REQUEST_SQL_TIME.labels(endpoint).observe(g.get('sql_seconds', 0.0))
+    return response
+
+
+def _registry():
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+def metrics_view():
+    """Prometheus text exposition; requires METRICS_TOKEN as a bearer token when set"""
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        abort(401)
+    return Response(generate_latest(_registry()), mimetype=CONTENT_TYPE_LATEST)
+
+
+def configure_pool(app):
+    """Use the timed pool where the dialect would pool with a QueuePool; call before the engine is created"""
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    # Other default pools (SQLite in memory, async drivers) keep their own
+    # behaviour and go without the checkout-wait histogram
+    if 'poolclass' not in options and url.get_dialect().get_pool_class(url) is QueuePool:
+        options['poolclass'] = TimedQueuePool
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+def init_metrics(app, db):
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _query_failed)
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
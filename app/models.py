@@ -1,9 +1,16 @@
 from app import db
 from datetime import datetime, timedelta
+from sqlalchemy import event
 from sqlalchemy.orm import validates
 import secrets
 import re
 
+# Validation patterns, compiled once and shared with the chat flow
+NAME_RE = re.compile(r'^[a-zA-Z\s]+$')
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+PHONE_RE = re.compile(r'^\d{10}$')
+SCORE_RE = re.compile(r'\d+(\.\d+)?')
+
 class Job(db.Model):
     """Job model to store available positions"""
     id = db.Column(db.Integer, primary_key=True)
@@ -13,8 +20,18 @@ class Job(db.Model):
     start_date = db.Column(db.DateTime, default=datetime.utcnow)
     end_date = db.Column(db.DateTime)
     is_active = db.Column(db.Boolean, default=True)
+    # 'active', 'inactive' or 'expired'; set on every flush and moved to
+    # 'expired' by the sweeper in app/scheduler.py once end_date passes
+    status = db.Column(db.String(20), nullable=False, default='active')
     candidates = db.relationship('Candidate', backref='job', lazy=True)
 
+    __table_args__ = (
+        # Active/expired job lookups on the dashboard
+        db.Index('ix_job_is_active_end_date', 'is_active', 'end_date'),
+        # The sweeper's search for jobs past their end date
+        db.Index('ix_job_status_end_date', 'status', 'end_date'),
+    )
+
     def generate_link(self, days_valid=10):
         """Generate a unique link hash and set expiry date"""
         self.link_hash = secrets.token_urlsafe(16)
@@ -27,11 +44,141 @@ class Job(db.Model):
         """Check if the job posting has expired"""
         return datetime.utcnow() > self.end_date if self.end_date else False
 
+    def current_status(self):
+        """Status implied by the end date and the active flag"""
+        if self.is_expired():
+            return 'expired'
+        return 'active' if self.is_active or self.is_active is None else 'inactive'
+
     def get_application_link(self):
         """Get the full application link"""
         # Note: Replace with your actual domain when deploying
         return f"/apply/{self.link_hash}"
 
+def _set_job_status(mapper, connection, job):
+    job.status = job.current_status()
+    # As the expiry sweep does, so a job saved past its end date is not left active
+    if job.status == 'expired':
+        job.is_active = False
+
+event.listen(Job, 'before_insert', _set_job_status)
+event.listen(Job, 'before_update', _set_job_status)
+
+# Field rules shared by the Candidate @validates hooks and batch validation
+def check_name(key, value):
+    if not value:
+        raise ValueError(f"{key} is required")
+    if not NAME_RE.match(value):
+        raise ValueError(f"{key} must contain only alphabets and spaces")
+    if len(value) > 50:
+        raise ValueError(f"{key} must be less than 50 characters")
+    return value
+
+def check_email(key, value):
+    if not value:
+        raise ValueError("Email is required")
+    if not EMAIL_RE.match(value):
+        raise ValueError("Invalid email format")
+    if len(value) > 120:
+        raise ValueError("Email must be less than 120 characters")
+    return value
+
+def check_phone(key, value):
+    if value:  # alternate_contact_no is optional
+        if not PHONE_RE.match(value):
+            raise ValueError(f"{key} must be a 10-digit number")
+        if len(value) > 15:
+            raise ValueError(f"{key} must be less than 15 characters")
+    elif key == 'mobile_no':  # mobile_no is required
+        raise ValueError("Mobile number is required")
+    return value
+
+def check_education(key, value):
+    if not value:
+        raise ValueError("Educational qualification is required")
+    if len(value) > 200:
+        raise ValueError("Educational qualification must be less than 200 characters")
+    return value
+
+def check_academic(key, value):
+    if not value:
+        raise ValueError("Academic performance is required")
+    try:
+        if 'cgpa' in value.lower():
+            score = float(SCORE_RE.search(value).group())
+            if not 0 <= score <= 10:
+                raise ValueError("CGPA must be between 0 and 10")
+        else:
+            score = float(SCORE_RE.search(value).group())
+            if not 0 <= score <= 100:
+                raise ValueError("Percentage must be between 0 and 100")
+    except (ValueError, AttributeError):
+        raise ValueError("Invalid academic performance format")
+    return value
+
+def check_optional_string(key, value):
+    if value and len(value) > 100:
+        raise ValueError(f"{key} must be less than 100 characters")
+    return value
+
+def check_experience(key, value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a number")
+    if value < 0:
+        raise ValueError(f"{key} cannot be negative")
+    return value
+
+def check_skills(key, value):
+    if not value:
+        raise ValueError("Primary skills are required")
+    skills = [s.strip() for s in value.split(',')]
+    if len(skills) > 3:
+        raise ValueError("Maximum 3 primary skills are allowed")
+    if len(value) > 255:
+        raise ValueError("Skills must be less than 255 characters total")
+    return value
+
+def check_resume(key, value):
+    if not value:
+        raise ValueError("Resume attachment is required")
+    if not value.lower().endswith(('.pdf', '.doc', '.docx')):
+        raise ValueError("Resume must be in PDF or DOC format")
+    if len(value) > 255:
+        raise ValueError("File path must be less than 255 characters")
+    return value
+
+def check_video(key, value):
+    if value and len(value) > 255:
+        raise ValueError("Video path must be less than 255 characters")
+    return value
+
+def check_declaration(key, value):
+    if not value:
+        raise ValueError("You must accept the self declaration")
+    return value
+
+# Per-field checks used by the Candidate validators and the bulk importer
+CANDIDATE_FIELD_CHECKS = {
+    'first_name': check_name,
+    'last_name': check_name,
+    'personal_email': check_email,
+    'mobile_no': check_phone,
+    'alternate_contact_no': check_phone,
+    'highest_educational_qualifications': check_education,
+    'academic_performance': check_academic,
+    'current_company': check_optional_string,
+    'current_designation': check_optional_string,
+    'referred_by': check_optional_string,
+    'total_experience': check_experience,
+    'relevant_experience': check_experience,
+    'primary_skills': check_skills,
+    'resume_attachments': check_resume,
+    'self_introduction_video': check_video,
+    'self_declaration': check_declaration,
+}
+
 class Candidate(db.Model):
     """Candidate model with all required fields and validations"""
     id = db.Column(db.Integer, primary_key=True)
@@ -52,125 +199,88 @@ class Candidate(db.Model):
     self_introduction_video = db.Column(db.String(255))
     referred_by = db.Column(db.String(100))
     self_declaration = db.Column(db.Boolean, nullable=False, default=False)
-    submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    submitted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Filled in by the background video post-processing task
+    video_duration = db.Column(db.Float)
+    video_width = db.Column(db.Integer)
+    video_height = db.Column(db.Integer)
+    video_poster = db.Column(db.String(255))
+    video_sprite = db.Column(db.String(255))
+    video_preview = db.Column(db.String(255))
+    # Filled in by the background video analysis task
+    video_face_ratio = db.Column(db.Float)
+    video_is_empty = db.Column(db.Boolean)
+    # Content hash of the resume, set once its text has been extracted
+    resume_sha256 = db.Column(db.String(64), index=True)
+
+    # Composite indexes matching the admin listings: each ends with the sort
+    # key and id so keyset pages are read straight off the index in order.
+    # Keep in sync with migrations/versions/.
+    __table_args__ = (
+        db.Index('ix_candidate_job_id_submitted_at', 'job_id', 'submitted_at', 'id'),
+        db.Index('ix_candidate_job_id_total_experience', 'job_id', 'total_experience', 'id'),
+        db.Index('ix_candidate_job_id_personal_email', 'job_id', 'personal_email'),
+        db.Index('ix_candidate_submitted_at', 'submitted_at', 'id'),
+        db.Index('ix_candidate_personal_email', 'personal_email'),
+    )
 
     @validates('job_id')
     def validate_job(self, key, value):
         if not value:
             raise ValueError("Job ID is required")
-        if not Job.query.get(value):
+        # Shared, cached lookup (imported here to avoid a circular import)
+        from app.job_cache import get_job
+        if not get_job(value):
             raise ValueError("Invalid Job ID")
         return value
 
     @validates('first_name', 'last_name')
     def validate_name(self, key, value):
-        if not value:
-            raise ValueError(f"{key} is required")
-        if not re.match(r'^[a-zA-Z\s]+$', value):
-            raise ValueError(f"{key} must contain only alphabets and spaces")
-        if len(value) > 50:
-            raise ValueError(f"{key} must be less than 50 characters")
-        return value
+        return check_name(key, value)
 
     @validates('personal_email')
     def validate_email(self, key, value):
-        if not value:
-            raise ValueError("Email is required")
-        if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', value):
-            raise ValueError("Invalid email format")
-        if len(value) > 120:
-            raise ValueError("Email must be less than 120 characters")
-        return value
+        return check_email(key, value)
 
     @validates('mobile_no', 'alternate_contact_no')
     def validate_phone(self, key, value):
-        if value:  # alternate_contact_no is optional
-            if not re.match(r'^\d{10}$', value):
-                raise ValueError(f"{key} must be a 10-digit number")
-            if len(value) > 15:
-                raise ValueError(f"{key} must be less than 15 characters")
-        elif key == 'mobile_no':  # mobile_no is required
-            raise ValueError("Mobile number is required")
-        return value
+        return check_phone(key, value)
 
     @validates('highest_educational_qualifications')
     def validate_education(self, key, value):
-        if not value:
-            raise ValueError("Educational qualification is required")
-        if len(value) > 200:
-            raise ValueError("Educational qualification must be less than 200 characters")
-        return value
+        return check_education(key, value)
 
     @validates('academic_performance')
     def validate_academic(self, key, value):
-        if not value:
-            raise ValueError("Academic performance is required")
-        try:
-            if 'cgpa' in value.lower():
-                score = float(re.search(r'\d+(\.\d+)?', value).group())
-                if not 0 <= score <= 10:
-                    raise ValueError("CGPA must be between 0 and 10")
-            else:
-                score = float(re.search(r'\d+(\.\d+)?', value).group())
-                if not 0 <= score <= 100:
-                    raise ValueError("Percentage must be between 0 and 100")
-        except (ValueError, AttributeError):
-            raise ValueError("Invalid academic performance format")
-        return value
+        return check_academic(key, value)
 
     @validates('current_company', 'current_designation', 'referred_by')
     def validate_optional_strings(self, key, value):
-        if value and len(value) > 100:
-            raise ValueError(f"{key} must be less than 100 characters")
-        return value
+        return check_optional_string(key, value)
 
     @validates('total_experience', 'relevant_experience')
     def validate_experience(self, key, value):
-        try:
-            value = float(value)
-        except (TypeError, ValueError):
-            raise ValueError(f"{key} must be a number")
-        
-        if value < 0:
-            raise ValueError(f"{key} cannot be negative")
-        
-        if key == 'relevant_experience' and hasattr(self, 'total_experience'):
+        value = check_experience(key, value)
+        if key == 'relevant_experience' and self.total_experience is not None:
             if value > self.total_experience:
                 raise ValueError("Relevant experience cannot exceed total experience")
         return value
 
     @validates('primary_skills')
     def validate_skills(self, key, value):
-        if not value:
-            raise ValueError("Primary skills are required")
-        skills = [s.strip() for s in value.split(',')]
-        if len(skills) > 3:
-            raise ValueError("Maximum 3 primary skills are allowed")
-        if len(value) > 255:
-            raise ValueError("Skills must be less than 255 characters total")
-        return value
+        return check_skills(key, value)
 
     @validates('resume_attachments')
     def validate_resume(self, key, value):
-        if not value:
-            raise ValueError("Resume attachment is required")
-        if not value.lower().endswith(('.pdf', '.doc', '.docx')):
-            raise ValueError("Resume must be in PDF or DOC format")
-        if len(value) > 255:
-            raise ValueError("File path must be less than 255 characters")
-        return value
+        return check_resume(key, value)
 
     @validates('self_introduction_video')
     def validate_video(self, key, value):
-        if value and len(value) > 255:
-            raise ValueError("Video path must be less than 255 characters")
-        return value
+        return check_video(key, value)
 
     @validates('self_declaration')
     def validate_declaration(self, key, value):
-        if not value:
-            raise ValueError("You must accept the self declaration")
-        return value
+        return check_declaration(key, value)
 
     def to_dict(self):
         return {
@@ -197,3 +307,84 @@ class Candidate(db.Model):
 
     def __repr__(self):
         return f'<Candidate {self.first_name} {self.last_name}>'
+
+
+class UploadBlob(db.Model):
+    """A stored upload, addressed by the SHA-256 of its contents.
+
+    Identical content uploaded as a different kind or with a different
+    extension gets its own blob, so a path always carries the right type.
+    """
+    path = db.Column(db.String(255), primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Last time an upload was stored or deduplicated into this blob; upload
+    # garbage collection keeps blobs used within its grace period
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<UploadBlob {self.path} refs={self.ref_count}>'
+
+class UploadAlias(db.Model):
+    """Legacy upload path that now points at a deduplicated blob"""
+    path = db.Column(db.String(255), primary_key=True)
+    blob_path = db.Column(db.String(255), db.ForeignKey('upload_blob.path'), nullable=False)
+    blob = db.relationship('UploadBlob')
+
+class ServerSession(db.Model):
+    """Server-side session data; the cookie only carries the signed id"""
+    id = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+class SchedulerLease(db.Model):
+    """Which process runs a periodic job until expires_at; see app/scheduler.py"""
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+class CacheVersion(db.Model):
+    """Version stamp shared by all workers; bumped to invalidate their local caches"""
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class BackgroundTask(db.Model):
+    """Durable unit of background work, claimed and run by `flask run-worker`"""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    # Identifies the work (e.g. the file path) so producers skip tasks already pending
+    dedupe_key = db.Column(db.String(255))
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Workers poll for due pending tasks and expired leases
+        db.Index('ix_background_task_status_run_after', 'status', 'run_after'),
+        # Producers look up pending tasks by dedupe key before enqueueing
+        db.Index('ix_background_task_dedupe', 'kind', 'status', 'dedupe_key'),
+    )
+
+    def __repr__(self):
+        return f'<BackgroundTask {self.id} {self.kind} {self.status}>'
+
+class ResumeText(db.Model):
+    """Text extracted from a resume file, keyed by the SHA-256 of its contents"""
+    sha256 = db.Column(db.String(64), primary_key=True)
+    status = db.Column(db.String(20), nullable=False)  # 'done' or 'failed'
+    text = db.Column(db.Text)
+    sections = db.Column(db.Text)  # JSON object: section name -> text
+    page_count = db.Column(db.Integer)
+    error = db.Column(db.Text)
+    extracted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ResumeText {self.sha256[:12]} {self.status}>'
@@ -0,0 +1,129 @@
+"""Rendered-page cache and conditional responses for the admin HTML pages.
+
+Each page is identified by a cheap stamp of the data it shows: the
+candidate count and latest submitted_at (for one job or overall) plus the
+shared 'jobs' and 'candidates' version stamps, read in one small query.
+The stamp, the URL and the host make up the page's ETag. A request whose
+If-None-Match matches gets a 304 without rendering, and any other request
+for the same ETag reuses the HTML rendered for it.
+
+New applications change the count; job edits bump 'jobs' (app/job_cache.py);
+candidate changes that keep the count, like background tasks writing video
+results, bump 'candidates' through bump_candidates_version().
+"""
+from flask import current_app, request
+from app.models import db, Candidate, CacheVersion
+from sqlalchemy import event, func, select, update
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+
+MAX_PAGES = 128
+VERSION_NAME = 'candidates'
+JOBS_VERSION_NAME = 'jobs'
+
+
+class PageCache:
+    """Bounded LRU of rendered HTML keyed by ETag"""
+
+    def __init__(self, max_entries=MAX_PAGES):
+        self.max_entries = max_entries
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag):
+        with self._lock:
+            html = self._pages.get(etag)
+            if html is not None:
+                self._pages.move_to_end(etag)
+            return html
+
+    def put(self, etag, html):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._pages[etag] = html
+            self._pages.move_to_end(etag)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+
+_pages = PageCache()
+_templates_stamp = None
+
+
+def _version(name):
+    return select(CacheVersion.version).where(CacheVersion.name == name).scalar_subquery()
+
+def candidate_stamp(job_id=None):
+    """(count, latest submitted_at, jobs version, candidates version), in one query"""
+    statement = select(func.count(Candidate.id), func.max(Candidate.submitted_at),
+                       _version(JOBS_VERSION_NAME), _version(VERSION_NAME))
+    if job_id is not None:
+        statement = statement.where(Candidate.job_id == job_id)
+    return tuple(db.session.execute(statement).one())
+
+def bump_candidates_version(connection):
+    """Invalidate cached pages after candidate rows changed without an insert"""
+    table = CacheVersion.__table__
+    result = connection.execute(
+        update(table).where(table.c.name == VERSION_NAME).values(version=table.c.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(name=VERSION_NAME, version=1))
+
+
+def _template_files_stamp():
+    # Pages rendered by an older release must not match after a deploy
+    global _templates_stamp
+    if _templates_stamp is None:
+        folder = os.path.join(current_app.root_path, current_app.template_folder)
+        stamps = []
+        for root, _, files in os.walk(folder):
+            for name in files:
+                stamps.append((name, os.stat(os.path.join(root, name)).st_mtime_ns))
+        _templates_stamp = hashlib.sha1(repr(sorted(stamps)).encode()).hexdigest()
+    return _templates_stamp
+
+def page_etag(key):
+    """ETag of the current request's page for a data stamp `key`"""
+    parts = (_template_files_stamp(), request.host_url, request.full_path, key)
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def cached_page(key, render):
+    """Response for a page whose content is fully determined by `key` and the URL.
+
+    `render` is called only when neither the client nor this worker holds
+    the page for the current key.
+    """
+    etag = page_etag(key)
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        html = _pages.get(etag)
+        if html is None:
+            html = render()
+            _pages.put(etag, html)
+        response = current_app.response_class(html, mimetype='text/html')
+    response.set_etag(etag)
+    # Browsers may keep the page but must revalidate on every refresh
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def init_page_cache(app):
+    _pages.max_entries = app.config.get('PAGE_CACHE_SIZE', MAX_PAGES)
+
+
+def _candidate_changed(mapper, connection, candidate):
+    bump_candidates_version(connection)
+
+event.listen(Candidate, 'after_update', _candidate_changed)
+event.listen(Candidate, 'after_delete', _candidate_changed)
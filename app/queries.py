@@ -0,0 +1,229 @@
+from app.models import db, Candidate
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import load_only
+from datetime import datetime, timedelta
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Sort orders keyed by the name accepted in ?sort=. Every order ends with
+# Candidate.id so the (key, id) pair is unique and usable as a keyset cursor.
+SORT_ORDERS = {
+    'newest': (Candidate.submitted_at, True),
+    'oldest': (Candidate.submitted_at, False),
+    'experience_desc': (Candidate.total_experience, True),
+    'experience_asc': (Candidate.total_experience, False),
+}
+DEFAULT_SORT = 'newest'
+
+# Columns each list view actually displays
+LIST_COLUMNS = (
+    'id', 'job_id', 'first_name', 'last_name', 'personal_email', 'mobile_no',
+    'highest_educational_qualifications', 'total_experience', 'primary_skills',
+    'resume_attachments', 'self_introduction_video', 'submitted_at',
+    'video_poster', 'video_preview', 'video_duration', 'video_face_ratio', 'video_is_empty',
+)
+API_COLUMNS = (
+    'id', 'job_id', 'first_name', 'last_name', 'personal_email', 'mobile_no',
+    'total_experience', 'primary_skills', 'submitted_at',
+)
+
+
+class InvalidQuery(ValueError):
+    """Raised when listing parameters or a cursor cannot be parsed"""
+
+
+def _parse_float(args, name):
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise InvalidQuery(f"{name} must be a number")
+
+
+def _parse_date(args, name):
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise InvalidQuery(f"{name} must be a date in YYYY-MM-DD format")
+
+
+class CandidateFilters:
+    """Filters and sort order for candidate listings, applied in SQL"""
+
+    def __init__(self, job_id=None, min_experience=None, max_experience=None,
+                 submitted_from=None, submitted_to=None, skill=None, sort=DEFAULT_SORT,
+                 min_face_ratio=None, max_video_duration=None, hide_empty_videos=False):
+        if sort not in SORT_ORDERS:
+            raise InvalidQuery(f"sort must be one of: {', '.join(SORT_ORDERS)}")
+        self.job_id = job_id
+        self.min_experience = min_experience
+        self.max_experience = max_experience
+        self.submitted_from = submitted_from
+        self.submitted_to = submitted_to
+        self.skill = skill
+        self.sort = sort
+        self.min_face_ratio = min_face_ratio
+        self.max_video_duration = max_video_duration
+        self.hide_empty_videos = hide_empty_videos
+
+    @classmethod
+    def from_args(cls, args):
+        """Build filters from request query arguments"""
+        job_id = args.get('job_id')
+        if job_id not in (None, ''):
+            try:
+                job_id = int(job_id)
+            except ValueError:
+                raise InvalidQuery("job_id must be an integer")
+        else:
+            job_id = None
+        return cls(
+            job_id=job_id,
+            min_experience=_parse_float(args, 'min_experience'),
+            max_experience=_parse_float(args, 'max_experience'),
+            submitted_from=_parse_date(args, 'submitted_from'),
+            submitted_to=_parse_date(args, 'submitted_to'),
+            skill=(args.get('skill') or '').strip() or None,
+            sort=args.get('sort') or DEFAULT_SORT,
+            min_face_ratio=_parse_float(args, 'min_face_ratio'),
+            max_video_duration=_parse_float(args, 'max_video_duration'),
+            hide_empty_videos=args.get('hide_empty_videos') in ('1', 'true', 'on'),
+        )
+
+    def to_args(self):
+        """Query arguments that reproduce these filters, for building page links"""
+        args = {}
+        if self.job_id is not None:
+            args['job_id'] = self.job_id
+        if self.min_experience is not None:
+            args['min_experience'] = self.min_experience
+        if self.max_experience is not None:
+            args['max_experience'] = self.max_experience
+        if self.submitted_from is not None:
+            args['submitted_from'] = self.submitted_from.strftime('%Y-%m-%d')
+        if self.submitted_to is not None:
+            args['submitted_to'] = self.submitted_to.strftime('%Y-%m-%d')
+        if self.skill:
+            args['skill'] = self.skill
+        if self.sort != DEFAULT_SORT:
+            args['sort'] = self.sort
+        if self.min_face_ratio is not None:
+            args['min_face_ratio'] = self.min_face_ratio
+        if self.max_video_duration is not None:
+            args['max_video_duration'] = self.max_video_duration
+        if self.hide_empty_videos:
+            args['hide_empty_videos'] = 1
+        return args
+
+    def apply(self, query):
+        """Add the WHERE clauses for these filters to a Candidate query"""
+        if self.job_id is not None:
+            query = query.filter(Candidate.job_id == self.job_id)
+        if self.min_experience is not None:
+            query = query.filter(Candidate.total_experience >= self.min_experience)
+        if self.max_experience is not None:
+            query = query.filter(Candidate.total_experience <= self.max_experience)
+        if self.submitted_from is not None:
+            query = query.filter(Candidate.submitted_at >= self.submitted_from)
+        if self.submitted_to is not None:
+            # The end date is inclusive of the whole day
+            query = query.filter(Candidate.submitted_at < self.submitted_to + timedelta(days=1))
+        if self.skill:
+            pattern = self.skill.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            query = query.filter(Candidate.primary_skills.ilike(f'%{pattern}%', escape='\\'))
+        # Video filters read the stored analysis results; unanalyzed videos don't match
+        if self.min_face_ratio is not None:
+            query = query.filter(Candidate.video_face_ratio >= self.min_face_ratio)
+        if self.max_video_duration is not None:
+            query = query.filter(Candidate.video_duration <= self.max_video_duration)
+        if self.hide_empty_videos:
+            query = query.filter(Candidate.video_is_empty.is_not(True))
+        return query
+
+
+def encode_cursor(sort, candidate):
+    """Encode the keyset position after `candidate` as an opaque token"""
+    column, _ = SORT_ORDERS[sort]
+    value = getattr(candidate, column.key)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort, value, candidate.id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, sort):
+    """Decode a cursor token into its (key value, id) pair"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        cursor_sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        last_id = int(last_id)
+    except (ValueError, TypeError):
+        raise InvalidQuery("Invalid cursor")
+    if cursor_sort != sort:
+        raise InvalidQuery("Cursor does not match the requested sort order")
+    column, _ = SORT_ORDERS[sort]
+    try:
+        if column.key == 'submitted_at':
+            value = datetime.fromisoformat(value)
+        else:
+            value = float(value)
+    except (ValueError, TypeError):
+        raise InvalidQuery("Invalid cursor")
+    return value, last_id
+
+
+def _after_cursor(column, descending, value, last_id):
+    """WHERE clause selecting rows strictly after (value, last_id) in sort order.
+
+    The redundant bound on `column` lets the database seek into the
+    (job_id, key, id) indexes instead of filtering the whole range.
+    """
+    if descending:
+        return and_(column <= value, or_(column < value, and_(column == value, Candidate.id < last_id)))
+    return and_(column >= value, or_(column > value, and_(column == value, Candidate.id > last_id)))
+
+
+def page_query(filters, cursor=None, limit=DEFAULT_PAGE_SIZE, columns=LIST_COLUMNS):
+    """Build the query for one keyset page (plus one row to detect a next page)"""
+    column, descending = SORT_ORDERS[filters.sort]
+
+    query = Candidate.query.options(load_only(*(getattr(Candidate, c) for c in columns)))
+    query = filters.apply(query)
+    if cursor:
+        value, last_id = decode_cursor(cursor, filters.sort)
+        query = query.filter(_after_cursor(column, descending, value, last_id))
+
+    # Sort keys are NOT NULL, so a plain ORDER BY matches the index order
+    if descending:
+        query = query.order_by(column.desc(), Candidate.id.desc())
+    else:
+        query = query.order_by(column.asc(), Candidate.id.asc())
+    return query.limit(limit + 1)
+
+
+def paginate_candidates(filters, cursor=None, limit=DEFAULT_PAGE_SIZE, columns=LIST_COLUMNS):
+    """Return one page of candidates and the cursor for the next page.
+
+    Only the requested columns are loaded, and the page is fetched with a
+    keyset condition on (sort key, id) so deep pages cost the same as the first.
+    """
+    limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    rows = page_query(filters, cursor, limit, columns).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(filters.sort, rows[-1])
+    return rows, next_cursor
+
+
+def count_candidates(filters):
+    """Count the candidates matching `filters` without loading any rows"""
+    return filters.apply(db.session.query(db.func.count(Candidate.id))).scalar()
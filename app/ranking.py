@@ -0,0 +1,204 @@
+"""Per-job candidate scoring.
+
+A job's candidates are loaded into NumPy arrays in one query and scored in
+batch: skill overlap with the job description, relevant and total
+experience (capped), and academic performance normalized from CGPA or
+percentage text. Arrays are cached per job and extended with only the new
+applications on the next request; deletions trigger a rebuild.
+"""
+from app.models import db, Candidate, SCORE_RE
+from app.job_cache import get_job
+from app.search import normalize_skill, skill_tokens
+from sqlalchemy import func, select
+from collections import OrderedDict, namedtuple
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Score components and their weights; scores are reported out of 100
+COMPONENTS = ('skills', 'relevant_experience', 'total_experience', 'academics')
+WEIGHTS = {'skills': 0.4, 'relevant_experience': 0.3, 'total_experience': 0.1, 'academics': 0.2}
+# Experience beyond this many years earns no extra credit
+EXPERIENCE_CAP_YEARS = 10.0
+
+MAX_CACHED_JOBS = 64
+DEFAULT_TOP_K = 20
+MAX_TOP_K = 500
+
+_WEIGHT_VECTOR = np.array([WEIGHTS[name] for name in COMPONENTS])
+
+RankedCandidate = namedtuple('RankedCandidate', ('id', 'score') + COMPONENTS)
+
+
+def parse_academic(value):
+    """Academic performance text as a fraction of its scale, or NaN.
+
+    '8.5 CGPA', '3.6 GPA' and bare numbers up to 10 are read as a 10-point
+    grade; anything else ('75%', '75') as a percentage.
+    """
+    match = SCORE_RE.search(value or '')
+    if not match:
+        return np.nan
+    score = float(match.group())
+    lowered = value.lower()
+    if 'gpa' in lowered or ('%' not in lowered and score <= 10):
+        return min(score / 10, 1.0)
+    return min(score / 100, 1.0)
+
+def description_text(description):
+    """Job description as normalized words with skill aliases applied, space-padded"""
+    words = (normalize_skill(word.rstrip('.,;:!?)').lstrip('(')) for word in (description or '').split())
+    return f" {' '.join(word for word in words if word)} "
+
+
+class JobRanking:
+    """Scored feature arrays for one job's candidates.
+
+    Skills are stored sparsely: `skill_ids` holds a vocabulary index per
+    (candidate, skill) pair and `skill_rows` the candidate row it belongs to.
+    `job_vector` marks which vocabulary entries the job description mentions.
+    """
+
+    def __init__(self, job_id, description):
+        self.job_id = job_id
+        self.lock = threading.Lock()
+        self._reset(description)
+
+    def _reset(self, description):
+        self.description = description
+        self._description_text = description_text(description)
+        self.vocabulary = {}
+        self.job_vector = np.zeros(0, dtype=bool)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.numeric = np.zeros((0, 3))
+        self.skill_ids = np.zeros(0, dtype=np.int64)
+        self.skill_rows = np.zeros(0, dtype=np.int64)
+        self.features = np.zeros((0, len(COMPONENTS)))
+        self.scores = np.zeros(0)
+
+    @property
+    def last_id(self):
+        return int(self.ids[-1]) if len(self.ids) else 0
+
+    def refresh(self, description):
+        """Bring the arrays up to date with the database, loading only what changed"""
+        if description != self.description:
+            self._reset(description)
+        count, max_id = db.session.execute(
+            select(func.count(Candidate.id), func.max(Candidate.id)).where(Candidate.job_id == self.job_id)
+        ).one()
+        if count == len(self.ids) and (max_id or 0) == self.last_id:
+            return
+        rows = self._load(after_id=self.last_id)
+        if len(self.ids) + len(rows) != count:
+            # Candidates were deleted since the last refresh
+            self._reset(description)
+            rows = self._load(after_id=0)
+        self._append(rows)
+
+    def _load(self, after_id):
+        return db.session.execute(
+            select(Candidate.id, Candidate.relevant_experience, Candidate.total_experience,
+                   Candidate.academic_performance, Candidate.primary_skills)
+            .where(Candidate.job_id == self.job_id, Candidate.id > after_id)
+            .order_by(Candidate.id)
+        ).all()
+
+    def _vocabulary_index(self, token):
+        index = self.vocabulary.get(token)
+        if index is None:
+            index = self.vocabulary[token] = len(self.vocabulary)
+        return index
+
+    def _append(self, rows):
+        if not rows:
+            return
+        start = len(self.ids)
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        numeric = np.array([(row[1], row[2], parse_academic(row[3])) for row in rows], dtype=float)
+
+        skill_ids, skill_rows = [], []
+        for offset, row in enumerate(rows):
+            for token in skill_tokens(row[4]):
+                skill_ids.append(self._vocabulary_index(token))
+                skill_rows.append(start + offset)
+
+        # Extend the cached job vector with the newly seen skills only
+        new_tokens = list(self.vocabulary)[len(self.job_vector):]
+        self.job_vector = np.concatenate([
+            self.job_vector,
+            np.array([f' {token} ' in self._description_text for token in new_tokens], dtype=bool),
+        ])
+
+        self.ids = np.concatenate([self.ids, ids])
+        self.numeric = np.vstack([self.numeric, numeric])
+        self.skill_ids = np.concatenate([self.skill_ids, np.array(skill_ids, dtype=np.int64)])
+        self.skill_rows = np.concatenate([self.skill_rows, np.array(skill_rows, dtype=np.int64)])
+        self._score_from(start)
+
+    def _score_from(self, start):
+        """Compute features and scores for rows `start` onwards"""
+        n = len(self.ids)
+        mask = self.skill_rows >= start
+        rows = self.skill_rows[mask] - start
+        matched = np.bincount(rows, weights=self.job_vector[self.skill_ids[mask]], minlength=n - start)
+        counts = np.bincount(rows, minlength=n - start)
+
+        numeric = self.numeric[start:]
+        experience = np.clip(np.nan_to_num(numeric[:, :2]) / EXPERIENCE_CAP_YEARS, 0.0, 1.0)
+        features = np.column_stack([
+            matched / np.maximum(counts, 1),
+            experience,
+            np.nan_to_num(numeric[:, 2]),
+        ])
+        self.features = np.vstack([self.features[:start], features])
+        self.scores = np.concatenate([self.scores[:start], features @ _WEIGHT_VECTOR * 100])
+
+    def top(self, k):
+        """Indices of the k best rows, best first (newer candidates win ties)"""
+        k = min(k, len(self.scores))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        best = np.argpartition(-self.scores, k - 1)[:k]
+        return best[np.lexsort((-self.ids[best], -self.scores[best]))]
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _ranking_for(job_id):
+    with _cache_lock:
+        ranking = _cache.get(job_id)
+        if ranking is None:
+            ranking = _cache[job_id] = JobRanking(job_id, None)
+        _cache.move_to_end(job_id)
+        while len(_cache) > MAX_CACHED_JOBS:
+            _cache.popitem(last=False)
+    return ranking
+
+def rank_candidates(job_id, k=DEFAULT_TOP_K):
+    """Top-k candidates for a job as RankedCandidates, plus the number scored.
+
+    Returns (None, 0) when the job does not exist.
+    """
+    job = get_job(job_id)
+    if job is None:
+        return None, 0
+    k = max(1, min(int(k or DEFAULT_TOP_K), MAX_TOP_K))
+    ranking = _ranking_for(job.id)
+    with ranking.lock:
+        ranking.refresh(job.description)
+        best = ranking.top(k)
+        results = [
+            RankedCandidate(int(ranking.ids[i]), round(float(ranking.scores[i]), 2),
+                            *(round(float(value) * 100, 1) for value in ranking.features[i]))
+            for i in best
+        ]
+        return results, len(ranking.ids)
+
+def clear_rankings():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,195 @@
+"""Resume text extraction.
+
+Each resume referenced by a candidate gets a background task that extracts
+its plain text and common sections (experience, education, skills, ...).
+Results are stored in resume_text keyed by the file's SHA-256, and
+candidates point at them through resume_sha256, so a file uploaded again
+or shared by several candidates is parsed once. Extraction runs in the
+worker pool under a timeout; a file that cannot be parsed is recorded as
+failed rather than retried.
+"""
+from app.models import db, Candidate, ResumeText, UploadBlob, UploadAlias
+from app.tasks import enqueue_many, register_task, TaskTimeout, DEDUPE_CHUNK_SIZE
+from app.blobstore import file_digest
+from app.storage import get_storage
+from sqlalchemy import bindparam, event, select, union_all, update
+from sqlalchemy.orm.attributes import get_history
+import json
+import logging
+import os
+import re
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+RESUME_TASK = 'resume_text'
+EXTRACTION_TIMEOUT_SECONDS = 60
+MAX_PDF_PAGES = 50
+MAX_TEXT_CHARS = 200000
+MAX_SECTION_CHARS = 5000
+PREVIEW_CHARS = 600
+
+# Section name -> headings that start it (compared lowercased, without punctuation)
+SECTION_HEADINGS = {
+    'summary': ('summary', 'profile', 'professional summary', 'objective', 'career objective', 'about me'),
+    'experience': ('experience', 'work experience', 'professional experience', 'employment',
+                   'employment history', 'work history'),
+    'education': ('education', 'academics', 'academic qualifications', 'qualifications',
+                  'educational qualifications'),
+    'skills': ('skills', 'technical skills', 'key skills', 'core competencies', 'skill set'),
+    'projects': ('projects', 'academic projects', 'key projects'),
+    'certifications': ('certifications', 'certificates', 'courses', 'training'),
+}
+_HEADING_LOOKUP = {heading: name for name, headings in SECTION_HEADINGS.items() for heading in headings}
+_HEADING_STRIP_RE = re.compile(r'[^a-z ]+')
+
+
+class UnsupportedResume(ValueError):
+    """Raised for resume formats that cannot be extracted"""
+
+
+def _pdf_text(path):
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    pages = reader.pages[:MAX_PDF_PAGES]
+    return '\n'.join(page.extract_text() or '' for page in pages), len(reader.pages)
+
+def _docx_text(path):
+    import docx
+    document = docx.Document(path)
+    lines = [paragraph.text for paragraph in document.paragraphs]
+    for table in document.tables:
+        for row in table.rows:
+            lines.append(' | '.join(cell.text for cell in row.cells))
+    return '\n'.join(lines), None
+
+def _doc_text(path):
+    # Legacy Word files need the antiword tool; it runs with its own time limit
+    try:
+        output = subprocess.run(['antiword', path], capture_output=True, check=True,
+                                timeout=EXTRACTION_TIMEOUT_SECONDS).stdout
+    except FileNotFoundError:
+        raise UnsupportedResume("antiword is not installed; cannot read .doc files")
+    return output.decode('utf-8', errors='replace'), None
+
+EXTRACTORS = {'.pdf': _pdf_text, '.docx': _docx_text, '.doc': _doc_text}
+
+
+def clean_text(text):
+    """Collapse runs of spaces and blank lines"""
+    lines = (re.sub(r'[ \t\xa0]+', ' ', line).strip() for line in text.splitlines())
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+def split_sections(text):
+    """Map section names to the lines under their headings"""
+    sections = {}
+    current = None
+    for line in text.splitlines():
+        key = _HEADING_STRIP_RE.sub('', line.lower()).strip()
+        if len(line) <= 40 and key in _HEADING_LOOKUP:
+            current = _HEADING_LOOKUP[key]
+            sections.setdefault(current, [])
+        elif current is not None and line:
+            sections[current].append(line)
+    return {name: '\n'.join(lines)[:MAX_SECTION_CHARS] for name, lines in sections.items() if lines}
+
+
+def extract_resume(payload, upload_folder):
+    """Extract text and sections from a resume; runs in a worker pool process"""
+    with get_storage().local_copy(payload.get('file') or payload['path']) as source:
+        digest = payload.get('sha256') or file_digest(source)[0]
+        extractor = EXTRACTORS.get(os.path.splitext(source)[1].lower())
+        try:
+            if extractor is None:
+                raise UnsupportedResume(f"Unsupported resume format: {os.path.splitext(source)[1]}")
+            text, page_count = extractor(source)
+        except (TaskTimeout, subprocess.TimeoutExpired):
+            return {'sha256': digest, 'status': 'failed', 'error': 'Extraction timed out'}
+        except Exception as e:
+            # Corrupt or unreadable files would fail the same way again; record, don't retry
+            return {'sha256': digest, 'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+    text = clean_text(text)[:MAX_TEXT_CHARS]
+    return {'sha256': digest, 'status': 'done', 'text': text, 'sections': split_sections(text),
+            'page_count': page_count}
+
+def store_resume_text(payload, result):
+    """Save an extraction result and point the resume's candidates at it"""
+    db.session.merge(ResumeText(
+        sha256=result['sha256'],
+        status=result['status'],
+        text=result.get('text'),
+        sections=json.dumps(result.get('sections') or {}),
+        page_count=result.get('page_count'),
+        error=result.get('error'),
+    ))
+    db.session.execute(
+        update(Candidate).where(Candidate.resume_attachments == payload['path'])
+        .values(resume_sha256=result['sha256'])
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if result['status'] == 'failed':
+        logger.warning(f"Could not extract resume {payload['path']}: {result['error']}")
+
+register_task(RESUME_TASK, extract_resume, store_resume_text, timeout=EXTRACTION_TIMEOUT_SECONDS)
+
+
+def _known_blobs(connection, paths):
+    """{upload path: (sha256, blob path)} for the paths found in the blob store or its aliases"""
+    blob = UploadBlob.__table__
+    alias = UploadAlias.__table__
+    rows = connection.execute(union_all(
+        select(blob.c.path.label('upload_path'), blob.c.sha256, blob.c.path).where(blob.c.path.in_(paths)),
+        select(alias.c.path.label('upload_path'), blob.c.sha256, blob.c.path)
+        .join(blob, alias.c.blob_path == blob.c.path).where(alias.c.path.in_(paths)),
+    ))
+    return {upload_path: (digest, blob_path) for upload_path, digest, blob_path in rows}
+
+def enqueue_resume_extraction(connection, paths):
+    """Queue extraction for each distinct resume path whose content is not yet extracted.
+
+    Set-based, so a bulk import pays a fixed number of statements per chunk
+    of paths: one blob lookup, one ResumeText lookup, one relinking UPDATE
+    for paths already extracted and the enqueue_many() of the rest.
+    """
+    paths = list(dict.fromkeys(p for p in paths if p))
+    resume_text = ResumeText.__table__
+    candidate = Candidate.__table__
+    for start in range(0, len(paths), DEDUPE_CHUNK_SIZE):
+        chunk = paths[start:start + DEDUPE_CHUNK_SIZE]
+        blobs = _known_blobs(connection, chunk)
+        digests = {digest for digest, _ in blobs.values()}
+        extracted = set(connection.execute(
+            select(resume_text.c.sha256).where(resume_text.c.sha256.in_(digests))
+        ).scalars()) if digests else set()
+
+        relink = [{'r_path': path, 'r_sha256': blobs[path][0]}
+                  for path in chunk if path in blobs and blobs[path][0] in extracted]
+        if relink:
+            connection.execute(
+                update(candidate).where(candidate.c.resume_attachments == bindparam('r_path'))
+                .values(resume_sha256=bindparam('r_sha256')),
+                relink
+            )
+        tasks = {}
+        for path in chunk:
+            digest, blob_path = blobs.get(path, (None, None))
+            if digest not in extracted:
+                tasks[path] = {'path': path, 'file': blob_path or path, 'sha256': digest}
+        enqueue_many(connection, RESUME_TASK, tasks)
+
+def resume_text_for(candidate):
+    """The ResumeText for a candidate's resume, or None if not extracted yet"""
+    if candidate.resume_sha256 is None:
+        return None
+    return db.session.get(ResumeText, candidate.resume_sha256)
+
+@event.listens_for(Candidate, 'after_insert')
+def _candidate_inserted(mapper, connection, candidate):
+    enqueue_resume_extraction(connection, [candidate.resume_attachments])
+
+@event.listens_for(Candidate, 'after_update')
+def _candidate_updated(mapper, connection, candidate):
+    history = get_history(candidate, 'resume_attachments')
+    if history.has_changes():
+        enqueue_resume_extraction(connection, history.added)
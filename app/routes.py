@@ -1,48 +1,18 @@
-from flask import Blueprint, render_template, request, jsonify, current_app, session, redirect, url_for, send_from_directory
-from app.models import db, Candidate, Job
-import os
+from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for
+from app.models import db
+from app.job_cache import get_job, get_job_by_link, link_expired
+from app.chat_flow import FLOW, FIRST_STATE, SUBMIT, handle_message, build_candidate
+from app.group_commit import save_candidate
+from app.uploads import (ALLOWED_RESUME_EXTENSIONS, ALLOWED_VIDEO_EXTENSIONS, UPLOAD_KINDS,
+                         DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, UploadError, allowed_file, save_file,
+                         create_upload, load_upload, current_offset, write_chunk, finalize_upload)
 from werkzeug.utils import secure_filename
-import re
-from datetime import datetime
+import secrets
 import logging
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-ALLOWED_RESUME_EXTENSIONS = {'pdf', 'doc', 'docx'}
-ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'webm', 'mov'}
-
-def allowed_file(filename, allowed_extensions):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
-
-def save_file(file, subfolder):
-    if file:
-        try:
-            # Get the current timestamp
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            
-            # Secure the filename and add timestamp
-            filename = secure_filename(file.filename)
-            filename = f"{timestamp}_{filename}"
-            
-            # Create the full path
-            upload_folder = current_app.config['UPLOAD_FOLDER']
-            subfolder_path = os.path.join(upload_folder, subfolder)
-            
-            # Ensure the directory exists
-            os.makedirs(subfolder_path, exist_ok=True)
-            
-            # Save the file
-            file_path = os.path.join(subfolder_path, filename)
-            file.save(file_path)
-            logger.info(f"File saved successfully at: {file_path}")
-            
-            return filename
-        except Exception as e:
-            logger.error(f"Error saving file: {str(e)}")
-            return None
-    return None
-
 main = Blueprint('main', __name__)
 
 @main.route('/')
@@ -54,14 +24,17 @@ def index():
 def apply(link_hash):
     """Handle job-specific application"""
     try:
-        logger.info(f"Accessing job with link_hash: {link_hash}")
+        logger.debug(f"Accessing job with link_hash: {link_hash}")
+        
+        if link_expired(link_hash):
+            return render_template('expired.html')
         
-        job = Job.query.filter_by(link_hash=link_hash).first()
+        job = get_job_by_link(link_hash)
         if not job:
             logger.error(f"No job found with link_hash: {link_hash}")
             return render_template('error.html', message="Job not found"), 404
             
-        logger.info(f"Found job: {job.id} - {job.title}")
+        logger.debug(f"Found job: {job.id} - {job.title}")
         
         if job.is_expired():
             logger.info(f"Job {job.id} has expired")
@@ -76,7 +49,7 @@ def apply(link_hash):
         session['state'] = 'initial'
         session['candidate_data'] = {}
         
-        logger.info(f"Session initialized for job {job.id}")
+        logger.debug(f"Session initialized for job {job.id}")
         return render_template('index.html', job=job)
         
     except Exception as e:
@@ -96,11 +69,11 @@ def upload_resume():
         if not allowed_file(file.filename, ALLOWED_RESUME_EXTENSIONS):
             return jsonify({'error': 'Invalid file type'}), 400
         
-        filename = save_file(file, 'resumes')
-        if filename:
-            # Store the filename in session with the resumes/ prefix
+        path = save_file(file, 'resumes')
+        if path:
+            # Store the path (relative to UPLOAD_FOLDER) in session
             candidate_data = session.get('candidate_data', {})
-            candidate_data['resume_attachments'] = os.path.join('resumes', filename)
+            candidate_data['resume_attachments'] = path
             session['candidate_data'] = candidate_data
             return jsonify({'message': 'Resume uploaded successfully'}), 200
         else:
@@ -123,11 +96,11 @@ def upload_video():
         if not allowed_file(file.filename, ALLOWED_VIDEO_EXTENSIONS):
             return jsonify({'error': 'Invalid file type'}), 400
         
-        filename = save_file(file, 'videos')
-        if filename:
-            # Store the filename in session with the videos/ prefix
+        path = save_file(file, 'videos')
+        if path:
+            # Store the path (relative to UPLOAD_FOLDER) in session
             candidate_data = session.get('candidate_data', {})
-            candidate_data['self_introduction_video'] = os.path.join('videos', filename)
+            candidate_data['self_introduction_video'] = path
             session['candidate_data'] = candidate_data
             return jsonify({'message': 'Video uploaded successfully'}), 200
         else:
@@ -137,243 +110,225 @@ def upload_video():
         logger.error(f"Error uploading video: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@main.route('/uploads/<path:filename>')
-def uploaded_file(filename):
+def _upload_owner():
+    """Per-browser token tying chunked uploads to the session that created them"""
+    owner = session.get('upload_owner')
+    if not owner:
+        owner = secrets.token_urlsafe(16)
+        session['upload_owner'] = owner
+    return owner
+
+def _upload_error(e):
+    body = {'error': str(e)}
+    if e.offset is not None:
+        body['offset'] = e.offset
+    return jsonify(body), e.status
+
+@main.route('/api/uploads', methods=['POST'])
+def create_chunked_upload():
+    """Start a resumable upload.
+
+    JSON body: {"kind": "resume"|"video", "filename": ..., "size": optional
+    total bytes, "sha256": optional hex digest of the whole file}.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        meta = create_upload(data.get('kind'), data.get('filename'), size=data.get('size'),
+                             sha256=data.get('sha256'), owner=_upload_owner())
+        return jsonify({
+            'upload_id': meta['id'],
+            'offset': 0,
+            'chunk_size': DEFAULT_CHUNK_SIZE,
+            'max_chunk_size': MAX_CHUNK_SIZE
+        }), 201
+    except UploadError as e:
+        return _upload_error(e)
+    except Exception as e:
+        logger.error(f"Error creating upload: {str(e)}")
+        return jsonify({'error': 'Error creating upload'}), 500
+
+@main.route('/api/uploads/<upload_id>', methods=['GET'])
+def chunked_upload_status(upload_id):
+    """Report how many bytes of an upload have been received"""
     try:
-        directory = os.path.dirname(filename)
-        file_name = os.path.basename(filename)
-        upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], directory)
-        logger.info(f"Serving file: {file_name} from directory: {upload_path}")
-        return send_from_directory(upload_path, file_name)
+        meta = load_upload(upload_id, owner=session.get('upload_owner'))
+        return jsonify({'upload_id': upload_id, 'offset': current_offset(meta), 'size': meta.get('size')})
+    except UploadError as e:
+        return _upload_error(e)
+
+@main.route('/api/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    """Append one chunk. The byte offset comes from ?offset= or the Upload-Offset
+    header; an optional X-Chunk-SHA256 header is checked before the chunk is kept."""
+    try:
+        meta = load_upload(upload_id, owner=session.get('upload_owner'))
+        offset = request.args.get('offset', request.headers.get('Upload-Offset'), type=int)
+        if offset is None:
+            raise UploadError("offset is required")
+        new_offset = write_chunk(meta, offset, request.stream, request.content_length,
+                                 chunk_sha256=request.headers.get('X-Chunk-SHA256'))
+        return jsonify({'upload_id': upload_id, 'offset': new_offset})
+    except UploadError as e:
+        return _upload_error(e)
+    except Exception as e:
+        logger.error(f"Error writing chunk for upload {upload_id}: {str(e)}")
+        return jsonify({'error': 'Error saving chunk'}), 500
+
+@main.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+def complete_chunked_upload(upload_id):
+    """Verify and store a finished upload, then record it in candidate_data"""
+    try:
+        meta = load_upload(upload_id, owner=session.get('upload_owner'))
+        path = finalize_upload(meta)
+        candidate_data = session.get('candidate_data', {})
+        candidate_data[UPLOAD_KINDS[meta['kind']][2]] = path
+        session['candidate_data'] = candidate_data
+        return jsonify({'message': f"{meta['kind'].capitalize()} uploaded successfully"}), 200
+    except UploadError as e:
+        return _upload_error(e)
     except Exception as e:
-        logger.error(f"Error serving file {filename}: {str(e)}")
-        return jsonify({'error': 'File not found'}), 404
+        logger.error(f"Error completing upload {upload_id}: {str(e)}")
+        return jsonify({'error': 'Error saving file'}), 500
 
 @main.route('/api/chat', methods=['POST'])
 def chat():
     try:
-        message = request.json.get('message', '').strip()
+        message = (request.json or {}).get('message', '').strip()
         state = session.get('state', 'initial')
         candidate_data = session.get('candidate_data', {})
         job_id = session.get('job_id')
         
-        print(f"Chat API - Current job_id in session: {job_id}")  # Debug log
+        logger.debug(f"Chat API - job_id in session: {job_id}, state: {state}")
 
         if not job_id:
-            print("No job_id found in session!")  # Debug log
+            logger.info("Chat message without a job_id in session")
             return jsonify({
                 'response': 'Session expired. Please start over from the job application link.',
                 'completed': False
             })
         
         # Verify job still exists
-        job = Job.query.get(job_id)
+        job = get_job(job_id)
         if not job:
-            print(f"Job with id {job_id} not found!")  # Debug log
+            logger.info(f"Chat message for missing job {job_id}")
             return jsonify({
                 'response': 'Invalid job. Please start over from the job application link.',
                 'completed': False
             })
 
-        print(f"Processing application for job: {job.id} - {job.title}")  # Debug log
-
         if state == 'initial':
-            # Get the job from session
-            job = Job.query.get(job_id)
-            if not job:
-                return jsonify({
-                    'response': 'Invalid job. Please start over from the job application link.',
-                    'completed': False
-                })
-            
-            # Store job_id in session
-            session['job_id'] = job.id
-            session['state'] = 'greeting'
+            session['state'] = FIRST_STATE
             session['candidate_data'] = {}  # Initialize empty candidate data
-            return jsonify({'response': "Hi! I'm the RecruitEase chatbot. I'll help you with your job application. Let's start with your name. What should I call you?"})
-
-        elif state == 'greeting':
-            session['state'] = 'asking_first_name'
-            return jsonify({'response': "Great! What is your first name?"})
-
-        elif state == 'asking_first_name':
-            if not re.match(r'^[a-zA-Z\s]+$', message):
-                return jsonify({'response': 'First name must contain only alphabets. Please try again:'})
-            candidate_data['first_name'] = message.strip()
-            session['state'] = 'asking_last_name'
-            session['candidate_data'] = candidate_data
-            return jsonify({'response': 'What is your last name?'})
-
-        elif state == 'asking_last_name':
-            if not re.match(r'^[a-zA-Z\s]+$', message):
-                return jsonify({'response': 'Last name must contain only alphabets. Please try again:'})
-            candidate_data['last_name'] = message.strip()
-            session['state'] = 'asking_email'
-            session['candidate_data'] = candidate_data
-            return jsonify({'response': 'Please enter your personal email address:'})
-
-        elif state == 'asking_email':
-            if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', message):
-                return jsonify({'response': 'Invalid email format. Please enter a valid email address:'})
-            candidate_data['personal_email'] = message.strip()
-            session['state'] = 'asking_mobile'
-            session['candidate_data'] = candidate_data
-            return jsonify({'response': 'Please enter your 10-digit mobile number:'})
+            return jsonify({'response': FLOW[FIRST_STATE].prompt})
 
-        elif state == 'asking_mobile':
-            if not re.match(r'^\d{10}$', message):
-                return jsonify({'response': 'Mobile number must be exactly 10 digits. Please try again:'})
-            candidate_data['mobile_no'] = message.strip()
-            session['state'] = 'asking_alternate_mobile'
+        next_state, response = handle_message(state, message, candidate_data)
+        if next_state is None:
+            return jsonify({'response': response})
+        if next_state != SUBMIT:
+            session['state'] = next_state
             session['candidate_data'] = candidate_data
-            return jsonify({'response': 'Would you like to provide an alternate contact number? (Enter the number or type "skip"):'})
+            return jsonify({'response': response})
 
-        elif state == 'asking_alternate_mobile':
-            if message.lower() != 'skip':
-                if not re.match(r'^\d{10}$', message):
-                    return jsonify({'response': 'Alternate number must be exactly 10 digits. Please try again or type "skip":'})
-                candidate_data['alternate_contact_no'] = message.strip()
-            session['state'] = 'asking_education'
-            session['candidate_data'] = candidate_data
-            return jsonify({'response': 'What is your highest educational qualification?'})
-
-        elif state == 'asking_education':
-            candidate_data['highest_educational_qualifications'] = message.strip()
-            session['state'] = 'asking_academic'
-            session['candidate_data'] = candidate_data
-            return jsonify({'response': 'Please enter your academic performance (e.g., "8.5 CGPA" or "75%"):'})
-
-        elif state == 'asking_academic':
-            candidate_data['academic_performance'] = message.strip()
-            session['state'] = 'asking_company'
-            session['candidate_data'] = candidate_data
-            return jsonify({'response': 'Are you currently employed? If yes, please enter your company name (or type "no"):'})
-
-        elif state == 'asking_company':
-            if message.lower() != 'no':
-                candidate_data['current_company'] = message.strip()
-                session['state'] = 'asking_designation'
-                session['candidate_data'] = candidate_data
-                return jsonify({'response': 'What is your current designation?'})
-            else:
-                candidate_data['total_experience'] = 0
-                candidate_data['relevant_experience'] = 0
-                session['state'] = 'asking_skills'
-                session['candidate_data'] = candidate_data
-                return jsonify({'response': 'Please enter your primary skills (comma-separated):'})
-
-        elif state == 'asking_designation':
-            candidate_data['current_designation'] = message.strip()
-            session['state'] = 'asking_total_experience'
-            session['candidate_data'] = candidate_data
-            return jsonify({'response': 'Please enter your total work experience in years (e.g., 2.5):'})
-
-        elif state == 'asking_total_experience':
-            try:
-                exp = float(message)
-                if exp < 0:
-                    return jsonify({'response': 'Experience cannot be negative. Please try again:'})
-                candidate_data['total_experience'] = exp
-                session['state'] = 'asking_relevant_experience'
-                session['candidate_data'] = candidate_data
-                return jsonify({'response': 'Please enter your relevant experience in years:'})
-            except ValueError:
-                return jsonify({'response': 'Please enter a valid number for experience (e.g., 2.5):'})
-
-        elif state == 'asking_relevant_experience':
-            try:
-                exp = float(message)
-                if exp < 0:
-                    return jsonify({'response': 'Experience cannot be negative. Please try again:'})
-                candidate_data['relevant_experience'] = exp
-                session['state'] = 'asking_skills'
-                session['candidate_data'] = candidate_data
-                return jsonify({'response': 'Please enter your primary skills (comma-separated):'})
-            except ValueError:
-                return jsonify({'response': 'Please enter a valid number for experience (e.g., 2.5):'})
-
-        elif state == 'asking_skills':
-            candidate_data['primary_skills'] = message.strip()
-            session['state'] = 'asking_resume'
-            session['candidate_data'] = candidate_data
-            return jsonify({'response': 'Please upload your resume (PDF/DOC format):'})
+        candidate, errors = build_candidate(job.id, candidate_data)
+        if errors:
+            logger.warning(f"Chat application for job {job.id} failed validation: {errors}")
+            error = next(iter(errors.values()))
+            return jsonify({
+                'response': f'Error saving your application: {error}. Please try again.',
+                'stopRecording': True
+            })
+        try:
+            candidate_id = save_candidate(candidate)
+        except Exception as e:
+            logger.error(f"Error saving candidate for job {job.id}: {str(e)}")
+            return jsonify({
+                'response': f'Error saving your application: {str(e)}. Please try again.',
+                'stopRecording': True
+            })
 
-        elif state == 'asking_resume':
-            if message.lower() == 'resume uploaded':
-                session['state'] = 'asking_video'
-                session['candidate_data'] = candidate_data
-                return jsonify({'response': 'Great! Now, please record a short self-introduction video (maximum 2 minutes):'})
-            return jsonify({'response': 'Please use the upload button to submit your resume.'})
+        logger.info(f"Saved candidate {candidate_id} for job {job.id}",
+                    extra={'candidate_id': candidate_id, 'job_id': job.id})
+        # Clear session after successful save
+        session.clear()
+        return jsonify({
+            'response': 'Thank you for completing your application! We will review your information and get back to you soon.',
+            'completed': True,
+            'stopRecording': True
+        })
 
-        elif state == 'asking_video':
-            if message.lower() == 'video uploaded':
-                session['state'] = 'asking_referral'
-                session['candidate_data'] = candidate_data
-                return jsonify({'response': 'Were you referred by someone? If yes, please enter their name (or type "no"):'})
-            return jsonify({'response': 'Please use the record button to submit your video.'})
+    except Exception as e:
+        logger.error(f"Error in chat route: {str(e)}")
+        return jsonify({'response': f'An error occurred: {str(e)}. Please try again.'})
 
-        elif state == 'asking_referral':
-            if message.lower() != 'no':
-                candidate_data['referred_by'] = message.strip()
-            session['state'] = 'asking_declaration'
-            session['candidate_data'] = candidate_data
-            return jsonify({'response': 'Please confirm that all information provided is true and accurate (type "yes" to confirm):'})
+@main.route('/api/apply/<link_hash>', methods=['POST'])
+def submit_application(link_hash):
+    """Submit a whole application in one request.
 
-        elif state == 'asking_declaration':
-            if message.lower() != 'yes':
-                return jsonify({'response': 'You must confirm the declaration to proceed. Type "yes" to confirm:'})
-            
-            try:
-                # Create candidate object with the correct job_id
-                candidate = Candidate(
-                    job_id=job_id,  # Use the job_id from session
-                    first_name=candidate_data['first_name'],
-                    last_name=candidate_data['last_name'],
-                    personal_email=candidate_data['personal_email'],
-                    mobile_no=candidate_data['mobile_no'],
-                    alternate_contact_no=candidate_data.get('alternate_contact_no'),
-                    highest_educational_qualifications=candidate_data['highest_educational_qualifications'],
-                    academic_performance=candidate_data['academic_performance'],
-                    current_company=candidate_data.get('current_company'),
-                    current_designation=candidate_data.get('current_designation'),
-                    total_experience=float(candidate_data['total_experience']),
-                    relevant_experience=float(candidate_data['relevant_experience']),
-                    primary_skills=candidate_data['primary_skills'],
-                    resume_attachments=candidate_data.get('resume_attachments'),
-                    self_introduction_video=candidate_data.get('self_introduction_video'),
-                    referred_by=candidate_data.get('referred_by'),
-                    self_declaration=True,
-                    submitted_at=datetime.utcnow()
-                )
-                
-                print(f"About to save candidate for job: {job.id} - {job.title}")  # Debug log
-                
-                db.session.add(candidate)
-                db.session.commit()
-                
-                print(f"Successfully saved candidate with ID: {candidate.id} for job: {job.id} - {job.title}")  # Debug log
-                
-                # Clear session after successful save
-                session.clear()
-                
-                return jsonify({
-                    'response': 'Thank you for completing your application! We will review your information and get back to you soon.',
-                    'completed': True,
-                    'stopRecording': True
-                })
-            except Exception as e:
-                db.session.rollback()
-                print(f"Error saving candidate: {str(e)}")
-                print(f"Current session data: {session.get('candidate_data')}")
-                return jsonify({
-                    'response': f'Error saving your application: {str(e)}. Please try again.',
-                    'stopRecording': True
-                })
+    Accepts JSON or multipart form fields named after the Candidate columns,
+    plus `self_declaration`. Multipart requests may attach `resume` and
+    `video` files; otherwise files uploaded earlier in this session (for
+    example through /api/uploads) are used. Every field is validated before
+    anything is stored, and all errors are returned together.
+    """
+    try:
+        if link_expired(link_hash):
+            return jsonify({'error': 'This job posting has expired'}), 410
+        job = get_job_by_link(link_hash)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.is_expired():
+            return jsonify({'error': 'This job posting has expired'}), 410
+        if not job.is_active:
+            return jsonify({'error': 'This job posting is not active'}), 403
 
-        # Rest of the chat logic...
-        session['candidate_data'] = candidate_data
-        return jsonify({'response': 'Invalid state. Please start over.'})
+        if request.is_json:
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
+                return jsonify({'error': 'Request body must be a JSON object'}), 400
+            data = dict(data)
+        else:
+            data = request.form.to_dict()
+        uploaded = session.get('candidate_data', {})
+        # File paths only ever come from this server's uploads, never the client
+        for kind in UPLOAD_KINDS.values():
+            data.pop(kind[2], None)
+            if uploaded.get(kind[2]):
+                data[kind[2]] = uploaded[kind[2]]
+
+        files = {}
+        file_errors = {}
+        for form_name, kind in (('resume', 'resume'), ('video', 'video')):
+            file = request.files.get(form_name)
+            if file and file.filename:
+                subfolder, extensions, field, _ = UPLOAD_KINDS[kind]
+                if allowed_file(file.filename, extensions):
+                    files[field] = (file, subfolder)
+                    # Placeholder with the right extension so validation passes
+                    data[field] = f"{subfolder}/{secure_filename(file.filename)}"
+                else:
+                    file_errors[field] = 'Invalid file type'
+
+        candidate, errors = build_candidate(job.id, data, declared=data.get('self_declaration'))
+        errors.update(file_errors)
+        if errors:
+            return jsonify({'errors': errors}), 422
+
+        for field, (file, subfolder) in files.items():
+            path = save_file(file, subfolder)
+            if not path:
+                return jsonify({'error': 'Error saving file'}), 500
+            setattr(candidate, field, path)
+
+        candidate_id = save_candidate(candidate)
+        logger.info(f"Saved one-shot application {candidate_id} for job {job.id}",
+                    extra={'candidate_id': candidate_id, 'job_id': job.id})
+        session.pop('candidate_data', None)
+        return jsonify({
+            'message': 'Application submitted successfully',
+            'candidate_id': candidate_id
+        }), 201
 
     except Exception as e:
-        print(f"Error in chat route: {str(e)}")  # Debug log
-        return jsonify({'response': f'An error occurred: {str(e)}. Please try again.'})
+        db.session.rollback()
+        logger.error(f"Error in one-shot application: {str(e)}")
+        return jsonify({'error': 'An error occurred. Please try again later.'}), 500
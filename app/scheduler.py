@@ -0,0 +1,141 @@
+"""Periodic jobs run inside the web workers, one worker at a time.
+
+Every worker process starts a runner thread (a greenlet under gevent) on
+its first request. Each tick the runner tries to take or renew a lease
+row in scheduler_lease with a compare-and-set UPDATE; only the holder runs
+the job, so a sweep happens once per interval however many workers there
+are. If the holder dies, its lease lapses after two intervals and another
+worker takes over. Modules add jobs with register_periodic(), each with
+the config setting that holds its interval.
+
+The expiry sweep lives here: a single set-based UPDATE moves every job
+past its end date to status 'expired' and clears is_active, through the
+(status, end_date) index, and bumps the shared 'jobs' version so cached
+job pages and links follow. `flask expire-jobs` runs it from cron or a
+shell.
+"""
+from app.models import db, Job, SchedulerLease
+from app.job_cache import bump_jobs_version
+from app.stats import invalidate_dashboard_stats
+from sqlalchemy import and_, or_, true, update
+from sqlalchemy.exc import IntegrityError
+from collections import namedtuple
+from datetime import datetime, timedelta
+import logging
+import os
+import random
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SWEEP_SECONDS = 60
+EXPIRE_JOBS = 'expire-jobs'
+
+# job() runs with an app context every `setting` seconds (from the app
+# config, else `default`); 0 turns it off
+PeriodicJob = namedtuple('PeriodicJob', ('setting', 'default', 'job'))
+PERIODIC_JOBS = {}
+
+
+def register_periodic(name, setting, default, job):
+    """Register a job for the workers' periodic runners"""
+    PERIODIC_JOBS[name] = PeriodicJob(setting, default, job)
+
+
+def expire_jobs(now=None):
+    """Mark every job past its end date expired and inactive; returns how many changed"""
+    now = now or datetime.utcnow()
+    table = Job.__table__
+    with db.engine.begin() as conn:
+        result = conn.execute(
+            update(table)
+            .where(or_(and_(table.c.status.in_(('active', 'inactive')),
+                            table.c.end_date.isnot(None), table.c.end_date < now),
+                       # Marked expired elsewhere but still flagged active
+                       and_(table.c.status == 'expired', table.c.is_active == true())))
+            .values(status='expired', is_active=False)
+        )
+        if result.rowcount:
+            bump_jobs_version(conn)
+    if result.rowcount:
+        invalidate_dashboard_stats()
+        logger.info(f"Expired {result.rowcount} jobs")
+    return result.rowcount
+
+
+def acquire_lease(name, holder, seconds):
+    """Take or renew the lease on `name` for `seconds`; True if `holder` now has it"""
+    now = datetime.utcnow()
+    table = SchedulerLease.__table__
+    expires_at = now + timedelta(seconds=seconds)
+    with db.engine.begin() as conn:
+        result = conn.execute(
+            update(table)
+            .where(table.c.name == name, or_(table.c.holder == holder, table.c.expires_at < now))
+            .values(holder=holder, expires_at=expires_at)
+        )
+    if result.rowcount:
+        return True
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(table.insert().values(name=name, holder=holder, expires_at=expires_at))
+    except IntegrityError:
+        # Someone else holds it, or took it first
+        return False
+    return True
+
+
+class PeriodicRunner:
+    """Runs `job` every `interval` seconds in whichever process holds its lease"""
+
+    def __init__(self, app, name, interval, job):
+        self.app = app
+        self.name = name
+        self.interval = interval
+        self.job = job
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+        self._thread = threading.Thread(target=self._run, name=f"scheduler-{name}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        # Spread the first tick so freshly forked workers don't all race for the lease
+        time.sleep(random.uniform(0, min(self.interval, 5)))
+        while True:
+            with self.app.app_context():
+                try:
+                    if acquire_lease(self.name, self.holder, self.interval * 2):
+                        self.job()
+                except Exception as e:
+                    logger.error(f"Periodic job {self.name} failed: {str(e)}")
+            time.sleep(self.interval)
+
+
+_runners = {}
+_runners_pid = None
+_runners_lock = threading.Lock()
+
+
+def _start_runners(app):
+    global _runners, _runners_pid
+    # Started per worker process, never in a preloading master or a CLI command
+    if _runners_pid == os.getpid():
+        return
+    with _runners_lock:
+        if _runners_pid == os.getpid():
+            return
+        _runners = {}
+        for name, periodic in PERIODIC_JOBS.items():
+            interval = app.config.get(periodic.setting, periodic.default)
+            if interval > 0:
+                _runners[name] = PeriodicRunner(app, name, interval, periodic.job)
+        _runners_pid = os.getpid()
+
+
+def init_scheduler(app):
+    """Start this worker's periodic runners with its first request"""
+    app.before_request(lambda: _start_runners(app))
+
+
+register_periodic(EXPIRE_JOBS, 'JOB_SWEEP_INTERVAL', DEFAULT_SWEEP_SECONDS, expire_jobs)
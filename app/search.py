@@ -0,0 +1,282 @@
+"""Full-text candidate search.
+
+Skills, name, company and designation are normalized and kept in an
+inverted index next to the candidate table: an FTS5 virtual table on SQLite
+and a tsvector table with GIN (plus trigram on names) on PostgreSQL. The
+index follows candidate inserts, updates and deletes through mapper events;
+Core writes (bulk import, job deletion) call index_candidates/remove_job.
+Other databases fall back to ILIKE matching.
+"""
+from app.models import db, Candidate
+from app.queries import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, LIST_COLUMNS
+from sqlalchemy import and_, bindparam, column, event, func, literal_column, or_, select, table, text
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.attributes import get_history
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Candidate columns that feed the index
+INDEXED_COLUMNS = ('job_id', 'first_name', 'last_name', 'primary_skills', 'current_company', 'current_designation')
+# Rows per statement when rebuilding the index
+REINDEX_BATCH_SIZE = 2000
+# Relevance is computed over at most this many of the newest matches, which
+# bounds the cost of very common terms ("python") on large tables
+RANK_WINDOW = 5000
+
+# Spellings of the same skill mapped to one token, so "React.js" finds "reactjs"
+SKILL_ALIASES = {
+    'c++': 'cpp', 'c#': 'csharp', 'f#': 'fsharp', '.net': 'dotnet', 'asp.net': 'aspnet',
+    'js': 'javascript', 'ts': 'typescript', 'node': 'nodejs', 'node.js': 'nodejs',
+    'react.js': 'react', 'reactjs': 'react', 'vue.js': 'vue', 'vuejs': 'vue',
+    'angularjs': 'angular', 'golang': 'go', 'postgres': 'postgresql', 'psql': 'postgresql',
+    'k8s': 'kubernetes', 'ml': 'machine learning', 'ai': 'artificial intelligence',
+    'py': 'python', 'sklearn': 'scikit learn', 'scikit-learn': 'scikit learn',
+}
+_NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS candidate_fts USING fts5("
+    "skills, name, company, designation, job, tokenize='unicode61', prefix='2 3')",
+)
+POSTGRES_DDL = (
+    "CREATE TABLE IF NOT EXISTS candidate_search ("
+    "candidate_id INTEGER PRIMARY KEY REFERENCES candidate (id) ON DELETE CASCADE, "
+    "document TSVECTOR NOT NULL, name TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_candidate_search_document ON candidate_search USING gin (document)",
+)
+POSTGRES_TRGM_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_candidate_search_name_trgm ON candidate_search USING gin (name gin_trgm_ops)",
+)
+
+candidate_fts = table('candidate_fts', column('rowid'), column('skills'), column('name'),
+                      column('company'), column('designation'), column('job'))
+candidate_search = table('candidate_search', column('candidate_id'), column('document'), column('name'))
+
+# Dialect whose index is in place ('sqlite' or 'postgresql'); None disables the index
+_index_dialect = None
+
+
+def normalize_text(value):
+    """Lower-case `value` and reduce it to space-separated words"""
+    return _NON_WORD_RE.sub(' ', (value or '').lower()).strip()
+
+def normalize_skill(skill):
+    """Canonical words for one skill, e.g. 'Node.js' -> 'nodejs'"""
+    skill = ' '.join((skill or '').lower().split())
+    return normalize_text(SKILL_ALIASES.get(skill, skill))
+
+def skill_tokens(skills):
+    """Normalized skills from comma-separated text, without duplicates"""
+    tokens = []
+    for skill in (skills or '').split(','):
+        token = normalize_skill(skill)
+        if token and token not in tokens:
+            tokens.append(token)
+    return tokens
+
+def query_terms(query):
+    """Search words for a free-text query, normalized like the indexed documents"""
+    terms = []
+    for part in (query or '').split(','):
+        for word in part.split():
+            for term in normalize_skill(word).split():
+                if term not in terms:
+                    terms.append(term)
+    return terms
+
+
+def _document(values):
+    """Indexed fields for a candidate given as a mapping of column values"""
+    return {
+        'skills': ' '.join(skill_tokens(values.get('primary_skills'))),
+        'name': normalize_text(f"{values.get('first_name') or ''} {values.get('last_name') or ''}"),
+        'company': normalize_text(values.get('current_company')),
+        'designation': normalize_text(values.get('current_designation')),
+        # Job id as a token, so FTS5 can intersect a job's postings with the terms
+        'job': f"j{values.get('job_id')}",
+    }
+
+
+def init_search(app, db, create=True):
+    """Create the search index for this database if it does not exist yet.
+
+    With create=False the schema is known to be migrated, so the index
+    already exists and no DDL is run.
+    """
+    global _index_dialect
+    dialect = db.engine.dialect.name
+    if dialect not in ('sqlite', 'postgresql'):
+        _index_dialect = None
+        return
+    if not create:
+        _index_dialect = dialect
+        return
+    try:
+        with db.engine.begin() as conn:
+            for statement in (SQLITE_DDL if dialect == 'sqlite' else POSTGRES_DDL):
+                conn.exec_driver_sql(statement)
+            if dialect == 'postgresql':
+                try:
+                    with conn.begin_nested():
+                        for statement in POSTGRES_TRGM_DDL:
+                            conn.exec_driver_sql(statement)
+                except Exception as e:
+                    logger.warning(f"pg_trgm unavailable, name search uses the tsvector only: {str(e)}")
+        _index_dialect = dialect
+    except Exception as e:
+        _index_dialect = None
+        app.logger.error(f"Error creating search index, falling back to ILIKE search: {str(e)}")
+
+def search_enabled():
+    return _index_dialect is not None
+
+
+def index_candidates(connection, rows):
+    """Add index entries for candidates given as mappings that include 'id'"""
+    if _index_dialect is None or not rows:
+        return
+    params = [dict(_document(row), candidate_id=row['id']) for row in rows]
+    if _index_dialect == 'sqlite':
+        connection.execute(
+            text("INSERT INTO candidate_fts (rowid, skills, name, company, designation, job) "
+                 "VALUES (:candidate_id, :skills, :name, :company, :designation, :job)"),
+            params)
+    else:
+        connection.execute(
+            text("INSERT INTO candidate_search (candidate_id, document, name) VALUES (:candidate_id, "
+                 "setweight(to_tsvector('simple', :skills), 'A') || "
+                 "setweight(to_tsvector('simple', :name), 'B') || "
+                 "setweight(to_tsvector('simple', :company || ' ' || :designation), 'C'), :name) "
+                 "ON CONFLICT (candidate_id) DO UPDATE SET document = EXCLUDED.document, name = EXCLUDED.name"),
+            params)
+
+def remove_candidates(connection, ids):
+    """Drop the index entries of the given candidate ids"""
+    if _index_dialect is None or not ids:
+        return
+    if _index_dialect == 'sqlite':
+        statement = text("DELETE FROM candidate_fts WHERE rowid = :candidate_id")
+    else:
+        statement = text("DELETE FROM candidate_search WHERE candidate_id = :candidate_id")
+    connection.execute(statement, [{'candidate_id': candidate_id} for candidate_id in ids])
+
+def remove_job(connection, job_id):
+    """Drop the index entries of a job's candidates.
+
+    Call before bulk-deleting them with Query.delete(), which skips the
+    per-row events below.
+    """
+    if _index_dialect is None:
+        return
+    ids = select(Candidate.id).where(Candidate.job_id == bindparam('job_id')).scalar_subquery()
+    if _index_dialect == 'sqlite':
+        statement = candidate_fts.delete().where(candidate_fts.c.rowid.in_(ids))
+    else:
+        statement = candidate_search.delete().where(candidate_search.c.candidate_id.in_(ids))
+    connection.execute(statement, {'job_id': job_id})
+
+def _row(candidate):
+    return {name: getattr(candidate, name) for name in ('id',) + INDEXED_COLUMNS}
+
+@event.listens_for(Candidate, 'after_insert')
+def _candidate_inserted(mapper, connection, candidate):
+    index_candidates(connection, [_row(candidate)])
+
+@event.listens_for(Candidate, 'after_delete')
+def _candidate_deleted(mapper, connection, candidate):
+    remove_candidates(connection, [candidate.id])
+
+@event.listens_for(Candidate, 'after_update')
+def _candidate_updated(mapper, connection, candidate):
+    if any(get_history(candidate, name).has_changes() for name in INDEXED_COLUMNS):
+        remove_candidates(connection, [candidate.id])
+        index_candidates(connection, [_row(candidate)])
+
+
+def reindex_candidates(batch_size=REINDEX_BATCH_SIZE):
+    """Rebuild the whole index from the candidate table; returns rows indexed"""
+    if _index_dialect is None:
+        return 0
+    columns = [Candidate.id] + [getattr(Candidate, name) for name in INDEXED_COLUMNS]
+    indexed = 0
+    with db.engine.begin() as conn:
+        conn.execute((candidate_fts if _index_dialect == 'sqlite' else candidate_search).delete())
+        result = conn.execution_options(yield_per=batch_size).execute(select(*columns))
+        for partition in result.mappings().partitions():
+            index_candidates(conn, partition)
+            indexed += len(partition)
+    logger.info(f"Reindexed {indexed} candidates")
+    return indexed
+
+
+def _match_query(terms, job_id=None):
+    """(joined index, its candidate id column, WHERE clause, score where higher ranks first)"""
+    if _index_dialect == 'sqlite':
+        # Quoted prefix terms, implicitly AND-ed; weights follow the column order
+        expression = ' '.join(f'"{term}"*' for term in terms)
+        if job_id is not None:
+            expression += f' job:"j{int(job_id)}"'
+        score = -func.bm25(literal_column('candidate_fts'), 10.0, 5.0, 2.0, 2.0, 0.0)
+        return (candidate_fts, candidate_fts.c.rowid,
+                literal_column('candidate_fts').match(expression), score)
+    if _index_dialect == 'postgresql':
+        tsquery = func.to_tsquery('simple', ' & '.join(f'{term}:*' for term in terms))
+        name_match = candidate_search.c.name.ilike(f"%{' '.join(terms)}%")
+        return (candidate_search, candidate_search.c.candidate_id,
+                or_(candidate_search.c.document.op('@@')(tsquery), name_match),
+                func.ts_rank_cd(candidate_search.c.document, tsquery))
+    return None
+
+def _fallback_clause(terms):
+    fields = [Candidate.first_name, Candidate.last_name, Candidate.primary_skills,
+              Candidate.current_company, Candidate.current_designation]
+    return and_(*(or_(*(field.ilike(f'%{term}%') for field in fields)) for term in terms))
+
+
+def search_candidates(query, filters=None, page=1, limit=DEFAULT_PAGE_SIZE, columns=LIST_COLUMNS):
+    """Rank candidates matching `query`, one page at a time.
+
+    `filters` (a CandidateFilters) narrow the matches; its sort order is
+    ignored in favour of relevance, computed over the RANK_WINDOW newest
+    matches. Returns ([(candidate, score)], next page
+    number or None).
+    """
+    limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    page = max(1, int(page or 1))
+    terms = query_terms(query)
+    if not terms:
+        return [], None
+
+    match = _match_query(terms, filters.job_id if filters is not None else None)
+    if match is not None:
+        index, index_id, where, score = match
+        rows = db.session.query(Candidate, score.label('score')).join(index, index_id == Candidate.id).filter(where)
+        if filters is None or filters.job_id is None:
+            # Id of the RANK_WINDOW-th newest match; older matches are not ranked.
+            # A single job's applicants are few enough to rank them all.
+            matches = db.session.query(index_id).join(Candidate, index_id == Candidate.id).filter(where)
+            if filters is not None:
+                matches = filters.apply(matches)
+            floor = matches.order_by(index_id.desc()).offset(RANK_WINDOW - 1).limit(1).scalar()
+            if floor is not None:
+                rows = rows.filter(index_id >= floor)
+    else:
+        score = literal_column('0.0')
+        rows = db.session.query(Candidate, score.label('score')).filter(_fallback_clause(terms))
+    rows = rows.options(load_only(*(getattr(Candidate, c) for c in columns)))
+    if filters is not None:
+        rows = filters.apply(rows)
+    if match is not None:
+        rows = rows.order_by(score.desc(), Candidate.id.desc())
+    else:
+        rows = rows.order_by(Candidate.submitted_at.desc(), Candidate.id.desc())
+
+    results = rows.offset((page - 1) * limit).limit(limit + 1).all()
+    next_page = None
+    if len(results) > limit:
+        results = results[:limit]
+        next_page = page + 1
+    return [(candidate, float(score or 0)) for candidate, score in results], next_page
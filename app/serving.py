@@ -0,0 +1,100 @@
+"""Serving stored uploads at /uploads/<path>.
+
+Responses carry a strong ETag and Last-Modified and honour conditional and
+Range requests (206), so scrubbing through a video only fetches the bytes
+it needs. Files that never change once written (content-addressed blobs,
+timestamped legacy uploads and derived previews) are cached as immutable.
+
+With UPLOAD_SENDFILE set, Flask only resolves and checks the path and the
+front-end server sends the bytes: 'x-accel-redirect' for nginx (the file
+is served from the internal location UPLOAD_ACCEL_PREFIX) or 'x-sendfile'
+for Apache/lighttpd. With S3 storage the route redirects to a short-lived
+presigned URL instead.
+"""
+from flask import current_app, request, abort, redirect
+from werkzeug.security import safe_join
+from werkzeug.utils import send_file
+from app.blobstore import resolve_upload_path, TEMP_FOLDER
+from app.uploads import PARTIAL_FOLDER
+from app.storage import get_storage
+from datetime import datetime, timezone
+from urllib.parse import quote
+import mimetypes
+import os
+import re
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Blob store names are SHA-256 digests; legacy uploads are prefixed with
+# their upload time. Either way the name changes whenever the content does.
+_DIGEST_NAME_RE = re.compile(r'^[0-9a-f]{64}(\.[A-Za-z0-9]+)?$')
+_TIMESTAMPED_NAME_RE = re.compile(r'^\d{8}_\d{6}_')
+_IMMUTABLE_FOLDERS = ('previews',)
+# Never served: in-progress uploads and other dot-folders
+_HIDDEN_FOLDERS = {TEMP_FOLDER, PARTIAL_FOLDER}
+
+
+def _is_immutable(relpath):
+    name = os.path.basename(relpath)
+    return (relpath.split('/', 1)[0] in _IMMUTABLE_FOLDERS
+            or bool(_DIGEST_NAME_RE.match(name)) or bool(_TIMESTAMPED_NAME_RE.match(name)))
+
+def _etag(relpath, stat):
+    name = os.path.splitext(os.path.basename(relpath))[0]
+    if _DIGEST_NAME_RE.match(name):
+        return name
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def serve_upload(filename):
+    """View for /uploads/<path:filename>"""
+    relpath = resolve_upload_path(filename).replace('\\', '/')
+    if any(part in _HIDDEN_FOLDERS or part.startswith('.') for part in relpath.split('/')):
+        abort(404)
+    storage = get_storage()
+    url = storage.url(relpath)
+    if url is not None:
+        # Object storage serves the bytes; the link expires, so don't let it be cached long
+        response = redirect(url, 302)
+        response.cache_control.private = True
+        response.cache_control.max_age = min(60, storage.presign_seconds)
+        return response
+
+    path = safe_join(storage.root, relpath)
+    if path is None:
+        abort(404)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        abort(404)
+    if not os.path.isfile(path):
+        abort(404)
+
+    immutable = _is_immutable(relpath)
+    etag = _etag(relpath, stat)
+    mode = (current_app.config.get('UPLOAD_SENDFILE') or '').lower()
+    if mode == 'x-accel-redirect':
+        # nginx answers Range requests itself from the internal location
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(relpath)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = current_app.config['UPLOAD_ACCEL_PREFIX'].rstrip('/') + '/' + quote(relpath)
+        response.set_etag(etag)
+        response.last_modified = datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+        response.make_conditional(request)
+    else:
+        response = send_file(path, request.environ, conditional=True, etag=etag,
+                             last_modified=stat.st_mtime, use_x_sendfile=(mode == 'x-sendfile'),
+                             response_class=current_app.response_class)
+
+    if immutable:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def init_upload_serving(app):
+    app.add_url_rule('/uploads/<path:filename>', 'uploaded_file', serve_upload)
@@ -0,0 +1,244 @@
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import Signer, BadSignature
+from werkzeug.datastructures import CallbackDict
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime
+import logging
+import secrets
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# How often each process deletes expired sessions
+PURGE_INTERVAL_SECONDS = 5 * 60
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session dict stored on the server and identified by `sid`"""
+
+    def __init__(self, initial=None, sid=None, new=False, expires_at=None):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires_at = expires_at
+        self.modified = False
+
+
+class MemorySessionBackend:
+    """In-process session store; each worker process has its own copy.
+
+    Only suitable for development or single-process deployments.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+
+    def load(self, sid):
+        with self._lock:
+            entry = self._data.get(sid)
+            if entry is None:
+                return None
+            payload, expires_at = entry
+            if expires_at <= datetime.utcnow():
+                del self._data[sid]
+                return None
+            return payload, expires_at
+
+    def save(self, sid, payload, expires_at):
+        with self._lock:
+            self._data[sid] = (payload, expires_at)
+            if len(self._data) > self.max_entries:
+                self._purge_locked(force=True)
+            if len(self._data) > self.max_entries:
+                # Still full: evict the sessions closest to expiring
+                for old_sid, _ in sorted(self._data.items(), key=lambda item: item[1][1])[:len(self._data) - self.max_entries]:
+                    del self._data[old_sid]
+
+    def touch(self, sid, expires_at):
+        with self._lock:
+            entry = self._data.get(sid)
+            if entry is not None:
+                self._data[sid] = (entry[0], expires_at)
+
+    def delete(self, sid):
+        with self._lock:
+            self._data.pop(sid, None)
+
+    def purge_expired(self):
+        with self._lock:
+            return self._purge_locked(force=True)
+
+    def _purge_locked(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_purge < PURGE_INTERVAL_SECONDS:
+            return 0
+        self._last_purge = now
+        cutoff = datetime.utcnow()
+        expired = [sid for sid, (_, expires_at) in self._data.items() if expires_at <= cutoff]
+        for sid in expired:
+            del self._data[sid]
+        return len(expired)
+
+
+class SQLSessionBackend:
+    """Session store in the server_session table of the application database.
+
+    Uses its own short connections so session reads and writes never share a
+    transaction with the request's db.session.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._last_purge = 0.0
+
+    @property
+    def table(self):
+        from app.models import ServerSession
+        return ServerSession.__table__
+
+    def load(self, sid):
+        with self.db.engine.connect() as conn:
+            row = conn.execute(
+                select(self.table.c.data, self.table.c.expires_at)
+                .where(self.table.c.id == sid, self.table.c.expires_at > datetime.utcnow())
+            ).first()
+        return (row.data, row.expires_at) if row else None
+
+    def save(self, sid, payload, expires_at):
+        table = self.table
+        with self.db.engine.begin() as conn:
+            dialect = conn.dialect.name
+            if dialect in ('sqlite', 'postgresql'):
+                insert = (sqlite.insert if dialect == 'sqlite' else postgresql.insert)(table)
+                conn.execute(insert.values(id=sid, data=payload, expires_at=expires_at)
+                             .on_conflict_do_update(index_elements=[table.c.id],
+                                                    set_={'data': payload, 'expires_at': expires_at}))
+            else:
+                result = conn.execute(update(table).where(table.c.id == sid)
+                                      .values(data=payload, expires_at=expires_at))
+                if result.rowcount == 0:
+                    conn.execute(table.insert().values(id=sid, data=payload, expires_at=expires_at))
+        self._maybe_purge()
+
+    def touch(self, sid, expires_at):
+        with self.db.engine.begin() as conn:
+            conn.execute(update(self.table).where(self.table.c.id == sid).values(expires_at=expires_at))
+
+    def delete(self, sid):
+        with self.db.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.id == sid))
+
+    def purge_expired(self):
+        with self.db.engine.begin() as conn:
+            result = conn.execute(delete(self.table).where(self.table.c.expires_at <= datetime.utcnow()))
+        return result.rowcount
+
+    def _maybe_purge(self):
+        now = time.monotonic()
+        if now - self._last_purge < PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = now
+        try:
+            removed = self.purge_expired()
+            if removed:
+                logger.info(f"Purged {removed} expired sessions")
+        except Exception as e:
+            logger.error(f"Error purging expired sessions: {str(e)}")
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keeps session data in a backend and only a signed session id in the cookie"""
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt='server-side-session')
+
+    def _lifetime(self, app):
+        return app.permanent_session_lifetime
+
+    def open_session(self, app, request):
+        if not app.secret_key:
+            return None
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+            if sid:
+                try:
+                    stored = self.backend.load(sid)
+                except Exception as e:
+                    logger.error(f"Error loading session: {str(e)}")
+                    stored = None
+                if stored is not None:
+                    payload, expires_at = stored
+                    try:
+                        return ServerSideSession(self.serializer.loads(payload), sid=sid, expires_at=expires_at)
+                    except ValueError:
+                        logger.warning("Discarding unreadable session data")
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified and not session.new:
+                self.backend.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        lifetime = self._lifetime(app)
+        expires_at = datetime.utcnow() + lifetime
+        if session.modified:
+            self.backend.save(session.sid, self.serializer.dumps(dict(session)), expires_at)
+        elif session.expires_at and session.expires_at - datetime.utcnow() < lifetime / 2:
+            # Slide the expiry without rewriting the payload
+            self.backend.touch(session.sid, expires_at)
+        else:
+            return
+
+        # The id never changes, so the cookie is only re-sent to extend a permanent expiry
+        if session.new or session.permanent:
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid.encode()).decode(),
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+
+
+def init_sessions(app, db):
+    """Install the session backend selected by SESSION_TYPE.
+
+    'sqlalchemy' stores sessions in the application database, 'memory' keeps
+    them in-process, and 'cookie' keeps Flask's default signed-cookie sessions.
+    """
+    session_type = app.config.get('SESSION_TYPE', 'sqlalchemy')
+    if session_type == 'cookie':
+        return
+    if session_type == 'memory':
+        backend = MemorySessionBackend(app.config.get('SESSION_MEMORY_MAX_ENTRIES', 10000))
+    elif session_type == 'sqlalchemy':
+        backend = SQLSessionBackend(db)
+    else:
+        raise ValueError(f"Unsupported SESSION_TYPE: {session_type}")
+    app.session_interface = ServerSideSessionInterface(backend)
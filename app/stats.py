@@ -0,0 +1,107 @@
+from app.models import db, Job, Candidate
+from sqlalchemy import event, case
+from collections import namedtuple
+from datetime import datetime
+import threading
+import time
+
+# Upper bound on staleness: writes made by other worker processes are not
+# seen by this process's event listeners, so entries also expire after this.
+STATS_TTL_SECONDS = 30
+
+JobSummary = namedtuple('JobSummary', [
+    'id', 'title', 'start_date', 'end_date', 'is_active', 'status', 'applicant_count'
+])
+DashboardStats = namedtuple('DashboardStats', [
+    'jobs', 'total_jobs', 'active_jobs', 'expired_jobs', 'inactive_jobs', 'total_candidates'
+])
+
+_cache_lock = threading.Lock()
+_cached = None           # DashboardStats
+_cached_until = 0.0      # time.monotonic() deadline for _cached
+_generation = 0          # bumped on every invalidation
+
+
+def compute_dashboard_stats(now=None):
+    """Per-job status and applicant counts, computed in a single SQL statement"""
+    now = now or datetime.utcnow()
+    applicants = (db.session.query(Candidate.job_id.label('job_id'),
+                                   db.func.count(Candidate.id).label('applicant_count'))
+                  .group_by(Candidate.job_id)
+                  .subquery())
+    status = case(
+        (db.and_(Job.end_date.isnot(None), Job.end_date < now), 'expired'),
+        (Job.is_active == db.true(), 'active'),
+        else_='inactive'
+    )
+    rows = (db.session.query(Job.id, Job.title, Job.start_date, Job.end_date, Job.is_active,
+                             status.label('status'),
+                             db.func.coalesce(applicants.c.applicant_count, 0))
+            .outerjoin(applicants, applicants.c.job_id == Job.id)
+            .order_by(Job.id)
+            .all())
+
+    jobs = [JobSummary(*row) for row in rows]
+    counts = {'active': 0, 'expired': 0, 'inactive': 0}
+    for job in jobs:
+        counts[job.status] += 1
+    return DashboardStats(
+        jobs=jobs,
+        total_jobs=len(jobs),
+        active_jobs=counts['active'],
+        expired_jobs=counts['expired'],
+        inactive_jobs=counts['inactive'],
+        total_candidates=sum(job.applicant_count for job in jobs),
+    )
+
+
+def _next_expiry_in(stats, now):
+    """Seconds until the next active job expires, or None if none will"""
+    upcoming = [job.end_date for job in stats.jobs
+                if job.status == 'active' and job.end_date is not None]
+    if not upcoming:
+        return None
+    return max((min(upcoming) - now).total_seconds(), 0)
+
+
+def get_dashboard_stats():
+    """Cached dashboard statistics.
+
+    Entries are dropped when a Candidate is inserted or a Job changes, after
+    STATS_TTL_SECONDS, or when the next active job reaches its end date.
+    """
+    global _cached, _cached_until
+    with _cache_lock:
+        if _cached is not None and time.monotonic() < _cached_until:
+            return _cached
+        generation = _generation
+
+    now = datetime.utcnow()
+    stats = compute_dashboard_stats(now)
+    ttl = STATS_TTL_SECONDS
+    expiry_in = _next_expiry_in(stats, now)
+    if expiry_in is not None:
+        ttl = min(ttl, expiry_in)
+
+    with _cache_lock:
+        # Don't store a result that an invalidation raced past
+        if generation == _generation:
+            _cached = stats
+            _cached_until = time.monotonic() + ttl
+    return stats
+
+
+def invalidate_dashboard_stats(*args, **kwargs):
+    """Drop the cached dashboard statistics (usable as an event listener)"""
+    global _cached, _cached_until, _generation
+    with _cache_lock:
+        _cached = None
+        _cached_until = 0.0
+        _generation += 1
+
+
+event.listen(Candidate, 'after_insert', invalidate_dashboard_stats)
+event.listen(Candidate, 'after_delete', invalidate_dashboard_stats)
+event.listen(Job, 'after_insert', invalidate_dashboard_stats)
+event.listen(Job, 'after_update', invalidate_dashboard_stats)
+event.listen(Job, 'after_delete', invalidate_dashboard_stats)
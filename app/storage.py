@@ -0,0 +1,227 @@
+"""Where stored uploads live.
+
+Paths handed around the app ('resumes/ab/ab12....pdf') are keys relative
+to the storage root. LocalStorage keeps them under STORAGE_ROOT (by
+default UPLOAD_FOLDER; point it at a persistent volume in production);
+the blob store shards them by digest, so no directory grows unbounded.
+S3Storage keeps them in an S3-compatible bucket (AWS, MinIO, ...), uploads
+with multipart transfers streamed from disk, and serves downloads through
+short-lived presigned URLs. UPLOAD_FOLDER remains local scratch space for
+partial uploads and task work files either way.
+
+Select the backend with STORAGE_BACKEND ('local' or 's3').
+"""
+from contextlib import contextmanager
+import logging
+import os
+import shutil
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+# Settings copied from the app config into worker pool processes
+STORAGE_SETTINGS = ('STORAGE_BACKEND', 'STORAGE_ROOT', 'UPLOAD_FOLDER', 'S3_BUCKET', 'S3_PREFIX',
+                    'S3_ENDPOINT_URL', 'S3_REGION', 'S3_PRESIGN_SECONDS')
+
+
+class LocalStorage:
+    """Files under a local directory"""
+
+    name = 'local'
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        """Absolute path of a key on local disk; keys may not leave the root"""
+        root = os.path.abspath(self.root)
+        path = os.path.abspath(os.path.join(root, key))
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError(f"Storage key is outside the storage root: {key!r}")
+        return path
+
+    def exists(self, key):
+        return os.path.isfile(self.path(key))
+
+    def save(self, source_path, key, move=True):
+        """Store a local file under `key`; `move` consumes the source file"""
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if move:
+            try:
+                os.replace(source_path, target)
+                return
+            except OSError:
+                # STORAGE_ROOT may be on another filesystem than the scratch space
+                pass
+        temp_path = f"{target}.{os.getpid()}.tmp"
+        shutil.copyfile(source_path, temp_path)
+        os.replace(temp_path, target)
+        if move:
+            os.remove(source_path)
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def modified(self, key):
+        """Modification time (epoch seconds), or None if there is no such file"""
+        try:
+            return os.stat(self.path(key)).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def iter_files(self, prefix):
+        """Yield (key, size, modified time) for every file under `prefix`.
+
+        Reads one directory at a time with os.scandir, so memory does not grow
+        with the tree. Hidden entries (scratch folders, temp files) are skipped.
+        """
+        pending = [prefix.rstrip('/')]
+        while pending:
+            folder = pending.pop()
+            try:
+                with os.scandir(self.path(folder)) as entries:
+                    for entry in entries:
+                        if entry.name.startswith('.'):
+                            continue
+                        key = f"{folder}/{entry.name}"
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(key)
+                        elif entry.is_file(follow_symlinks=False):
+                            stat = entry.stat()
+                            yield key, stat.st_size, stat.st_mtime
+            except FileNotFoundError:
+                continue
+
+    @contextmanager
+    def local_copy(self, key):
+        """Yield a local path holding the file's content"""
+        if not self.exists(key):
+            raise FileNotFoundError(f"Stored file not found: {key}")
+        yield self.path(key)
+
+    def url(self, key):
+        """Direct download URL, or None when the app serves the file itself"""
+        return None
+
+
+class S3Storage:
+    """Objects in an S3-compatible bucket"""
+
+    name = 's3'
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None, presign_seconds=300, scratch=None):
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix and prefix.strip('/') else ''
+        self.presign_seconds = presign_seconds
+        self.scratch = scratch
+        self.client = boto3.client('s3', endpoint_url=endpoint_url or None, region_name=region or None)
+        self.transfer_config = TransferConfig(multipart_threshold=MULTIPART_CHUNK_SIZE,
+                                              multipart_chunksize=MULTIPART_CHUNK_SIZE)
+
+    def _object_key(self, key):
+        return self.prefix + key.replace('\\', '/')
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def save(self, source_path, key, move=True):
+        """Upload a local file, in parts for large files; `move` removes the source"""
+        self.client.upload_file(source_path, self.bucket, self._object_key(key), Config=self.transfer_config)
+        if move:
+            os.remove(source_path)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def modified(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return head['LastModified'].timestamp()
+
+    def iter_files(self, prefix):
+        """Yield (key, size, modified time) for every object under `prefix`, a page at a time"""
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._object_key(prefix.rstrip('/') + '/')):
+            for item in page.get('Contents', ()):
+                yield item['Key'][len(self.prefix):], item['Size'], item['LastModified'].timestamp()
+
+    @contextmanager
+    def local_copy(self, key):
+        """Download the object to a temp file for the duration of the block"""
+        from botocore.exceptions import ClientError
+        if self.scratch:
+            os.makedirs(self.scratch, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.scratch, suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        try:
+            try:
+                self.client.download_file(self.bucket, self._object_key(key), temp_path,
+                                          Config=self.transfer_config)
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                    raise FileNotFoundError(f"Stored file not found: {key}")
+                raise
+            yield temp_path
+        finally:
+            os.remove(temp_path)
+
+    def url(self, key):
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': self._object_key(key)},
+            ExpiresIn=self.presign_seconds,
+        )
+
+
+_storage = None
+
+
+def storage_from_settings(settings):
+    """Build the backend described by a mapping of STORAGE_SETTINGS"""
+    backend = (settings.get('STORAGE_BACKEND') or 'local').lower()
+    if backend == 'local':
+        return LocalStorage(settings.get('STORAGE_ROOT') or settings['UPLOAD_FOLDER'])
+    if backend == 's3':
+        if not settings.get('S3_BUCKET'):
+            raise ValueError("S3_BUCKET is required for the s3 storage backend")
+        return S3Storage(settings['S3_BUCKET'], prefix=settings.get('S3_PREFIX') or '',
+                         endpoint_url=settings.get('S3_ENDPOINT_URL'), region=settings.get('S3_REGION'),
+                         presign_seconds=int(settings.get('S3_PRESIGN_SECONDS') or 300),
+                         scratch=os.path.join(settings['UPLOAD_FOLDER'], '.partial'))
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+def configure_storage(settings):
+    """Set this process's backend; also used as the worker pool initializer"""
+    global _storage
+    _storage = storage_from_settings(settings)
+    return _storage
+
+def storage_settings(config):
+    return {name: config.get(name) for name in STORAGE_SETTINGS}
+
+def get_storage():
+    if _storage is None:
+        raise RuntimeError("Storage is not configured")
+    return _storage
+
+def init_storage(app):
+    configure_storage(storage_settings(app.config))
+    logger.info(f"Upload storage backend: {_storage.name}")
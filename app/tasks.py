@@ -0,0 +1,222 @@
+"""Durable background tasks stored in the background_task table.
+
+Producers call enqueue() on the connection of their transaction, so a task
+exists exactly when the change that needs it commits; enqueue_many() skips
+work whose dedupe key (usually a file path) already has a pending task.
+`flask run-worker` claims due tasks with a compare-and-set UPDATE (safe
+with any number of worker processes on any backend), runs them in a
+process pool and records the outcome. A claimed task holds a lease; if its worker dies, another
+worker picks it up once the lease expires.
+"""
+from app.models import db, BackgroundTask
+from app.storage import configure_storage, storage_settings
+from sqlalchemy import and_, or_, select, update
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from collections import namedtuple
+from datetime import datetime, timedelta
+import json
+import logging
+import os
+import signal
+import socket
+import time
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+# Retry delay is RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+RETRY_BASE_SECONDS = 30
+LEASE_SECONDS = 15 * 60
+POLL_SECONDS = 5
+# Dedupe keys per IN (...) lookup, well under every backend's bind limit
+DEDUPE_CHUNK_SIZE = 500
+
+# run(payload, upload_folder) executes in a pool process without app or
+# database access and returns a JSON-able result; complete(payload, result)
+# then runs in the worker with an app context to store it. A run taking
+# longer than `timeout` seconds is interrupted and counts as a failure.
+TaskKind = namedtuple('TaskKind', ('run', 'complete', 'timeout'))
+TASK_KINDS = {}
+
+
+class TaskTimeout(Exception):
+    """Raised inside a pool process when a task overruns its timeout"""
+
+
+def register_task(kind, run, complete=None, timeout=None):
+    """Register the handler for a task kind; `run` must be a module-level function"""
+    TASK_KINDS[kind] = TaskKind(run, complete, timeout)
+
+def enqueue(connection, kind, payload, delay=None, dedupe_key=None):
+    """Insert a pending task using `connection` (a Connection or Session)"""
+    connection.execute(BackgroundTask.__table__.insert().values(
+        kind=kind,
+        payload=json.dumps(payload),
+        dedupe_key=dedupe_key,
+        status='pending',
+        attempts=0,
+        run_after=datetime.utcnow() + (delay or timedelta()),
+        created_at=datetime.utcnow(),
+    ))
+
+def pending_keys(connection, kind, keys):
+    """The subset of `keys` that already have a pending task of `kind`"""
+    table = BackgroundTask.__table__
+    keys = list(keys)
+    found = set()
+    for start in range(0, len(keys), DEDUPE_CHUNK_SIZE):
+        found.update(connection.execute(
+            select(table.c.dedupe_key).where(table.c.kind == kind, table.c.status == 'pending',
+                                             table.c.dedupe_key.in_(keys[start:start + DEDUPE_CHUNK_SIZE]))
+        ).scalars())
+    return found
+
+def enqueue_many(connection, kind, tasks):
+    """Enqueue one task per {dedupe key: payload} item unless one with that key is pending.
+
+    One indexed lookup per chunk of keys and one executemany INSERT, so bulk
+    writers pay a fixed number of statements per batch. Returns the number
+    of tasks inserted.
+    """
+    if not tasks:
+        return 0
+    queued = pending_keys(connection, kind, tasks)
+    now = datetime.utcnow()
+    rows = [{'kind': kind, 'payload': json.dumps(payload), 'dedupe_key': key, 'status': 'pending',
+             'attempts': 0, 'run_after': now, 'created_at': now}
+            for key, payload in tasks.items() if key not in queued]
+    if rows:
+        connection.execute(BackgroundTask.__table__.insert(), rows)
+    return len(rows)
+
+def enqueue_once(connection, kind, payload, dedupe_key):
+    """Enqueue unless a task of `kind` with the same dedupe key is already pending"""
+    return enqueue_many(connection, kind, {dedupe_key: payload}) == 1
+
+
+def _claimable(now):
+    table = BackgroundTask.__table__
+    return or_(
+        and_(table.c.status == 'pending', table.c.run_after <= now),
+        and_(table.c.status == 'running', table.c.locked_at < now - timedelta(seconds=LEASE_SECONDS)),
+    )
+
+def claim_tasks(worker_id, limit, kinds=None):
+    """Lease up to `limit` due tasks to `worker_id`; returns BackgroundTask rows"""
+    table = BackgroundTask.__table__
+    now = datetime.utcnow()
+    query = select(table.c.id).where(_claimable(now)).order_by(table.c.run_after, table.c.id).limit(limit * 2)
+    if kinds:
+        query = query.where(table.c.kind.in_(kinds))
+    claimed = []
+    for task_id in db.session.execute(query).scalars():
+        # Compare-and-set: only one worker's UPDATE matches a claimable row
+        result = db.session.execute(
+            update(table).where(table.c.id == task_id, _claimable(now))
+            .values(status='running', locked_by=worker_id, locked_at=now, attempts=table.c.attempts + 1)
+        )
+        if result.rowcount == 1:
+            claimed.append(task_id)
+        if len(claimed) >= limit:
+            break
+    db.session.commit()
+    if not claimed:
+        return []
+    return db.session.execute(select(BackgroundTask).where(BackgroundTask.id.in_(claimed))).scalars().all()
+
+def _finish(task_id, worker_id, **values):
+    table = BackgroundTask.__table__
+    db.session.execute(update(table).where(table.c.id == task_id, table.c.locked_by == worker_id).values(**values))
+    db.session.commit()
+
+def mark_done(task, worker_id):
+    _finish(task.id, worker_id, status='done', finished_at=datetime.utcnow(), last_error=None,
+            locked_by=None, locked_at=None)
+
+def mark_failed(task, worker_id, error):
+    """Schedule a retry with exponential backoff, or fail for good after MAX_ATTEMPTS"""
+    if task.attempts >= MAX_ATTEMPTS:
+        logger.error(f"Task {task.id} ({task.kind}) failed permanently: {error}")
+        _finish(task.id, worker_id, status='failed', finished_at=datetime.utcnow(), last_error=error,
+                locked_by=None, locked_at=None)
+        return
+    delay = RETRY_BASE_SECONDS * 2 ** (task.attempts - 1)
+    logger.warning(f"Task {task.id} ({task.kind}) failed, retrying in {delay}s: {error}")
+    _finish(task.id, worker_id, status='pending', last_error=error, locked_by=None, locked_at=None,
+            run_after=datetime.utcnow() + timedelta(seconds=delay))
+
+def release_tasks(worker_id):
+    """Return this worker's unfinished tasks to the queue (on shutdown)"""
+    table = BackgroundTask.__table__
+    db.session.execute(update(table).where(table.c.status == 'running', table.c.locked_by == worker_id)
+                       .values(status='pending', locked_by=None, locked_at=None, attempts=table.c.attempts - 1))
+    db.session.commit()
+
+
+def _run_task(run, timeout, payload, upload_folder):
+    """Pool process entry point: call `run`, raising TaskTimeout after `timeout` seconds"""
+    if not timeout:
+        return run(payload, upload_folder)
+
+    def expire(signum, frame):
+        raise TaskTimeout(f"Task exceeded its {timeout}s timeout")
+
+    # Tasks run on the pool process's main thread, so SIGALRM reaches them
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return run(payload, upload_folder)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def run_worker(app, processes=None, once=False, kinds=None, poll=POLL_SECONDS):
+    """Claim and run tasks until interrupted (or until the queue is empty with `once`).
+
+    Keeps up to two tasks per pool process in flight so processes never
+    wait on the database between tasks. Returns the number of tasks finished.
+    """
+    processes = processes or os.cpu_count() or 1
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    upload_folder = app.config['UPLOAD_FOLDER']
+    in_flight = {}
+    finished = 0
+    logger.info(f"Worker {worker_id} started with {processes} processes")
+    # Pool processes build their own storage client rather than share a forked one
+    with ProcessPoolExecutor(max_workers=processes, initializer=configure_storage,
+                             initargs=(storage_settings(app.config),)) as pool:
+        try:
+            while True:
+                free = processes * 2 - len(in_flight)
+                if free > 0:
+                    for task in claim_tasks(worker_id, free, kinds):
+                        kind = TASK_KINDS.get(task.kind)
+                        if kind is None:
+                            mark_failed(task, worker_id, f"Unknown task kind: {task.kind}")
+                            continue
+                        payload = json.loads(task.payload)
+                        in_flight[pool.submit(_run_task, kind.run, kind.timeout, payload, upload_folder)] = (task, kind, payload)
+                if not in_flight:
+                    if once:
+                        break
+                    time.sleep(poll)
+                    continue
+
+                done, _ = wait(in_flight, timeout=poll, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task, kind, payload = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                        if kind.complete is not None:
+                            kind.complete(payload, result)
+                        mark_done(task, worker_id)
+                    except Exception as e:
+                        db.session.rollback()
+                        mark_failed(task, worker_id, f"{type(e).__name__}: {e}")
+                    finished += 1
+        finally:
+            if in_flight:
+                release_tasks(worker_id)
+    logger.info(f"Worker {worker_id} stopped after {finished} tasks")
+    return finished
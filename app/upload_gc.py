@@ -0,0 +1,252 @@
+"""Garbage collection of stored uploads that nothing refers to.
+
+Uploads are stored as soon as an applicant sends them, but the Candidate
+row that refers to them only exists once the application is submitted, so
+abandoned chats leave files behind. collect_uploads() finds and removes
+them:
+
+1. It builds an index of referenced paths: the candidate upload and
+   preview columns, blobs that still have references or legacy aliases,
+   and uploads held by live sessions. A video's derived files under
+   previews/ count as referenced while the video is.
+2. It walks the upload folders one directory (or S3 page) at a time, so
+   memory holds the index and one batch, not the tree.
+3. Files outside the index and older than the grace period are deleted in
+   batches. Each batch is checked again against rows written since the
+   index was built, and deletes are paced to UPLOAD_GC_RATE per second.
+
+Deleting a job hands its files to the background worker instead:
+schedule_file_cleanup() queues them in chunks, so the request's
+transaction only covers the rows.
+
+A deduplicated upload reuses an existing blob and leaves its file
+untouched, so file age alone says nothing about use: store_blob() records
+last_used_at on the blob, and blobs used within the grace period count as
+referenced. A blob's row is dropped before its file, under the same
+conditions, so an upload racing the collector either marks the blob used
+in time or finds no row and stores a new file, which is newer than the
+cutoff and kept.
+"""
+from flask import current_app
+from app.models import db, Candidate, UploadBlob, UploadAlias, ServerSession
+from app.blobstore import REFERENCE_COLUMNS
+from app.media import PREVIEW_FOLDER, derived_keys
+from app.sessions import SQLSessionBackend
+from app.storage import get_storage
+from app.tasks import enqueue, register_task
+from app.scheduler import register_periodic
+from sqlalchemy import delete, func, not_, or_, select
+from collections import namedtuple
+from datetime import datetime, timedelta
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Folders under the storage root that hold uploads and their derived files
+GC_FOLDERS = ('resumes', 'videos', PREVIEW_FOLDER)
+# Candidate columns that hold stored paths
+PATH_COLUMNS = REFERENCE_COLUMNS + ('video_poster', 'video_sprite', 'video_preview')
+DEFAULT_INTERVAL_SECONDS = 6 * 60 * 60
+DEFAULT_GRACE_HOURS = 48
+DEFAULT_RATE = 50
+DELETE_BATCH_SIZE = 100
+# Rows submitted this long before the index was built may still have been
+# invisible to it (uncommitted, or waiting in a group-commit batch)
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+FILE_CLEANUP_TASK = 'file_cleanup'
+CLEANUP_CHUNK_SIZE = 200
+
+GCReport = namedtuple('GCReport', ('scanned', 'orphaned', 'deleted', 'bytes_freed'))
+
+
+def _session_upload_paths():
+    # Uploads of applications still in progress; only database-backed
+    # sessions are visible, the grace period covers the others
+    interface = current_app.session_interface
+    if not isinstance(getattr(interface, 'backend', None), SQLSessionBackend):
+        return
+    payloads = db.session.execute(
+        select(ServerSession.data).where(ServerSession.expires_at > datetime.utcnow())
+    ).scalars()
+    for payload in payloads:
+        try:
+            uploaded = interface.serializer.loads(payload).get('candidate_data') or {}
+        except (ValueError, AttributeError):
+            continue
+        for column in REFERENCE_COLUMNS:
+            if uploaded.get(column):
+                yield uploaded[column]
+
+
+def _candidate_paths(since=None):
+    for column_name in PATH_COLUMNS:
+        column = getattr(Candidate, column_name)
+        statement = select(column).where(column.isnot(None)).distinct()
+        if since is not None:
+            statement = statement.where(Candidate.submitted_at >= since)
+        yield from db.session.execute(statement).scalars()
+
+
+def _blob_in_use(used_since):
+    """Blobs with references, legacy aliases, or an upload since `used_since`"""
+    blob = UploadBlob.__table__
+    return or_(blob.c.ref_count > 0, blob.c.path.in_(select(UploadAlias.blob_path)),
+               func.coalesce(blob.c.last_used_at, blob.c.created_at) >= used_since)
+
+
+class ReferenceIndex:
+    """Stored paths that are in use, built from the database in a few queries"""
+
+    def __init__(self, used_since):
+        self.paths = set()
+        self._stems = set()
+        self.refreshed_at = datetime.utcnow()
+        self._add(_candidate_paths())
+        self._add(db.session.execute(select(UploadBlob.path).where(_blob_in_use(used_since))).scalars())
+        self._add(_session_upload_paths())
+
+    def _add(self, paths):
+        for path in paths:
+            self.paths.add(path)
+            self._stems.add(os.path.splitext(os.path.basename(path))[0])
+
+    def refresh(self):
+        """Add what candidates and sessions have referenced since the last refresh"""
+        since = self.refreshed_at - REFRESH_OVERLAP
+        self.refreshed_at = datetime.utcnow()
+        self._add(_candidate_paths(since))
+        self._add(_session_upload_paths())
+
+    def __contains__(self, key):
+        if key in self.paths:
+            return True
+        # previews/<2 chars>/<video stem>/<file>
+        parts = key.split('/')
+        return parts[0] == PREVIEW_FOLDER and len(parts) == 4 and parts[2] in self._stems
+
+
+def _blob_paths(connection, keys):
+    blob = UploadBlob.__table__
+    return set(connection.execute(select(blob.c.path).where(blob.c.path.in_(keys))).scalars())
+
+def release_unused_blobs(connection, keys, used_since):
+    """Drop the rows of unused blobs among `keys`.
+
+    Returns (keys whose files may go: dropped or never a blob, keys whose
+    blob rows were dropped).
+    """
+    blob = UploadBlob.__table__
+    existing = _blob_paths(connection, keys)
+    if existing:
+        connection.execute(delete(blob).where(blob.c.path.in_(existing), not_(_blob_in_use(used_since))))
+    kept = _blob_paths(connection, existing) if existing else set()
+    return [key for key in keys if key not in kept], existing - kept
+
+def grace_seconds(grace_hours=None):
+    """UPLOAD_GC_GRACE_HOURS in seconds, never less than the session lifetime"""
+    if grace_hours is None:
+        grace_hours = current_app.config.get('UPLOAD_GC_GRACE_HOURS', DEFAULT_GRACE_HOURS)
+    return max(grace_hours * 3600, current_app.permanent_session_lifetime.total_seconds())
+
+def delete_stored_files(storage, keys, before):
+    """Delete each key not modified after `before` (epoch seconds); returns keys deleted"""
+    deleted = []
+    for key in keys:
+        modified = storage.modified(key)
+        if modified is None or modified > before:
+            continue
+        storage.delete(key)
+        deleted.append(key)
+    return deleted
+
+
+def collect_uploads(grace_hours=None, rate=None, dry_run=False):
+    """Delete stored uploads that nothing refers to and that are older than the grace period.
+
+    The grace period is never shorter than the session lifetime, so an
+    application in progress keeps its uploads. Returns a GCReport.
+    """
+    rate = rate or current_app.config.get('UPLOAD_GC_RATE', DEFAULT_RATE)
+    grace = grace_seconds(grace_hours)
+    storage = get_storage()
+    cutoff = time.time() - grace
+    used_since = datetime.utcnow() - timedelta(seconds=grace)
+    index = ReferenceIndex(used_since)
+    scanned = orphaned = deleted = freed = 0
+    batch = {}
+
+    def flush():
+        nonlocal deleted, freed
+        index.refresh()
+        keys = [key for key in batch if key not in index]
+        if not dry_run and keys:
+            started = time.monotonic()
+            keys, _ = release_unused_blobs(db.session, keys, used_since)
+            db.session.commit()
+            removed = delete_stored_files(storage, keys, cutoff)
+            deleted += len(removed)
+            freed += sum(batch[key] for key in removed)
+            # Pace deletes so a large backlog doesn't swamp the disk or bucket
+            time.sleep(max(0.0, len(removed) / rate - (time.monotonic() - started)))
+        batch.clear()
+
+    for folder in GC_FOLDERS:
+        for key, size, modified in storage.iter_files(folder):
+            scanned += 1
+            if modified > cutoff or key in index:
+                continue
+            orphaned += 1
+            batch[key] = size
+            if len(batch) >= DELETE_BATCH_SIZE:
+                flush()
+    if batch:
+        flush()
+    logger.info(f"Upload GC scanned {scanned} files, found {orphaned} orphans, "
+                f"deleted {deleted} ({freed / (1024 * 1024):.1f}MB)")
+    return GCReport(scanned, orphaned, deleted, freed)
+
+
+def job_upload_paths(job_id):
+    """Distinct upload paths held by a job's candidates; call before deleting them"""
+    paths = set()
+    for column_name in REFERENCE_COLUMNS:
+        column = getattr(Candidate, column_name)
+        paths.update(db.session.execute(
+            select(column).where(Candidate.job_id == job_id, column.isnot(None)).distinct()
+        ).scalars())
+    return paths
+
+def schedule_file_cleanup(connection, paths):
+    """Queue deletion of the blobs among `paths` that are no longer used.
+
+    Call in the transaction that dropped the references. Blobs uploaded
+    again within the grace period (an application in progress may hold
+    them) are left for the collector. The other blobs' rows go now; their
+    files, with any derived previews, are deleted by the background worker,
+    CLEANUP_CHUNK_SIZE per task. Returns the number of files queued.
+    """
+    before = time.time()
+    used_since = datetime.utcnow() - timedelta(seconds=grace_seconds())
+    paths = sorted(paths)
+    keys = []
+    for start in range(0, len(paths), CLEANUP_CHUNK_SIZE):
+        chunk = paths[start:start + CLEANUP_CHUNK_SIZE]
+        _, released = release_unused_blobs(connection, chunk, used_since)
+        for path in sorted(released):
+            keys.append(path)
+            if path.startswith('videos/'):
+                keys.extend(derived_keys(path))
+    for start in range(0, len(keys), CLEANUP_CHUNK_SIZE):
+        enqueue(connection, FILE_CLEANUP_TASK, {'keys': keys[start:start + CLEANUP_CHUNK_SIZE], 'before': before})
+    return len(keys)
+
+def delete_files(payload, upload_folder):
+    """Task body: delete the queued files that were not stored again since"""
+    removed = delete_stored_files(get_storage(), payload['keys'], payload['before'])
+    return {'deleted': len(removed)}
+
+register_task(FILE_CLEANUP_TASK, delete_files)
+register_periodic('collect-uploads', 'UPLOAD_GC_INTERVAL', DEFAULT_INTERVAL_SECONDS, collect_uploads)
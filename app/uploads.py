@@ -0,0 +1,284 @@
+from flask import current_app
+from werkzeug.utils import secure_filename
+from app.blobstore import stream_to_temp, store_blob, file_digest
+from app.metrics import observe_upload
+import hashlib
+import json
+import logging
+import os
+import re
+import secrets
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_RESUME_EXTENSIONS = {'pdf', 'doc', 'docx'}
+ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'webm', 'mov'}
+
+# kind -> (subfolder, allowed extensions, candidate_data key, size limit config key)
+UPLOAD_KINDS = {
+    'resume': ('resumes', ALLOWED_RESUME_EXTENSIONS, 'resume_attachments', 'MAX_RESUME_UPLOAD_SIZE'),
+    'video': ('videos', ALLOWED_VIDEO_EXTENSIONS, 'self_introduction_video', 'MAX_VIDEO_UPLOAD_SIZE'),
+}
+
+# In-progress chunked uploads live here, relative to UPLOAD_FOLDER
+PARTIAL_FOLDER = '.partial'
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+COPY_BUFFER_SIZE = 64 * 1024
+# Partial uploads untouched for this long are discarded
+STALE_UPLOAD_SECONDS = 24 * 60 * 60
+_PURGE_INTERVAL_SECONDS = 10 * 60
+_last_purge = 0.0
+
+_UPLOAD_ID_RE = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
+
+class UploadError(Exception):
+    """An upload request that cannot be honoured; carries the HTTP status"""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+def allowed_file(filename, allowed_extensions):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
+
+def save_file(file, subfolder):
+    """Store an uploaded file in the content-addressed blob store.
+
+    The upload is hashed while it is streamed to disk; identical content
+    resolves to the existing blob. Returns the path relative to UPLOAD_FOLDER
+    (e.g. 'resumes/ab/ab12....pdf'), or None on failure.
+    """
+    if file:
+        try:
+            start = time.perf_counter()
+            temp_path, digest, size = stream_to_temp(file.stream)
+            observe_upload(subfolder, size, time.perf_counter() - start)
+            ext = os.path.splitext(secure_filename(file.filename))[1]
+            path = store_blob(temp_path, digest, size, subfolder, ext)
+            logger.info(f"File saved successfully at: {path}")
+            return path
+        except Exception as e:
+            logger.error(f"Error saving file: {str(e)}")
+            return None
+    return None
+
+
+def _partial_dir():
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], PARTIAL_FOLDER)
+
+def _paths(upload_id):
+    if not _UPLOAD_ID_RE.match(upload_id or ''):
+        raise UploadError("Upload not found", 404)
+    base = os.path.join(_partial_dir(), upload_id)
+    return base + '.json', base + '.part'
+
+def _write_meta(meta):
+    meta_path, _ = _paths(meta['id'])
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+class _PartLock:
+    """Non-blocking exclusive lock on a partial file.
+
+    Blocking on flock would stall every greenlet in a gevent worker, so a
+    concurrent writer gets a 409 and is expected to retry.
+    """
+
+    def __init__(self, handle):
+        self.handle = handle
+
+    def __enter__(self):
+        if fcntl is not None:
+            try:
+                fcntl.flock(self.handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadError("Upload is busy, retry shortly", 409)
+        return self.handle
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+        return False
+
+
+def create_upload(kind, filename, size=None, sha256=None, owner=None):
+    """Start a chunked upload and return its metadata"""
+    if kind not in UPLOAD_KINDS:
+        raise UploadError(f"kind must be one of: {', '.join(UPLOAD_KINDS)}")
+    _, extensions, _, limit_key = UPLOAD_KINDS[kind]
+    if not filename:
+        raise UploadError("No selected file")
+    if not allowed_file(filename, extensions):
+        raise UploadError("Invalid file type")
+    limit = current_app.config.get(limit_key)
+    if size is not None:
+        try:
+            size = int(size)
+        except (TypeError, ValueError):
+            raise UploadError("size must be an integer")
+        if size < 0:
+            raise UploadError("size cannot be negative")
+        if limit and size > limit:
+            raise UploadError(f"File exceeds the {limit // (1024 * 1024)}MB limit", 413)
+    if sha256 is not None and not re.match(r'^[0-9a-fA-F]{64}$', str(sha256)):
+        raise UploadError("sha256 must be a hex SHA-256 digest")
+
+    purge_stale_uploads()
+    os.makedirs(_partial_dir(), exist_ok=True)
+    meta = {
+        'id': secrets.token_urlsafe(24),
+        'kind': kind,
+        'filename': filename,
+        'size': size,
+        'sha256': sha256.lower() if sha256 else None,
+        'owner': owner,
+        'created_at': time.time(),
+    }
+    _, part_path = _paths(meta['id'])
+    open(part_path, 'wb').close()
+    _write_meta(meta)
+    logger.info(f"Started chunked {kind} upload {meta['id']}")
+    return meta
+
+def load_upload(upload_id, owner=None):
+    """Metadata for an in-progress upload, checking it belongs to `owner`"""
+    meta_path, _ = _paths(upload_id)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        raise UploadError("Upload not found", 404)
+    if meta.get('owner') and meta['owner'] != owner:
+        raise UploadError("Upload not found", 404)
+    return meta
+
+def current_offset(meta):
+    """Number of bytes received so far"""
+    _, part_path = _paths(meta['id'])
+    try:
+        return os.path.getsize(part_path)
+    except OSError:
+        raise UploadError("Upload not found", 404)
+
+def write_chunk(meta, offset, stream, length, chunk_sha256=None):
+    """Append `length` bytes from `stream` at `offset`; return the new offset.
+
+    The chunk is streamed to disk in small blocks. If the body is short or
+    its SHA-256 does not match `chunk_sha256`, the partial file is truncated
+    back to `offset` so the client can resend the same chunk.
+    """
+    if length is None:
+        raise UploadError("Content-Length is required", 411)
+    if length > MAX_CHUNK_SIZE:
+        raise UploadError(f"Chunks may be at most {MAX_CHUNK_SIZE} bytes", 413)
+    _, _, _, limit_key = UPLOAD_KINDS[meta['kind']]
+    limit = current_app.config.get(limit_key)
+    if limit and offset + length > limit:
+        raise UploadError(f"File exceeds the {limit // (1024 * 1024)}MB limit", 413)
+    if meta.get('size') is not None and offset + length > meta['size']:
+        raise UploadError("Chunk extends past the declared file size", 416)
+
+    _, part_path = _paths(meta['id'])
+    try:
+        handle = open(part_path, 'r+b')
+    except OSError:
+        raise UploadError("Upload not found", 404)
+    start = time.perf_counter()
+    with handle, _PartLock(handle):
+        received = os.fstat(handle.fileno()).st_size
+        if offset != received:
+            raise UploadError("Offset does not match the bytes received", 409, offset=received)
+        handle.seek(offset)
+        digest = hashlib.sha256()
+        remaining = length
+        while remaining:
+            block = stream.read(min(COPY_BUFFER_SIZE, remaining))
+            if not block:
+                break
+            handle.write(block)
+            digest.update(block)
+            remaining -= len(block)
+        if remaining or (chunk_sha256 and digest.hexdigest() != chunk_sha256.lower()):
+            handle.truncate(offset)
+            message = "Incomplete chunk" if remaining else "Chunk checksum mismatch"
+            raise UploadError(message, 400 if remaining else 422, offset=offset)
+        handle.flush()
+        os.fsync(handle.fileno())
+    observe_upload(UPLOAD_KINDS[meta['kind']][0], length, time.perf_counter() - start)
+    return offset + length
+
+def finalize_upload(meta):
+    """Verify a finished upload and move it into place.
+
+    Returns the path relative to UPLOAD_FOLDER, in the same form the
+    single-request endpoints store in candidate_data.
+    """
+    meta_path, part_path = _paths(meta['id'])
+    subfolder = UPLOAD_KINDS[meta['kind']][0]
+    try:
+        handle = open(part_path, 'rb')
+    except OSError:
+        raise UploadError("Upload not found", 404)
+    with handle, _PartLock(handle):
+        received = os.fstat(handle.fileno()).st_size
+        if received == 0:
+            raise UploadError("No data received", offset=0)
+        if meta.get('size') is not None and received != meta['size']:
+            raise UploadError("Upload is incomplete", 409, offset=received)
+        digest, _ = file_digest(part_path)
+        if meta.get('sha256') and digest != meta['sha256']:
+            raise UploadError("File checksum mismatch", 422, offset=received)
+
+        ext = os.path.splitext(secure_filename(meta['filename']))[1]
+        path = store_blob(part_path, digest, received, subfolder, ext)
+    try:
+        os.remove(meta_path)
+    except OSError:
+        pass
+    logger.info(f"Completed chunked {meta['kind']} upload {meta['id']} ({received} bytes)",
+                extra={'upload_id': meta['id'], 'bytes': received})
+    return path
+
+def purge_stale_uploads(max_age=STALE_UPLOAD_SECONDS, force=False):
+    """Delete partial uploads that have not been written to for `max_age` seconds"""
+    global _last_purge
+    now = time.time()
+    if not force and now - _last_purge < _PURGE_INTERVAL_SECONDS:
+        return 0
+    _last_purge = now
+    removed = 0
+    try:
+        entries = list(os.scandir(_partial_dir()))
+    except FileNotFoundError:
+        return 0
+    names = {entry.name for entry in entries}
+    for entry in entries:
+        base, ext = os.path.splitext(entry.name)
+        # Metadata files are judged by their partial file, which is touched on every chunk
+        if ext != '.part' and base.split('.')[0] + '.part' in names:
+            continue
+        try:
+            if now - entry.stat().st_mtime <= max_age:
+                continue
+            os.remove(entry.path)
+            removed += 1
+            if ext == '.part':
+                os.remove(os.path.join(_partial_dir(), base + '.json'))
+        except OSError:
+            continue
+    if removed:
+        logger.info(f"Purged {removed} stale partial upload files")
+    return removed
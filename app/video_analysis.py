@@ -0,0 +1,146 @@
+"""Sampled-frame analysis of intro videos.
+
+A background task decodes each video with OpenCV, keeps only a few frames
+per second (grabbing the rest without converting them), and runs MediaPipe
+face detection over the kept frames in small batches, so memory is bounded
+by one batch of downscaled frames whatever the video length. The face
+presence ratio, duration and an "empty video" flag (no frames, too short,
+or mostly black) are stored on each candidate using the video, where the
+admin filters read them directly.
+
+OpenCV does not decode audio, so silence is not detected here.
+"""
+from app.models import db, Candidate
+from app.tasks import register_task
+from app.storage import get_storage
+from app.page_cache import bump_candidates_version
+from sqlalchemy import update
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_TASK = 'video_analysis'
+
+DEFAULT_SAMPLE_FPS = 2.0
+# Frames handed to the detector at a time
+BATCH_SIZE = 16
+# Frames are downscaled to this width before detection
+ANALYSIS_WIDTH = 320
+MIN_DETECTION_CONFIDENCE = 0.5
+# Mean grey level below which a frame counts as black
+DARK_LEVEL = 16
+# A video is empty if it is shorter than this or mostly black
+MIN_DURATION_SECONDS = 1.0
+MAX_DARK_RATIO = 0.9
+
+# One detector per pool process, created on first use
+_detector = None
+
+
+def _face_detector():
+    """Callable returning True when an RGB frame contains a face.
+
+    Uses the classic `mediapipe.solutions` API when present; newer MediaPipe
+    releases only ship the Tasks API, which needs the model file named by
+    FACE_DETECTOR_MODEL.
+    """
+    global _detector
+    if _detector is not None:
+        return _detector
+    import mediapipe as mp
+    if hasattr(mp, 'solutions'):
+        detection = mp.solutions.face_detection.FaceDetection(
+            model_selection=0, min_detection_confidence=MIN_DETECTION_CONFIDENCE)
+        _detector = lambda rgb: bool(detection.process(rgb).detections)
+    else:
+        from mediapipe.tasks.python import BaseOptions
+        from mediapipe.tasks.python import vision
+        model_path = os.environ.get('FACE_DETECTOR_MODEL')
+        if not model_path:
+            raise RuntimeError("FACE_DETECTOR_MODEL must point to a MediaPipe face detector .tflite model")
+        detection = vision.FaceDetector.create_from_options(vision.FaceDetectorOptions(
+            base_options=BaseOptions(model_asset_path=model_path),
+            min_detection_confidence=MIN_DETECTION_CONFIDENCE))
+        _detector = lambda rgb: bool(detection.detect(
+            mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)).detections)
+    return _detector
+
+
+def _detect_batch(frames):
+    """Number of frames in the batch with at least one face"""
+    detect = _face_detector()
+    return sum(1 for frame in frames if detect(frame))
+
+
+def _sample_frames(source, video_path, sample_fps):
+    """(duration in ms, frames sampled, dark frames, frames with a face)"""
+    import cv2
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"Cannot decode video: {video_path}")
+    interval_ms = 1000.0 / sample_fps
+    next_sample_ms = 0.0
+    duration_ms = 0.0
+    sampled = dark = faces = 0
+    batch = []
+    try:
+        # grab() advances without converting the frame; only samples are retrieved
+        while capture.grab():
+            position_ms = capture.get(cv2.CAP_PROP_POS_MSEC)
+            duration_ms = max(duration_ms, position_ms)
+            if position_ms < next_sample_ms:
+                continue
+            next_sample_ms += interval_ms * (int((position_ms - next_sample_ms) // interval_ms) + 1)
+            ok, frame = capture.retrieve()
+            if not ok:
+                continue
+            height, width = frame.shape[:2]
+            if width > ANALYSIS_WIDTH:
+                frame = cv2.resize(frame, (ANALYSIS_WIDTH, int(height * ANALYSIS_WIDTH / width)),
+                                   interpolation=cv2.INTER_AREA)
+            sampled += 1
+            if cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY).mean() < DARK_LEVEL:
+                dark += 1
+                continue
+            batch.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            if len(batch) >= BATCH_SIZE:
+                faces += _detect_batch(batch)
+                batch = []
+        if batch:
+            faces += _detect_batch(batch)
+    finally:
+        capture.release()
+
+    return duration_ms, sampled, dark, faces
+
+
+def analyze_video(payload, upload_folder):
+    """Sample a video and measure face presence; runs in a worker pool process"""
+    video_path = payload['path']
+    sample_fps = float(payload.get('sample_fps') or DEFAULT_SAMPLE_FPS)
+    with get_storage().local_copy(video_path) as source:
+        duration_ms, sampled, dark, faces = _sample_frames(source, video_path, sample_fps)
+
+    duration = round(duration_ms / 1000, 2)
+    is_empty = (sampled == 0 or duration < MIN_DURATION_SECONDS or dark / sampled >= MAX_DARK_RATIO)
+    return {
+        'duration': duration,
+        'sampled_frames': sampled,
+        'face_ratio': round(faces / sampled, 3) if sampled else 0.0,
+        'is_empty': is_empty,
+    }
+
+def store_video_analysis(payload, result):
+    """Record analysis results on every candidate that uses the video"""
+    db.session.execute(
+        update(Candidate).where(Candidate.self_introduction_video == payload['path'])
+        .values(video_duration=result['duration'], video_face_ratio=result['face_ratio'],
+                video_is_empty=result['is_empty'])
+        .execution_options(synchronize_session=False)
+    )
+    bump_candidates_version(db.session.connection())
+    db.session.commit()
+
+register_task(ANALYSIS_TASK, analyze_video, store_video_analysis)
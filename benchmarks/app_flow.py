@@ -0,0 +1,435 @@
+"""Load-test the applicant flow and benchmark the hot code paths.
+
+Each simulated applicant opens /apply/<hash>, answers every chat state in
+app/chat_flow.py, uploads a resume and a video, and confirms the
+declaration. Applicants run concurrently; the report gives p50/p95/p99
+latency and SQL queries per request for each step, and overall throughput.
+Queries are read from the app's own /metrics histograms, so a live server
+reports them too. Microbenchmarks then time the Candidate validators and
+the admin candidate lists.
+
+    python benchmarks/app_flow.py                            # in-process, throwaway SQLite
+    python benchmarks/app_flow.py --applicants 500 --concurrency 32
+    DATABASE_URL=postgresql://... python benchmarks/app_flow.py
+    python benchmarks/app_flow.py --url http://localhost:8000 --link-hash <hash>
+    python benchmarks/app_flow.py --update-baseline          # record benchmarks/baselines.json
+
+Results are compared with benchmarks/baselines.json (per database dialect)
+and the run exits non-zero if queries per request grow. In-process runs
+warm the caches with one applicant first and pin the job cache's
+time-driven reloads, so their query counts do not depend on how fast the
+machine is. Timings are normalized by a fixed CPU calibration loop, timed
+with each run and stored with the baseline, and a median, microbenchmark
+or throughput figure more than --tolerance off its scaled baseline is
+flagged; it only fails the run with --fail-on-timing. p95/p99 are shown
+but never flagged. In-process runs create their own job and seed the
+database in place, so point DATABASE_URL at a scratch database. --url runs
+(e.g. against gunicorn -c gunicorn.conf.py) need an active job's link
+hash and skip the microbenchmarks; their query counts include the
+server's periodic cache checks.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASELINE_FILE = os.path.join(ROOT, 'benchmarks', 'baselines.json')
+PERCENTILES = (50, 95, 99)
+CALIBRATION = 'calibration.loop_ms'
+# Query counts are averages over whole requests; allow for rounding only
+QUERY_SLACK = 0.01
+
+# Reply sent in each chat state; the upload steps post their file first
+CHAT_REPLIES = {
+    'greeting': 'Hi',
+    'asking_first_name': 'Load',
+    'asking_last_name': 'Tester',
+    'asking_email': 'applicant{n}@example.com',
+    'asking_mobile': '{mobile}',
+    'asking_alternate_mobile': 'skip',
+    'asking_education': 'B.Tech',
+    'asking_academic': '8.5 CGPA',
+    'asking_company': 'Acme',
+    'asking_designation': 'Engineer',
+    'asking_total_experience': '5',
+    'asking_relevant_experience': '3',
+    'asking_skills': 'python, sql, docker',
+    'asking_resume': 'resume uploaded',
+    'asking_video': 'video uploaded',
+    'asking_referral': 'no',
+    'asking_declaration': 'yes',
+}
+UPLOAD_STEPS = {
+    'asking_resume': ('upload-resume', '/api/upload-resume', 'resume', 'resume.pdf'),
+    'asking_video': ('upload-video', '/api/upload-video', 'video', 'intro.webm'),
+}
+# Report step -> Flask endpoint whose /metrics query histogram it reads
+STEP_ENDPOINTS = {
+    'apply': 'main.apply',
+    'chat': 'main.chat',
+    'upload-resume': 'main.upload_resume',
+    'upload-video': 'main.upload_video',
+    'declaration': 'main.chat',
+}
+
+
+class InProcessClient:
+    """One applicant's cookie-carrying client for the app's WSGI callable"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def get(self, path):
+        response = self.client.get(path)
+        return response.status_code, response.get_data(as_text=True)
+
+    def post_json(self, path, data):
+        response = self.client.post(path, json=data)
+        return response.status_code, response.get_json(silent=True)
+
+    def post_file(self, path, field, filename, content):
+        import io
+        response = self.client.post(path, data={field: (io.BytesIO(content), filename)},
+                                    content_type='multipart/form-data')
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpClient:
+    """One applicant's session against a running server"""
+
+    def __init__(self, base_url, token=None):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        if token:
+            self.session.headers['Authorization'] = f"Bearer {token}"
+
+    def get(self, path):
+        response = self.session.get(self.base_url + path)
+        return response.status_code, response.text
+
+    def post_json(self, path, data):
+        response = self.session.post(self.base_url + path, json=data)
+        return response.status_code, _json_or_none(response)
+
+    def post_file(self, path, field, filename, content):
+        response = self.session.post(self.base_url + path, files={field: (filename, content)})
+        return response.status_code, _json_or_none(response)
+
+def _json_or_none(response):
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def fake_resume(n):
+    """A small PDF-shaped payload, distinct per applicant so nothing dedupes"""
+    return b'%PDF-1.4\n% applicant ' + str(n).encode() + b'\n' + b'0' * 20000 + b'\n%%EOF\n'
+
+def fake_video(n, size):
+    return b'\x1a\x45\xdf\xa3' + str(n).encode().ljust(16, b' ') + os.urandom(max(0, size - 20))
+
+
+def run_applicant(client, link_hash, n, video_size, timings, lock):
+    """Walk one applicant through the whole flow; returns an error message or None"""
+    from app.chat_flow import STEPS
+
+    def timed(step, call, *args):
+        start = time.perf_counter()
+        status, body = call(*args)
+        elapsed = time.perf_counter() - start
+        with lock:
+            timings.setdefault(step, []).append(elapsed)
+        return status, body
+
+    status, _ = timed('apply', client.get, f'/apply/{link_hash}')
+    if status != 200:
+        return f"apply returned {status}"
+    status, body = timed('chat', client.post_json, '/api/chat', {'message': ''})
+    if status != 200 or not body or 'response' not in body:
+        return f"chat start returned {status}"
+
+    for step in STEPS:
+        if step.state in UPLOAD_STEPS:
+            name, path, field, filename = UPLOAD_STEPS[step.state]
+            content = fake_resume(n) if field == 'resume' else fake_video(n, video_size)
+            status, body = timed(name, client.post_file, path, field, filename, content)
+            if status != 200:
+                return f"{name} returned {status}: {(body or {}).get('error')}"
+        message = CHAT_REPLIES[step.state].format(n=n, mobile=9000000000 + n % 1000000000)
+        step_name = 'declaration' if step.state == 'asking_declaration' else 'chat'
+        status, body = timed(step_name, client.post_json, '/api/chat', {'message': message})
+        if status != 200 or not body:
+            return f"chat in {step.state} returned {status}"
+        if step_name == 'declaration' and not body.get('completed'):
+            return f"declaration not accepted: {body.get('response')}"
+    return None
+
+
+_SAMPLE_RE = re.compile(r'^http_request_sql_queries_(sum|count)\{endpoint="([^"]+)"\} (\S+)$')
+
+def query_counters(client):
+    """endpoint -> (queries, requests) from the /metrics query histogram"""
+    status, text = client.get('/metrics')
+    if status != 200:
+        raise RuntimeError(f"/metrics returned {status}")
+    totals = {}
+    for line in text.splitlines():
+        match = _SAMPLE_RE.match(line)
+        if match:
+            kind, endpoint, value = match.groups()
+            queries, requests = totals.get(endpoint, (0.0, 0.0))
+            if kind == 'sum':
+                queries += float(value)
+            else:
+                requests += float(value)
+            totals[endpoint] = (queries, requests)
+    return totals
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def pin_job_cache():
+    """Stop the job cache's periodic version check and entry expiry.
+
+    Both reload from the database on a clock, so a slower run would show
+    more queries per request. Only for in-process runs, where this process
+    is the only writer.
+    """
+    from app import job_cache
+    job_cache.VERSION_CHECK_SECONDS = float('inf')
+    job_cache._cache.ttl = float('inf')
+
+
+def load_test(make_client, link_hash, applicants, concurrency, video_size):
+    """Run the flow for every applicant after one warm-up; returns (results, errors)"""
+    timings = {}
+    lock = threading.Lock()
+    # Fill the caches first, so one-off loads are not spread over the run
+    warmup_error = run_applicant(make_client(), link_hash, 0, video_size, {}, lock)
+    if warmup_error:
+        return {}, [f"warm-up: {warmup_error}"]
+    before = query_counters(make_client())
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(
+            lambda n: run_applicant(make_client(), link_hash, n, video_size, timings, lock),
+            range(1, applicants + 1)))
+    elapsed = time.perf_counter() - started
+    after = query_counters(make_client())
+
+    errors = [error for error in outcomes if error]
+    results = {}
+    for step, samples in timings.items():
+        for pct in PERCENTILES:
+            results[f'{step}.p{pct}_ms'] = round(percentile(samples, pct) * 1000, 2)
+    for step, endpoint in STEP_ENDPOINTS.items():
+        queries, requests = after.get(endpoint, (0.0, 0.0))
+        old_queries, old_requests = before.get(endpoint, (0.0, 0.0))
+        if requests > old_requests:
+            results[f'{endpoint}.queries_per_request'] = round((queries - old_queries) / (requests - old_requests), 2)
+    total_requests = sum(len(samples) for samples in timings.values())
+    results['throughput.requests_per_second'] = round(total_requests / elapsed, 1)
+    results['throughput.applications_per_second'] = round((applicants - len(errors)) / elapsed, 2)
+    return results, errors
+
+
+def median_us(func, repeat, number):
+    """Median time of one call of `func` in microseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return round(statistics.median(samples) * 1e6, 1)
+
+
+def calibrate(repeat):
+    """Median time of a fixed pure-Python loop in milliseconds, the unit timings are scaled by"""
+    def loop():
+        total = 0
+        for i in range(200000):
+            total += i * i % 7
+        return total
+    return round(median_us(loop, repeat, 1) / 1000, 2)
+
+
+def microbenchmarks(app, job_id, repeat):
+    """Candidate validators and the admin candidate list pages"""
+    from app.chat_flow import build_candidate, validate_field
+    from app.models import Candidate
+
+    application = {
+        'first_name': 'Load', 'last_name': 'Tester', 'personal_email': 'micro@example.com',
+        'mobile_no': '9876543210', 'alternate_contact_no': '9123456780',
+        'highest_educational_qualifications': 'B.Tech', 'academic_performance': '8.5 CGPA',
+        'current_company': 'Acme', 'current_designation': 'Engineer', 'total_experience': '5',
+        'relevant_experience': '3', 'primary_skills': 'python, sql',
+        'resume_attachments': 'resumes/micro.pdf', 'referred_by': 'Someone',
+    }
+    results = {}
+    with app.app_context():
+        results['validators.build_candidate_us'] = median_us(
+            lambda: build_candidate(job_id, application), repeat, 200)
+        results['validators.email_us'] = median_us(
+            lambda: validate_field('personal_email', 'micro@example.com'), repeat, 1000)
+        results['validators.relevant_experience_us'] = median_us(
+            lambda: validate_field('relevant_experience', '3', {'total_experience': 5.0}), repeat, 1000)
+        results['validators.model_constructor_us'] = median_us(
+            lambda: Candidate(**{**application, 'job_id': job_id, 'total_experience': 5.0,
+                                 'relevant_experience': 3.0}), repeat, 200)
+
+    client = app.test_client()
+    pages = {
+        'admin.view_job_ms': f'/admin/view_job/{job_id}',
+        'admin.candidates_ms': f'/admin/candidates?job_id={job_id}',
+        'admin.candidates_api_ms': f'/admin/api/candidates?job_id={job_id}',
+    }
+    for name, path in pages.items():
+        status = client.get(path).status_code
+        if status != 200:
+            raise RuntimeError(f"{path} returned {status}")
+        results[name] = round(median_us(lambda: client.get(path), repeat, 5) / 1000, 2)
+    return results
+
+
+def is_regression(name, value, baseline, tolerance, scale=1.0):
+    """True if `value` is worse than `baseline`; timings are first scaled by `scale`"""
+    if name.endswith('queries_per_request'):
+        return value > baseline + QUERY_SLACK
+    if name == CALIBRATION or name.endswith(('.p95_ms', '.p99_ms')):
+        return False
+    if name.startswith('throughput.'):
+        return value < baseline / scale / (1 + tolerance)
+    return value > baseline * scale * (1 + tolerance)
+
+
+def compare(results, baseline, tolerance, fail_on_timing=False):
+    """Print each result beside its baseline; returns the number of failing regressions.
+
+    Query counts always fail; timings only with `fail_on_timing`. Timing
+    baselines are scaled by how much slower this machine ran the calibration
+    loop than the one that recorded them.
+    """
+    scale = 1.0
+    if results.get(CALIBRATION) and baseline.get(CALIBRATION):
+        scale = results[CALIBRATION] / baseline[CALIBRATION]
+        print(f"  Timings scaled by {scale:.2f} (calibration loop vs baseline)")
+    regressions = 0
+    for name in sorted(results):
+        value = results[name]
+        if name not in baseline:
+            print(f"  {name:48} {value:>10}")
+            continue
+        flagged = is_regression(name, value, baseline[name], tolerance, scale)
+        hard = name.endswith('queries_per_request') or fail_on_timing
+        regressions += flagged and hard
+        marker = ('  REGRESSION' if hard else '  slower') if flagged else ''
+        print(f"  {name:48} {value:>10}  (baseline {baseline[name]}){marker}")
+    return regressions
+
+
+def create_job(db, Job):
+    from datetime import datetime, timedelta
+    import secrets
+    job = Job(title='Load test', description='Benchmark job', link_hash=secrets.token_urlsafe(16),
+              start_date=datetime.utcnow(), end_date=datetime.utcnow() + timedelta(days=30), is_active=True)
+    db.session.add(job)
+    db.session.commit()
+    return job.id, job.link_hash
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--applicants', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8, help='applicants in flight at once')
+    parser.add_argument('--video-kb', type=int, default=256, help='size of each uploaded video')
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per microbenchmark')
+    parser.add_argument('--url', help='base URL of a running server instead of an in-process app')
+    parser.add_argument('--link-hash', help='active job link for --url runs')
+    parser.add_argument('--metrics-token', default=os.environ.get('METRICS_TOKEN'))
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='allowed slowdown before a timing counts as a regression (0.5 = 50%%)')
+    parser.add_argument('--fail-on-timing', action='store_true',
+                        help='fail on timing regressions too, not only on query counts')
+    parser.add_argument('--update-baseline', action='store_true', help='store these results as the baseline')
+    parser.add_argument('--no-baseline', action='store_true', help='report only, never fail')
+    args = parser.parse_args()
+    if args.url and not args.link_hash:
+        parser.error('--url needs --link-hash')
+
+    scratch = None
+    if args.url:
+        base_url = args.url
+        dialect = 'remote'
+        make_client = lambda: HttpClient(base_url, args.metrics_token)
+        link_hash = args.link_hash
+    else:
+        scratch = tempfile.mkdtemp(prefix='recruite-load-')
+        if not os.environ.get('DATABASE_URL'):
+            os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(scratch, 'load.db')}"
+        os.environ['STORAGE_ROOT'] = os.path.join(scratch, 'storage')
+        os.environ.setdefault('LOG_LEVEL', 'WARNING')
+        os.environ.pop('METRICS_TOKEN', None)
+
+        from flask_migrate import upgrade
+        from app import create_app
+        from app.models import db, Job
+
+        app = create_app()
+        app.config['UPLOAD_FOLDER'] = scratch
+        with app.app_context():
+            upgrade(directory=os.path.join(ROOT, 'migrations'))
+            job_id, link_hash = create_job(db, Job)
+            dialect = db.engine.dialect.name
+        make_client = lambda: InProcessClient(app)
+        pin_job_cache()
+
+    print(f"{args.applicants} applicants, {args.concurrency} at a time ({dialect})")
+    results, errors = load_test(make_client, link_hash, args.applicants, args.concurrency, args.video_kb * 1024)
+    if not args.url:
+        results[CALIBRATION] = calibrate(args.repeat)
+        results.update(microbenchmarks(app, job_id, args.repeat))
+
+    baselines = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baselines = json.load(f)
+    regressions = compare(results, {} if args.no_baseline else baselines.get(dialect, {}), args.tolerance,
+                          args.fail_on_timing)
+
+    for error in sorted(set(errors)):
+        print(f"[FAIL] {errors.count(error)} applicant(s): {error}")
+    if args.update_baseline and not errors:
+        baselines[dialect] = results
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline for {dialect} written to {os.path.relpath(BASELINE_FILE, ROOT)}")
+        regressions = 0
+    elif regressions:
+        print(f"[FAIL] {regressions} result(s) regressed beyond the baseline")
+
+    if scratch:
+        import shutil
+        shutil.rmtree(scratch, ignore_errors=True)
+    sys.exit(1 if errors or regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
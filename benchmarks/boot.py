@@ -0,0 +1,157 @@
+"""Measure how long a web worker takes to become ready.
+
+Compares a worker that boots from scratch (a fresh interpreter importing
+the app and running create_app, as each gunicorn worker did without
+preload_app) with one forked from a preloaded master, across the boot
+options in app/boot.py:
+
+    cold, create_all         SCHEMA_CHECK=create (the development default)
+    cold, alembic check      SCHEMA_CHECK=alembic
+    cold, bytecode cache     ... plus a warm JINJA_CACHE_DIR
+    preloaded fork           master ran create_app with PRELOAD_TEMPLATES;
+                             the time runs from fork() to the first response
+
+Each worker serves one admin dashboard request. Exits non-zero if
+create_app imported any of HEAVY_MODULES, which must only load on first
+use.
+
+    python benchmarks/boot.py                      # throwaway SQLite
+    python benchmarks/boot.py --runs 20
+    DATABASE_URL=postgresql://... python benchmarks/boot.py
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HEAVY_MODULES = ('numpy', 'cv2', 'mediapipe', 'boto3', 'pypdf', 'docx')
+FIRST_REQUEST = '/admin/'
+
+# Runs in a fresh interpreter; prints its timings as JSON
+COLD_WORKER = f"""
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+status = application.test_client().get({FIRST_REQUEST!r}).status_code
+served = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - start) * 1000,
+    'create_ms': (created - imported) * 1000,
+    'request_ms': (served - created) * 1000,
+    'status': status,
+    'heavy': [name for name in {HEAVY_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def run_json(env, code, *args):
+    output = subprocess.run([sys.executable, '-c', code, *args], env=env, cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def cold_run(env):
+    """Timings of one fresh worker, plus its wall time including interpreter startup"""
+    started = time.perf_counter()
+    result = run_json(env, COLD_WORKER)
+    result['ready_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+
+# Runs in a fresh interpreter: a preloaded master that forks `runs` workers
+PRELOADED_MASTER = f"""
+import json, os, sys, time
+import app
+started = time.perf_counter()
+application = app.create_app()
+preload_ms = (time.perf_counter() - started) * 1000
+runs = []
+for _ in range(int(sys.argv[1])):
+    read_fd, write_fd = os.pipe()
+    started = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        status = application.test_client().get({FIRST_REQUEST!r}).status_code
+        os.write(write_fd, json.dumps({{'status': status, 'ready_ms': (time.perf_counter() - started) * 1000}}).encode())
+        os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        runs.append(json.loads(pipe.read()))
+    os.waitpid(pid, 0)
+print(json.dumps({{'preload_ms': preload_ms, 'runs': runs}}))
+"""
+
+
+def summarize(name, runs):
+    def median(key):
+        values = [run[key] for run in runs if key in run]
+        return f"{statistics.median(values):8.1f}" if values else f"{'-':>8}"
+    print(f"  {name:24} {median('import_ms')} {median('create_ms')} {median('request_ms')} {median('ready_ms')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10, help='workers started per variant')
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='recruite-boot-')
+    if not os.environ.get('DATABASE_URL'):
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(scratch, 'boot.db')}"
+    os.environ['LOG_LEVEL'] = 'WARNING'
+    os.environ.setdefault('SESSION_TYPE', 'memory')
+    for name in ('SCHEMA_CHECK', 'PRELOAD_TEMPLATES', 'JINJA_CACHE_DIR'):
+        os.environ.pop(name, None)
+
+    from flask_migrate import upgrade
+    from app import create_app
+    migrations = create_app()
+    with migrations.app_context():
+        upgrade(directory=os.path.join(ROOT, 'migrations'))
+
+    cache_dir = os.path.join(scratch, 'jinja')
+    variants = [
+        ('cold, create_all', {'SCHEMA_CHECK': 'create'}),
+        ('cold, alembic check', {'SCHEMA_CHECK': 'alembic'}),
+        ('cold, bytecode cache', {'SCHEMA_CHECK': 'alembic', 'JINJA_CACHE_DIR': cache_dir}),
+    ]
+    failures = 0
+    print(f"Median ms over {args.runs} workers")
+    print(f"  {'':24} {'import':>8} {'create':>8} {'request':>8} {'ready':>8}")
+    for name, overrides in variants:
+        env = dict(os.environ, **overrides)
+        if 'JINJA_CACHE_DIR' in overrides:
+            cold_run(env)  # fill the cache
+        runs = [cold_run(env) for _ in range(args.runs)]
+        summarize(name, runs)
+        heavy = sorted({module for run in runs for module in run['heavy']})
+        if heavy or any(run['status'] != 200 for run in runs):
+            failures += 1
+            print(f"    [FAIL] heavy modules imported at boot: {', '.join(heavy) or 'none'}; "
+                  f"statuses: {sorted({run['status'] for run in runs})}")
+
+    env = dict(os.environ, SCHEMA_CHECK='alembic', PRELOAD_TEMPLATES='1', JINJA_CACHE_DIR=cache_dir)
+    preloaded = run_json(env, PRELOADED_MASTER, str(args.runs))
+    runs = preloaded['runs']
+    print(f"  (preloading the master took {preloaded['preload_ms']:.1f} ms)")
+    summarize('preloaded fork', runs)
+    if any(run['status'] != 200 for run in runs):
+        failures += 1
+        print(f"    [FAIL] statuses: {sorted({run['status'] for run in runs})}")
+
+    import shutil
+    shutil.rmtree(scratch, ignore_errors=True)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Burst-submit applications with and without group commit.
+
+Fires --burst one-shot applications (/api/apply/<hash>, with a small
+resume attached) from --concurrency clients at once, first committing each
+in its request and then with GROUP_COMMIT on, and reports submissions and
+database commits per second, rows per commit, and latency.
+
+    python benchmarks/group_commit.py                       # throwaway SQLite
+    python benchmarks/group_commit.py --burst 2000 --concurrency 200 --gevent
+    DATABASE_URL=postgresql://... python benchmarks/group_commit.py
+
+--gevent monkey-patches like gunicorn's gevent workers and runs the
+clients as greenlets. Sessions are kept in memory so only the
+application insert commits. Point DATABASE_URL at a scratch database.
+"""
+import argparse
+import sys
+
+if '--gevent' in sys.argv:
+    from gevent import monkey
+    monkey.patch_all()
+
+import io
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RESUME = b'%PDF-1.4\n% group commit benchmark\n%%EOF\n'
+
+
+def application(n):
+    return {
+        'first_name': 'Burst', 'last_name': 'Applicant', 'personal_email': f'burst{n}@example.com',
+        'mobile_no': f'{9000000000 + n}', 'highest_educational_qualifications': 'B.Tech',
+        'academic_performance': '8 CGPA', 'total_experience': '2', 'relevant_experience': '1',
+        'primary_skills': 'python', 'self_declaration': 'yes',
+        'resume': (io.BytesIO(RESUME), 'resume.pdf'),
+    }
+
+
+def burst(app, link_hash, start, count, concurrency, use_gevent):
+    """Submit `count` applications at once; returns (seconds, latencies, failures)"""
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def submit(n):
+        client = app.test_client()
+        started = time.perf_counter()
+        response = client.post(f'/api/apply/{link_hash}', data=application(n),
+                               content_type='multipart/form-data')
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if response.status_code != 201:
+                failures.append(f"{response.status_code}: {response.get_json(silent=True)}")
+
+    started = time.perf_counter()
+    numbers = range(start, start + count)
+    if use_gevent:
+        from gevent.pool import Pool
+        Pool(concurrency).map(submit, numbers)
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(submit, numbers))
+    return time.perf_counter() - started, latencies, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--burst', type=int, default=1000, help='applications per run')
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--window-ms', type=float, default=5)
+    parser.add_argument('--max-rows', type=int, default=50)
+    parser.add_argument('--gevent', action='store_true', help='run clients as greenlets')
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='recruite-commit-')
+    if not os.environ.get('DATABASE_URL'):
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(scratch, 'commit.db')}"
+    os.environ['STORAGE_ROOT'] = os.path.join(scratch, 'storage')
+    os.environ['SESSION_TYPE'] = 'memory'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    from flask_migrate import upgrade
+    from sqlalchemy import event
+    from app import create_app
+    from app.models import db, Job
+    from datetime import datetime, timedelta
+
+    app = create_app()
+    app.config.update(UPLOAD_FOLDER=scratch, GROUP_COMMIT_WINDOW_MS=args.window_ms,
+                      GROUP_COMMIT_MAX_ROWS=args.max_rows)
+    commits = [0]
+    with app.app_context():
+        upgrade(directory=os.path.join(ROOT, 'migrations'))
+        job = Job(title='Campus drive', description='Burst benchmark', link_hash='burst-benchmark',
+                  start_date=datetime.utcnow(), end_date=datetime.utcnow() + timedelta(days=1), is_active=True)
+        db.session.add(job)
+        db.session.commit()
+        event.listen(db.engine, 'commit', lambda conn: commits.__setitem__(0, commits[0] + 1))
+        dialect = db.engine.dialect.name
+
+    print(f"{args.burst} applications, {args.concurrency} at once "
+          f"({dialect}, {'greenlets' if args.gevent else 'threads'})")
+    print(f"  {'':14} {'apps/s':>8} {'commits/s':>10} {'rows/commit':>12} {'p50 ms':>8} {'p99 ms':>8}")
+    failed = False
+    for number, group_commit in enumerate((False, True)):
+        app.config['GROUP_COMMIT'] = group_commit
+        # Warm the blob store and the job cache outside the timed burst
+        burst(app, 'burst-benchmark', 10 ** 8 + number, 1, 1, args.gevent)
+        before = commits[0]
+        seconds, latencies, failures = burst(app, 'burst-benchmark', number * args.burst, args.burst,
+                                             args.concurrency, args.gevent)
+        committed = commits[0] - before
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"  {'group commit' if group_commit else 'per request':14} {args.burst / seconds:8.1f} "
+              f"{committed / seconds:10.1f} {args.burst / max(committed, 1):12.1f} "
+              f"{statistics.median(latencies) * 1000:8.1f} {p99 * 1000:8.1f}")
+        if failures:
+            failed = True
+            print(f"    [FAIL] {len(failures)} submissions failed, e.g. {failures[0]}")
+
+    import shutil
+    shutil.rmtree(scratch, ignore_errors=True)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
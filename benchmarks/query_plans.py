@@ -0,0 +1,206 @@
+"""Seed a large candidate table and check the hot queries use their indexes.
+
+Runs the same statements the admin views and chat issue, prints their
+EXPLAIN plans and timings, and exits non-zero if any plan misses its index
+or falls back to a sort/full scan.
+
+    python benchmarks/query_plans.py                      # throwaway SQLite file
+    python benchmarks/query_plans.py --candidates 2000000
+    DATABASE_URL=postgresql://... python benchmarks/query_plans.py --keep
+
+Point DATABASE_URL at a scratch database: the tables are seeded in place.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SEED_BATCH_SIZE = 10000
+# The deep-page cursor starts this many rows into the job's listing
+DEEP_PAGE_OFFSET = 25
+SKILLS = ['python', 'java', 'sql', 'react', 'django', 'flask', 'aws', 'docker', 'go', 'rust']
+
+
+def seed(db, Job, Candidate, jobs, candidates):
+    """Insert `jobs` jobs (5% active) and `candidates` candidates spread across them"""
+    from sqlalchemy import insert
+    rng = random.Random(42)
+    now = datetime.utcnow()
+
+    job_rows = []
+    for i in range(1, jobs + 1):
+        active = i % 20 == 0
+        start = now - timedelta(days=rng.randint(0, 365))
+        job_rows.append({
+            'id': i, 'title': f'Job {i}', 'description': 'Seeded job', 'link_hash': f'seed-{i}',
+            'start_date': start, 'end_date': now + timedelta(days=10) if active else start + timedelta(days=10),
+            'is_active': active,
+        })
+    db.session.execute(insert(Job.__table__), job_rows)
+
+    started = time.perf_counter()
+    batch = []
+    for i in range(1, candidates + 1):
+        batch.append({
+            'id': i,
+            'job_id': rng.randint(1, jobs),
+            'first_name': 'Seed', 'last_name': 'Candidate',
+            'personal_email': f'candidate{i}@example.com',
+            'mobile_no': f'{9000000000 + i % 1000000000}',
+            'highest_educational_qualifications': 'B.Tech',
+            'academic_performance': f'{rng.randint(50, 100)}%',
+            'total_experience': round(rng.uniform(0, 20), 1),
+            'relevant_experience': 0.0,
+            'primary_skills': ', '.join(rng.sample(SKILLS, 3)),
+            'resume_attachments': f'resumes/seed/{i}.pdf',
+            'self_declaration': True,
+            'submitted_at': now - timedelta(seconds=rng.randint(0, 365 * 86400)),
+        })
+        if len(batch) >= SEED_BATCH_SIZE:
+            db.session.execute(insert(Candidate.__table__), batch)
+            db.session.commit()
+            batch = []
+    if batch:
+        db.session.execute(insert(Candidate.__table__), batch)
+    db.session.commit()
+    print(f"Seeded {jobs} jobs and {candidates} candidates in {time.perf_counter() - started:.1f}s")
+
+
+def explain(connection, statement):
+    """Return the query plan of a SQLAlchemy statement as one string"""
+    compiled = statement.compile(dialect=connection.dialect)
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.dialect.name == 'sqlite' else 'EXPLAIN '
+    rows = connection.exec_driver_sql(prefix + str(compiled), params).fetchall()
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def timed(statement, repeat):
+    """Median wall time of `statement` in milliseconds"""
+    from app.models import db
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        db.session.execute(statement).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def plan_checks(job_id, last_row):
+    """(name, statement, index that must appear in the plan) for each hot query.
+
+    The deep-page and duplicate checks need a seeded row and are left out
+    when `last_row` is None.
+    """
+    from sqlalchemy import func, select
+    from app.models import Job, Candidate
+    from app.queries import CandidateFilters, page_query, encode_cursor
+
+    per_job = CandidateFilters(job_id=job_id)
+    by_experience = CandidateFilters(job_id=job_id, sort='experience_desc')
+    checks = [('job listing, first page', page_query(per_job).statement, 'ix_candidate_job_id_submitted_at')]
+    if last_row is not None:
+        checks.append(('job listing, deep page', page_query(per_job, encode_cursor('newest', last_row)).statement,
+                       'ix_candidate_job_id_submitted_at'))
+    checks += [
+        ('job listing by experience', page_query(by_experience).statement,
+         'ix_candidate_job_id_total_experience'),
+        ('all candidates, newest', page_query(CandidateFilters()).statement,
+         'ix_candidate_submitted_at'),
+        ('candidates per job', select(func.count(Candidate.id)).where(Candidate.job_id == job_id),
+         'ix_candidate_job_id'),
+    ]
+    if last_row is not None:
+        checks.append(('duplicate application check',
+                       select(Candidate.id).where(Candidate.job_id == job_id,
+                                                  Candidate.personal_email == last_row.personal_email),
+                       'ix_candidate_job_id_personal_email'))
+    checks.append(('active jobs',
+                   select(Job.id).where(Job.is_active.is_(True), Job.end_date > datetime.utcnow()),
+                   'ix_job_is_active_end_date'))
+    return checks
+
+
+def plan_problems(dialect, plan, index):
+    problems = []
+    if index not in plan:
+        problems.append(f"does not use {index}")
+    if dialect == 'sqlite' and 'TEMP B-TREE' in plan:
+        problems.append("sorts in a temp b-tree")
+    if dialect == 'postgresql' and 'Seq Scan on candidate' in plan:
+        problems.append("scans the candidate table")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=5000)
+    parser.add_argument('--candidates', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per query')
+    parser.add_argument('--keep', action='store_true', help='keep the seeded SQLite file')
+    args = parser.parse_args()
+
+    scratch = None
+    if not os.environ.get('DATABASE_URL'):
+        scratch = tempfile.mkdtemp(prefix='recruite-bench-')
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+    os.environ.setdefault('SESSION_TYPE', 'memory')
+
+    from flask_migrate import upgrade
+    from app import create_app
+    from app.models import db, Job, Candidate
+
+    app = create_app()
+    failures = 0
+    with app.app_context():
+        # Bring the schema to head so the plans reflect the migrated indexes
+        upgrade(directory=os.path.join(ROOT, 'migrations'))
+        if db.session.query(Candidate.id).first() is None:
+            seed(db, Job, Candidate, args.jobs, args.candidates)
+        else:
+            print("Using existing rows")
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql('ANALYZE')
+
+        job_id = (db.session.query(Candidate.job_id).order_by(Candidate.id).limit(1).scalar()
+                  or db.session.query(Job.id).order_by(Job.id).limit(1).scalar())
+        # Small seeds may leave the job with fewer rows than the deep-page offset
+        job_rows = Candidate.query.filter_by(job_id=job_id).count()
+        last_row = (Candidate.query.filter_by(job_id=job_id)
+                    .order_by(Candidate.submitted_at.desc(), Candidate.id.desc())
+                    .offset(max(0, min(DEEP_PAGE_OFFSET, job_rows - 1))).first())
+        if last_row is None:
+            print("No seeded candidates; skipping the deep-page and duplicate checks")
+        dialect = db.engine.dialect.name
+
+        with db.engine.connect() as conn:
+            for name, statement, index in plan_checks(job_id, last_row):
+                plan = explain(conn, statement)
+                problems = plan_problems(dialect, plan, index)
+                status = 'FAIL' if problems else 'ok'
+                print(f"[{status}] {name}: {timed(statement, args.repeat):.2f} ms")
+                if problems:
+                    failures += 1
+                    print(f"    {'; '.join(problems)}")
+                    print('    ' + plan.replace('\n', '\n    '))
+
+    if scratch and not args.keep:
+        import shutil
+        shutil.rmtree(scratch, ignore_errors=True)
+    elif scratch:
+        print(f"Seeded database kept at {os.environ['DATABASE_URL']}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -19,9 +19,15 @@ class Config:
         'pool_pre_ping': True,  # Enable connection health checks
         'pool_recycle': 300,    # Recycle connections every 5 minutes
         'pool_timeout': 30,     # Connection timeout of 30 seconds
-        'pool_size': 10,        # Maximum pool size
-        'max_overflow': 5       # Maximum number of connections that can be created beyond pool_size
     }
+    # Connections all web workers may hold together; each of the WEB_CONCURRENCY
+    # workers gets an equal share (pool_size plus a third as overflow)
+    DB_CONNECTION_BUDGET = int(os.environ.get('DB_CONNECTION_BUDGET', 60))
+    WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 4))
+    # Make database drivers yield to other greenlets (set by gunicorn.conf.py for gevent workers)
+    DB_COOPERATIVE = os.environ.get('DB_COOPERATIVE', '').lower() in ('1', 'true', 'yes')
+    # Seconds a SQLite connection waits for a lock before failing
+    SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', 5))
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
     # Upload settings
@@ -31,16 +37,67 @@ class Config:
     else:
         UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
     
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max request size
     
-    # Session
-    SESSION_TYPE = 'filesystem'
+    # Chunked uploads (/api/uploads) are limited per file rather than per request
+    MAX_RESUME_UPLOAD_SIZE = 16 * 1024 * 1024
+    MAX_VIDEO_UPLOAD_SIZE = int(os.environ.get('MAX_VIDEO_UPLOAD_SIZE', 512 * 1024 * 1024))
+    
+    # Frames per second of video examined by the face-presence analysis
+    VIDEO_SAMPLE_FPS = float(os.environ.get('VIDEO_SAMPLE_FPS', 2))
+    
+    # Stored uploads: 'local' (STORAGE_ROOT, default UPLOAD_FOLDER) or 's3'.
+    # UPLOAD_FOLDER is always used as local scratch space.
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+    STORAGE_ROOT = os.environ.get('STORAGE_ROOT')
+    S3_BUCKET = os.environ.get('S3_BUCKET')
+    S3_PREFIX = os.environ.get('S3_PREFIX', '')
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')  # e.g. a MinIO server
+    S3_REGION = os.environ.get('S3_REGION')
+    S3_PRESIGN_SECONDS = int(os.environ.get('S3_PRESIGN_SECONDS', 300))
+    
+    # Hand /uploads file transfers to the front-end server: 'x-accel-redirect'
+    # (nginx, internal location UPLOAD_ACCEL_PREFIX), 'x-sendfile', or unset
+    UPLOAD_SENDFILE = os.environ.get('UPLOAD_SENDFILE')
+    UPLOAD_ACCEL_PREFIX = os.environ.get('UPLOAD_ACCEL_PREFIX', '/protected-uploads/')
+    
+    # Logging: level, 'text' or 'json' lines, and the share of DEBUG/INFO records kept
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+    LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+    # When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    
+    # Insert submitted applications in batches: rows arriving within the window
+    # (or up to the row limit) share one transaction (see app/group_commit.py)
+    GROUP_COMMIT = os.environ.get('GROUP_COMMIT', '').lower() in ('1', 'true', 'yes')
+    GROUP_COMMIT_WINDOW_MS = float(os.environ.get('GROUP_COMMIT_WINDOW_MS', 5))
+    GROUP_COMMIT_MAX_ROWS = int(os.environ.get('GROUP_COMMIT_MAX_ROWS', 50))
+    
+    # Seconds between sweeps that mark jobs past their end date expired; one
+    # worker at a time runs them (see app/scheduler.py; 0 disables)
+    JOB_SWEEP_INTERVAL = float(os.environ.get('JOB_SWEEP_INTERVAL', 60))
+    
+    # Seconds between passes that delete stored uploads nothing refers to,
+    # once they are UPLOAD_GC_GRACE_HOURS old, at most UPLOAD_GC_RATE files
+    # a second (see app/upload_gc.py; 0 disables)
+    UPLOAD_GC_INTERVAL = float(os.environ.get('UPLOAD_GC_INTERVAL', 6 * 60 * 60))
+    UPLOAD_GC_GRACE_HOURS = float(os.environ.get('UPLOAD_GC_GRACE_HOURS', 48))
+    UPLOAD_GC_RATE = float(os.environ.get('UPLOAD_GC_RATE', 50))
+    
+    # Rendered admin pages kept per worker (0 disables; ETags are still sent)
+    PAGE_CACHE_SIZE = int(os.environ.get('PAGE_CACHE_SIZE', 128))
+    
+    # Session: 'sqlalchemy' (database table), 'memory' (per-process) or 'cookie'
+    SESSION_TYPE = os.environ.get('SESSION_TYPE', 'sqlalchemy')
     PERMANENT_SESSION_LIFETIME = timedelta(minutes=30)
     
-    def __init__(self):
-        # Create upload directories
-        os.makedirs(os.path.join(self.UPLOAD_FOLDER, 'resumes'), exist_ok=True)
-        os.makedirs(os.path.join(self.UPLOAD_FOLDER, 'videos'), exist_ok=True)
+    # Boot: 'create' missing tables, check the schema is at the migration head
+    # ('alembic'), or 'none'; gunicorn.conf.py uses 'alembic' (see app/boot.py)
+    SCHEMA_CHECK = os.environ.get('SCHEMA_CHECK', 'create')
+    # Compile all templates at startup, and where to keep compiled template bytecode
+    PRELOAD_TEMPLATES = os.environ.get('PRELOAD_TEMPLATES', '').lower() in ('1', 'true', 'yes')
+    JINJA_CACHE_DIR = os.environ.get('JINJA_CACHE_DIR')
 
 class ProductionConfig(Config):
     DEBUG = False
@@ -1,4 +1,42 @@
-workers = 4
+# Patch before the preloaded app imports anything that blocks
+from gevent import monkey
+monkey.patch_all()
+
+import os
+import shutil
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
 bind = "0.0.0.0:$PORT"
 timeout = 120
 worker_class = "gevent"
+
+# Every worker's pool is a share of DB_CONNECTION_BUDGET (see app/database.py)
+os.environ['WEB_CONCURRENCY'] = str(workers)
+os.environ.setdefault('DB_COOPERATIVE', '1')
+
+# Load the app once in the master and fork the workers from it; boot checks
+# the schema against the migrations and compiles templates (see app/boot.py)
+preload_app = True
+os.environ.setdefault('SCHEMA_CHECK', 'alembic')
+os.environ.setdefault('PRELOAD_TEMPLATES', '1')
+os.environ.setdefault('JINJA_CACHE_DIR', '/tmp/recruite-jinja')
+
+# Each worker writes its Prometheus samples here and /metrics merges them.
+# The preloaded app creates metrics before on_starting runs, so the directory
+# must exist already.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/recruite-metrics')
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+def on_starting(server):
+    # Samples left by a previous master would be counted again
+    shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'])
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+def post_worker_init(worker):
+    # Runs after gevent has patched the worker
+    from app.database import make_drivers_cooperative
+    make_drivers_cooperative()
@@ -45,6 +45,21 @@ target_db = current_app.extensions['migrate'].db
 # ... etc.
 
 
+# Search index tables app/search.py creates with raw DDL: the SQLite FTS5
+# virtual table with its shadow tables (candidate_fts_data, ...), and the
+# PostgreSQL tsvector table. They have no models, so autogenerate would
+# emit drop_table for them.
+SEARCH_INDEX_TABLES = ('candidate_fts', 'candidate_search')
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'table':
+        table_name = name
+    else:
+        table_name = getattr(getattr(object, 'table', None), 'name', None)
+    return not (table_name or '').startswith(SEARCH_INDEX_TABLES)
+
+
 def get_metadata():
     if hasattr(target_db, 'metadatas'):
         return target_db.metadatas[None]
@@ -65,7 +80,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +109,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
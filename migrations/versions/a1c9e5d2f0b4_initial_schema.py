@@ -0,0 +1,115 @@
+"""initial schema
+
+Revision ID: a1c9e5d2f0b4
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c9e5d2f0b4'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _existing_tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade():
+    # Databases created by db.create_all() before migrations existed already
+    # have some or all of these tables; only the missing ones are created.
+    existing = _existing_tables()
+
+    if 'job' not in existing:
+        op.create_table(
+            'job',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=100), nullable=False),
+            sa.Column('description', sa.Text(), nullable=False),
+            sa.Column('link_hash', sa.String(length=50), nullable=True),
+            sa.Column('start_date', sa.DateTime(), nullable=True),
+            sa.Column('end_date', sa.DateTime(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('link_hash'),
+        )
+
+    if 'candidate' not in existing:
+        op.create_table(
+            'candidate',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('job_id', sa.Integer(), nullable=False),
+            sa.Column('first_name', sa.String(length=50), nullable=False),
+            sa.Column('last_name', sa.String(length=50), nullable=False),
+            sa.Column('personal_email', sa.String(length=120), nullable=False),
+            sa.Column('mobile_no', sa.String(length=15), nullable=False),
+            sa.Column('alternate_contact_no', sa.String(length=15), nullable=True),
+            sa.Column('highest_educational_qualifications', sa.String(length=200), nullable=False),
+            sa.Column('academic_performance', sa.String(length=50), nullable=False),
+            sa.Column('current_company', sa.String(length=100), nullable=True),
+            sa.Column('current_designation', sa.String(length=100), nullable=True),
+            sa.Column('total_experience', sa.Float(), nullable=False),
+            sa.Column('relevant_experience', sa.Float(), nullable=False),
+            sa.Column('primary_skills', sa.Text(), nullable=False),
+            sa.Column('resume_attachments', sa.String(length=255), nullable=False),
+            sa.Column('self_introduction_video', sa.String(length=255), nullable=True),
+            sa.Column('referred_by', sa.String(length=100), nullable=True),
+            sa.Column('self_declaration', sa.Boolean(), nullable=False),
+            sa.Column('submitted_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['job_id'], ['job.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if 'upload_blob' not in existing:
+        op.create_table(
+            'upload_blob',
+            sa.Column('sha256', sa.String(length=64), nullable=False),
+            sa.Column('path', sa.String(length=255), nullable=False),
+            sa.Column('size', sa.BigInteger(), nullable=False),
+            sa.Column('ref_count', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('sha256'),
+            sa.UniqueConstraint('path'),
+        )
+
+    if 'upload_alias' not in existing:
+        op.create_table(
+            'upload_alias',
+            sa.Column('path', sa.String(length=255), nullable=False),
+            sa.Column('sha256', sa.String(length=64), nullable=False),
+            sa.ForeignKeyConstraint(['sha256'], ['upload_blob.sha256']),
+            sa.PrimaryKeyConstraint('path'),
+        )
+
+    if 'server_session' not in existing:
+        op.create_table(
+            'server_session',
+            sa.Column('id', sa.String(length=64), nullable=False),
+            sa.Column('data', sa.Text(), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_server_session_expires_at', 'server_session', ['expires_at'], unique=False)
+
+    if 'cache_version' not in existing:
+        op.create_table(
+            'cache_version',
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('name'),
+        )
+
+
+def downgrade():
+    op.drop_table('cache_version')
+    op.drop_index('ix_server_session_expires_at', table_name='server_session')
+    op.drop_table('server_session')
+    op.drop_table('upload_alias')
+    op.drop_table('upload_blob')
+    op.drop_table('candidate')
+    op.drop_table('job')
@@ -0,0 +1,52 @@
+"""job status and scheduler lease
+
+Revision ID: a3d9f6b1c2e4
+Revises: f1a7c4e2d8b3
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d9f6b1c2e4'
+down_revision = 'f1a7c4e2d8b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'scheduler_lease' not in inspector.get_table_names():
+        op.create_table(
+            'scheduler_lease',
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.Column('holder', sa.String(length=100), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('name'),
+        )
+
+    if 'status' not in {column['name'] for column in inspector.get_columns('job')}:
+        with op.batch_alter_table('job') as batch_op:
+            batch_op.add_column(sa.Column('status', sa.String(length=20), nullable=False,
+                                          server_default='active'))
+        # Same precedence as Job.current_status(): expiry first, then the flag
+        job = sa.table('job', sa.column('status'), sa.column('is_active'), sa.column('end_date'))
+        bind = op.get_bind()
+        bind.execute(job.update()
+                     .where(sa.or_(job.c.is_active == sa.false(), job.c.is_active.is_(None)))
+                     .values(status='inactive'))
+        bind.execute(job.update()
+                     .where(job.c.end_date.isnot(None), job.c.end_date < datetime.utcnow())
+                     .values(status='expired', is_active=False))
+    if 'ix_job_status_end_date' not in {index['name'] for index in inspector.get_indexes('job')}:
+        op.create_index('ix_job_status_end_date', 'job', ['status', 'end_date'])
+
+
+def downgrade():
+    op.drop_index('ix_job_status_end_date', table_name='job')
+    with op.batch_alter_table('job') as batch_op:
+        batch_op.drop_column('status')
+    op.drop_table('scheduler_lease')
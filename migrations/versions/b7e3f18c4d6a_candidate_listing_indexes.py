@@ -0,0 +1,58 @@
+"""candidate listing indexes
+
+Revision ID: b7e3f18c4d6a
+Revises: a1c9e5d2f0b4
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3f18c4d6a'
+down_revision = 'a1c9e5d2f0b4'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_candidate_job_id_submitted_at', 'candidate', ['job_id', 'submitted_at', 'id']),
+    ('ix_candidate_job_id_total_experience', 'candidate', ['job_id', 'total_experience', 'id']),
+    ('ix_candidate_job_id_personal_email', 'candidate', ['job_id', 'personal_email']),
+    ('ix_candidate_submitted_at', 'candidate', ['submitted_at', 'id']),
+    ('ix_candidate_personal_email', 'candidate', ['personal_email']),
+    ('ix_job_is_active_end_date', 'job', ['is_active', 'end_date']),
+)
+
+
+def _existing_indexes(table):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # Keyset pagination orders by submitted_at, which must never be NULL
+    op.execute("UPDATE candidate SET submitted_at = CURRENT_TIMESTAMP WHERE submitted_at IS NULL")
+    columns = {column['name']: column for column in sa.inspect(bind).get_columns('candidate')}
+    if columns['submitted_at']['nullable']:
+        with op.batch_alter_table('candidate') as batch_op:
+            batch_op.alter_column('submitted_at', existing_type=sa.DateTime(), nullable=False)
+
+    existing = {table: _existing_indexes(table) for table in ('candidate', 'job')}
+    missing = [index for index in INDEXES if index[0] not in existing[index[1]]]
+    if bind.dialect.name == 'postgresql':
+        # Build without locking out writes to a live candidate table
+        with op.get_context().autocommit_block():
+            for name, table, columns in missing:
+                op.create_index(name, table, columns, postgresql_concurrently=True)
+    else:
+        for name, table, columns in missing:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    with op.batch_alter_table('candidate') as batch_op:
+        batch_op.alter_column('submitted_at', existing_type=sa.DateTime(), nullable=True)
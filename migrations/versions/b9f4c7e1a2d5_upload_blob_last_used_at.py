@@ -0,0 +1,31 @@
+"""upload blob last used at
+
+Revision ID: b9f4c7e1a2d5
+Revises: a3d9f6b1c2e4
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9f4c7e1a2d5'
+down_revision = 'a3d9f6b1c2e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'last_used_at' not in {column['name'] for column in inspector.get_columns('upload_blob')}:
+        with op.batch_alter_table('upload_blob') as batch_op:
+            batch_op.add_column(sa.Column('last_used_at', sa.DateTime(), nullable=True))
+        # Until now a blob's only recorded use was its creation
+        blob = sa.table('upload_blob', sa.column('last_used_at'), sa.column('created_at'))
+        op.get_bind().execute(blob.update().values(last_used_at=blob.c.created_at))
+
+
+def downgrade():
+    with op.batch_alter_table('upload_blob') as batch_op:
+        batch_op.drop_column('last_used_at')
@@ -0,0 +1,49 @@
+"""background task dedupe key
+
+Revision ID: c2e7a9d4f1b6
+Revises: b9f4c7e1a2d5
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2e7a9d4f1b6'
+down_revision = 'b9f4c7e1a2d5'
+branch_labels = None
+depends_on = None
+
+# Task kinds whose producers dedupe on the payload's file path
+PATH_KEYED_KINDS = ('video_postprocess', 'video_analysis', 'resume_text')
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'dedupe_key' not in {column['name'] for column in inspector.get_columns('background_task')}:
+        with op.batch_alter_table('background_task') as batch_op:
+            batch_op.add_column(sa.Column('dedupe_key', sa.String(length=255), nullable=True))
+    if 'ix_background_task_dedupe' not in {index['name'] for index in inspector.get_indexes('background_task')}:
+        op.create_index('ix_background_task_dedupe', 'background_task', ['kind', 'status', 'dedupe_key'])
+
+    # Key the tasks still waiting so new producers see them
+    bind = op.get_bind()
+    task = sa.table('background_task', sa.column('id'), sa.column('kind'), sa.column('payload'),
+                    sa.column('status'), sa.column('dedupe_key'))
+    rows = bind.execute(
+        sa.select(task.c.id, task.c.payload)
+        .where(task.c.status == 'pending', task.c.kind.in_(PATH_KEYED_KINDS), task.c.dedupe_key.is_(None))
+    ).all()
+    keys = [{'task_id': task_id, 'key': json.loads(payload).get('path')} for task_id, payload in rows]
+    keys = [row for row in keys if row['key']]
+    if keys:
+        bind.execute(task.update().where(task.c.id == sa.bindparam('task_id'))
+                     .values(dedupe_key=sa.bindparam('key')), keys)
+
+
+def downgrade():
+    op.drop_index('ix_background_task_dedupe', table_name='background_task')
+    with op.batch_alter_table('background_task') as batch_op:
+        batch_op.drop_column('dedupe_key')
@@ -0,0 +1,42 @@
+"""candidate search index
+
+Revision ID: c4a8d1e97f25
+Revises: b7e3f18c4d6a
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a8d1e97f25'
+down_revision = 'b7e3f18c4d6a'
+branch_labels = None
+depends_on = None
+
+# Same DDL as app/search.py at the time of this revision. The index starts
+# empty; fill it with `flask reindex-candidates`.
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS candidate_fts USING fts5("
+                   "skills, name, company, designation, job, tokenize='unicode61', prefix='2 3')")
+    elif dialect == 'postgresql':
+        op.execute("CREATE TABLE IF NOT EXISTS candidate_search ("
+                   "candidate_id INTEGER PRIMARY KEY REFERENCES candidate (id) ON DELETE CASCADE, "
+                   "document TSVECTOR NOT NULL, name TEXT NOT NULL)")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_candidate_search_document "
+                   "ON candidate_search USING gin (document)")
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_candidate_search_name_trgm "
+                   "ON candidate_search USING gin (name gin_trgm_ops)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS candidate_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP TABLE IF EXISTS candidate_search")
@@ -0,0 +1,76 @@
+"""background tasks and video metadata
+
+Revision ID: d5b2e8a3c1f7
+Revises: c4a8d1e97f25
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+import json
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5b2e8a3c1f7'
+down_revision = 'c4a8d1e97f25'
+branch_labels = None
+depends_on = None
+
+VIDEO_COLUMNS = (
+    ('video_duration', sa.Float()),
+    ('video_width', sa.Integer()),
+    ('video_height', sa.Integer()),
+    ('video_poster', sa.String(length=255)),
+    ('video_sprite', sa.String(length=255)),
+    ('video_preview', sa.String(length=255)),
+)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'background_task' not in inspector.get_table_names():
+        op.create_table(
+            'background_task',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('kind', sa.String(length=50), nullable=False),
+            sa.Column('payload', sa.Text(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('attempts', sa.Integer(), nullable=False),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.Column('locked_by', sa.String(length=100), nullable=True),
+            sa.Column('locked_at', sa.DateTime(), nullable=True),
+            sa.Column('run_after', sa.DateTime(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_background_task_status_run_after', 'background_task', ['status', 'run_after'])
+
+    existing = {column['name'] for column in inspector.get_columns('candidate')}
+    with op.batch_alter_table('candidate') as batch_op:
+        for name, type_ in VIDEO_COLUMNS:
+            if name not in existing:
+                batch_op.add_column(sa.Column(name, type_, nullable=True))
+
+    # Queue processing for videos uploaded before the worker existed
+    bind = op.get_bind()
+    paths = bind.execute(sa.text(
+        "SELECT DISTINCT self_introduction_video FROM candidate "
+        "WHERE self_introduction_video IS NOT NULL AND video_poster IS NULL"
+    )).scalars().all()
+    if paths:
+        now = datetime.utcnow()
+        task = sa.table('background_task', sa.column('kind'), sa.column('payload'), sa.column('status'),
+                        sa.column('attempts'), sa.column('run_after'), sa.column('created_at'))
+        op.bulk_insert(task, [{'kind': 'video_postprocess', 'payload': json.dumps({'path': path}),
+                               'status': 'pending', 'attempts': 0, 'run_after': now, 'created_at': now}
+                              for path in paths])
+
+
+def downgrade():
+    with op.batch_alter_table('candidate') as batch_op:
+        for name, _ in reversed(VIDEO_COLUMNS):
+            batch_op.drop_column(name)
+    op.drop_index('ix_background_task_status_run_after', table_name='background_task')
+    op.drop_table('background_task')
@@ -0,0 +1,95 @@
+"""upload blob path key
+
+Revision ID: e4b8c1f6a9d2
+Revises: c2e7a9d4f1b6
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b8c1f6a9d2'
+down_revision = 'c2e7a9d4f1b6'
+branch_labels = None
+depends_on = None
+
+
+def _blob_table(key):
+    """upload_blob as rebuilt, with its primary key on `key`"""
+    constraints = [sa.PrimaryKeyConstraint(key, name='pk_upload_blob')]
+    if key == 'sha256':
+        constraints.append(sa.UniqueConstraint('path', name='uq_upload_blob_path'))
+    return sa.Table(
+        'upload_blob', sa.MetaData(),
+        sa.Column('path', sa.String(length=255), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('last_used_at', sa.DateTime(), nullable=True),
+        *constraints,
+    )
+
+
+def _foreign_keys(inspector, table, column):
+    return [fk['name'] for fk in inspector.get_foreign_keys(table)
+            if fk['constrained_columns'] == [column] and fk['name']]
+
+
+def upgrade():
+    # Each step checks the schema itself, so an upgrade that stopped partway
+    # (SQLite DDL is not transactional) picks up where it left off
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # Aliases point at a blob's path, since one digest may now have a blob per kind
+    alias_columns = {column['name'] for column in inspector.get_columns('upload_alias')}
+    if 'sha256' in alias_columns:
+        if 'blob_path' not in alias_columns:
+            with op.batch_alter_table('upload_alias') as batch_op:
+                batch_op.add_column(sa.Column('blob_path', sa.String(length=255), nullable=True))
+        alias = sa.table('upload_alias', sa.column('sha256'), sa.column('blob_path'))
+        blob = sa.table('upload_blob', sa.column('sha256'), sa.column('path'))
+        bind.execute(alias.update().values(blob_path=(
+            sa.select(blob.c.path).where(blob.c.sha256 == alias.c.sha256).scalar_subquery()
+        )))
+        with op.batch_alter_table('upload_alias') as batch_op:
+            for name in _foreign_keys(inspector, 'upload_alias', 'sha256'):
+                batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.drop_column('sha256')
+            batch_op.alter_column('blob_path', existing_type=sa.String(length=255), nullable=False)
+
+    # Blobs are identified by path (digest, kind and extension) rather than digest.
+    # The table is rebuilt from a full definition: SQLite cannot move a primary key
+    # in place, and reflection would keep sha256 as part of the old one.
+    if inspector.get_pk_constraint('upload_blob')['constrained_columns'] != ['path']:
+        with op.batch_alter_table('upload_blob', recreate='always', copy_from=_blob_table('path')) as batch_op:
+            batch_op.create_index('ix_upload_blob_sha256', ['sha256'])
+
+    if not _foreign_keys(sa.inspect(bind), 'upload_alias', 'blob_path'):
+        with op.batch_alter_table('upload_alias') as batch_op:
+            batch_op.create_foreign_key('fk_upload_alias_blob_path', 'upload_blob', ['blob_path'], ['path'])
+
+
+def downgrade():
+    # Fails if a digest has blobs of more than one kind, which the old key cannot hold
+    bind = op.get_bind()
+    with op.batch_alter_table('upload_alias') as batch_op:
+        batch_op.drop_constraint('fk_upload_alias_blob_path', type_='foreignkey')
+    op.drop_index('ix_upload_blob_sha256', table_name='upload_blob')
+    with op.batch_alter_table('upload_blob', recreate='always', copy_from=_blob_table('sha256')):
+        pass
+
+    with op.batch_alter_table('upload_alias') as batch_op:
+        batch_op.add_column(sa.Column('sha256', sa.String(length=64), nullable=True))
+    alias = sa.table('upload_alias', sa.column('sha256'), sa.column('blob_path'))
+    blob = sa.table('upload_blob', sa.column('sha256'), sa.column('path'))
+    bind.execute(alias.update().values(sha256=(
+        sa.select(blob.c.sha256).where(blob.c.path == alias.c.blob_path).scalar_subquery()
+    )))
+    with op.batch_alter_table('upload_alias') as batch_op:
+        batch_op.drop_column('blob_path')
+        batch_op.alter_column('sha256', existing_type=sa.String(length=64), nullable=False)
+        batch_op.create_foreign_key('fk_upload_alias_sha256', 'upload_blob', ['sha256'], ['sha256'])
@@ -0,0 +1,54 @@
+"""video analysis results
+
+Revision ID: e8c3f6a2b9d4
+Revises: d5b2e8a3c1f7
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+import json
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8c3f6a2b9d4'
+down_revision = 'd5b2e8a3c1f7'
+branch_labels = None
+depends_on = None
+
+ANALYSIS_COLUMNS = (
+    ('video_face_ratio', sa.Float()),
+    ('video_is_empty', sa.Boolean()),
+)
+DEFAULT_SAMPLE_FPS = 2.0
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing = {column['name'] for column in inspector.get_columns('candidate')}
+    with op.batch_alter_table('candidate') as batch_op:
+        for name, type_ in ANALYSIS_COLUMNS:
+            if name not in existing:
+                batch_op.add_column(sa.Column(name, type_, nullable=True))
+
+    # Queue analysis for videos uploaded before it existed
+    bind = op.get_bind()
+    paths = bind.execute(sa.text(
+        "SELECT DISTINCT self_introduction_video FROM candidate "
+        "WHERE self_introduction_video IS NOT NULL AND video_is_empty IS NULL"
+    )).scalars().all()
+    if paths:
+        now = datetime.utcnow()
+        task = sa.table('background_task', sa.column('kind'), sa.column('payload'), sa.column('status'),
+                        sa.column('attempts'), sa.column('run_after'), sa.column('created_at'))
+        op.bulk_insert(task, [{'kind': 'video_analysis',
+                               'payload': json.dumps({'path': path, 'sample_fps': DEFAULT_SAMPLE_FPS}),
+                               'status': 'pending', 'attempts': 0, 'run_after': now, 'created_at': now}
+                              for path in paths])
+
+
+def downgrade():
+    with op.batch_alter_table('candidate') as batch_op:
+        for name, _ in reversed(ANALYSIS_COLUMNS):
+            batch_op.drop_column(name)
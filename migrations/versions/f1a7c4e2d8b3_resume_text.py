@@ -0,0 +1,63 @@
+"""resume text extraction
+
+Revision ID: f1a7c4e2d8b3
+Revises: e8c3f6a2b9d4
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+import json
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a7c4e2d8b3'
+down_revision = 'e8c3f6a2b9d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'resume_text' not in inspector.get_table_names():
+        op.create_table(
+            'resume_text',
+            sa.Column('sha256', sa.String(length=64), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('text', sa.Text(), nullable=True),
+            sa.Column('sections', sa.Text(), nullable=True),
+            sa.Column('page_count', sa.Integer(), nullable=True),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.Column('extracted_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('sha256'),
+        )
+
+    existing = {column['name'] for column in inspector.get_columns('candidate')}
+    if 'resume_sha256' not in existing:
+        with op.batch_alter_table('candidate') as batch_op:
+            batch_op.add_column(sa.Column('resume_sha256', sa.String(length=64), nullable=True))
+    if 'ix_candidate_resume_sha256' not in {index['name'] for index in inspector.get_indexes('candidate')}:
+        op.create_index('ix_candidate_resume_sha256', 'candidate', ['resume_sha256'])
+
+    # Queue extraction for resumes uploaded before it existed
+    bind = op.get_bind()
+    paths = bind.execute(sa.text(
+        "SELECT DISTINCT resume_attachments FROM candidate "
+        "WHERE resume_attachments IS NOT NULL AND resume_sha256 IS NULL"
+    )).scalars().all()
+    if paths:
+        now = datetime.utcnow()
+        task = sa.table('background_task', sa.column('kind'), sa.column('payload'), sa.column('status'),
+                        sa.column('attempts'), sa.column('run_after'), sa.column('created_at'))
+        op.bulk_insert(task, [{'kind': 'resume_text',
+                               'payload': json.dumps({'path': path, 'file': path, 'sha256': None}),
+                               'status': 'pending', 'attempts': 0, 'run_after': now, 'created_at': now}
+                              for path in paths])
+
+
+def downgrade():
+    op.drop_index('ix_candidate_resume_sha256', table_name='candidate')
+    with op.batch_alter_table('candidate') as batch_op:
+        batch_op.drop_column('resume_sha256')
+    op.drop_table('resume_text')
@@ -58,6 +58,60 @@ document.addEventListener('DOMContentLoaded', function() {
         userInput.value = '';
     }
 
+    // Hex SHA-256 of a Blob, or null where WebCrypto is unavailable (plain HTTP)
+    async function sha256Hex(blob) {
+        if (!window.crypto || !window.crypto.subtle) return null;
+        const digest = await window.crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+        return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+    }
+
+    // Upload a file through the resumable /api/uploads protocol. Each chunk is
+    // retried from the server's reported offset, so a dropped connection only
+    // costs the chunk that was in flight.
+    async function uploadInChunks(blob, filename, kind, maxRetries = 5) {
+        const created = await fetch('/api/uploads', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ kind: kind, filename: filename, size: blob.size })
+        }).then(response => response.json());
+        if (created.error) return created;
+
+        const uploadUrl = `/api/uploads/${created.upload_id}`;
+        const chunkSize = created.chunk_size;
+        let offset = 0;
+        let failures = 0;
+
+        while (offset < blob.size) {
+            const chunk = blob.slice(offset, Math.min(offset + chunkSize, blob.size));
+            try {
+                const headers = { 'Content-Type': 'application/octet-stream' };
+                const checksum = await sha256Hex(chunk);
+                if (checksum) headers['X-Chunk-SHA256'] = checksum;
+                const response = await fetch(`${uploadUrl}?offset=${offset}`, {
+                    method: 'PUT',
+                    headers: headers,
+                    body: chunk
+                });
+                const data = await response.json();
+                if (response.ok) {
+                    offset = data.offset;
+                    failures = 0;
+                    continue;
+                }
+                if (data.offset === undefined || ++failures > maxRetries) return data;
+                offset = data.offset;
+            } catch (error) {
+                if (++failures > maxRetries) throw error;
+                await new Promise(resolve => setTimeout(resolve, 1000 * failures));
+                // Ask the server how much actually arrived before resending
+                const status = await fetch(uploadUrl).then(response => response.json()).catch(() => ({}));
+                if (status.offset !== undefined) offset = status.offset;
+            }
+        }
+
+        return fetch(`${uploadUrl}/complete`, { method: 'POST' }).then(response => response.json());
+    }
+
     // Create file upload interface
     function createFileUploadInterface() {
         const uploadDiv = document.createElement('div');
@@ -78,14 +132,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 return;
             }
             
-            const formData = new FormData();
-            formData.append('resume', file);
-            
-            fetch('/api/upload-resume', {
-                method: 'POST',
-                body: formData
-            })
-                .then(response => response.json())
+            uploadInChunks(file, file.name, 'resume')
                 .then(data => {
                     if (data.error) {
                         addMessage(data.error, 'bot');
@@ -184,14 +231,8 @@ document.addEventListener('DOMContentLoaded', function() {
             }
             
             const blob = new Blob(recordedChunks, { type: 'video/webm' });
-            const formData = new FormData();
-            formData.append('video', blob, 'recording.webm');
             
-            fetch('/api/upload-video', {
-                method: 'POST',
-                body: formData
-            })
-                .then(response => response.json())
+            uploadInChunks(blob, 'recording.webm', 'video')
                 .then(data => {
                     if (data.error) {
                         addMessage(data.error, 'bot');
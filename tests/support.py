@@ -0,0 +1,20 @@
+"""Test environment shared by every module under tests/.
+
+Config is read once per process, so the database and storage settings are
+set here, before any test module imports the app, and cleaned up at exit.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+ROOT = tempfile.mkdtemp(prefix='recruite-test-')
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(ROOT, 'test.db')}",
+    'STORAGE_ROOT': os.path.join(ROOT, 'storage'),
+    # Memory sessions are invisible to the upload collector, only a blob's use protects its file
+    'SESSION_TYPE': 'memory',
+    'JOB_SWEEP_INTERVAL': '0',
+    'UPLOAD_GC_INTERVAL': '0',
+})
+atexit.register(shutil.rmtree, ROOT, True)
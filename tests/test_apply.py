@@ -0,0 +1,54 @@
+"""One-shot applications must reject request bodies that are not JSON objects.
+
+Run with: python -m unittest discover -s tests
+"""
+import json
+import unittest
+
+import support  # noqa: F401
+from app import create_app
+from app.models import db, Job
+
+
+class SubmitApplicationTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+
+    def setUp(self):
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+        job = Job(title='Engineer', description='Build things')
+        self.link_hash = job.generate_link()
+        db.session.add(job)
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def post(self, body):
+        return self.client.post(f"/api/apply/{self.link_hash}", data=body, content_type='application/json')
+
+    def test_non_object_json_is_rejected(self):
+        for body in ('[1, 2]', '"text"', '42', 'null'):
+            with self.subTest(body=body):
+                response = self.post(body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.get_json())
+
+    def test_malformed_json_is_rejected(self):
+        self.assertEqual(self.post('{"first_name": ').status_code, 400)
+
+    def test_object_is_validated(self):
+        response = self.post(json.dumps({'first_name': 'Asha'}))
+        self.assertEqual(response.status_code, 422)
+        self.assertIn('last_name', response.get_json()['errors'])
+
+
+if __name__ == '__main__':
+    unittest.main()
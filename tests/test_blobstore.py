@@ -0,0 +1,97 @@
+"""Identical bytes uploaded as different kinds must each get a path of their own kind.
+
+Run with: python -m unittest discover -s tests
+"""
+import io
+import os
+import shutil
+import unittest
+
+from support import ROOT as _root
+from sqlalchemy import func, select
+from werkzeug.datastructures import FileStorage
+from app import create_app
+from app.models import db, UploadBlob, UploadAlias, check_resume
+from app.storage import LocalStorage, get_storage
+from app.uploads import save_file
+from app.blobstore import resolve_upload_path
+
+CONTENT = b'\x1aE\xdf\xa3 the same bytes either way'
+
+
+class BlobIdentityTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        cls.app.config['UPLOAD_FOLDER'] = os.path.join(_root, 'scratch')
+
+    def setUp(self):
+        self.context = self.app.test_request_context()
+        self.context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+        shutil.rmtree(os.path.join(_root, 'storage'), ignore_errors=True)
+
+    def upload(self, filename, subfolder):
+        return save_file(FileStorage(io.BytesIO(CONTENT), filename=filename), subfolder)
+
+    def test_same_bytes_as_video_then_resume(self):
+        video = self.upload('intro.webm', 'videos')
+        resume = self.upload('cv.pdf', 'resumes')
+
+        self.assertTrue(video.startswith('videos/') and video.endswith('.webm'))
+        self.assertTrue(resume.startswith('resumes/') and resume.endswith('.pdf'))
+        self.assertEqual(check_resume('resume_attachments', resume), resume)
+        self.assertTrue(get_storage().exists(video) and get_storage().exists(resume))
+        digests = db.session.execute(select(UploadBlob.sha256)).scalars().all()
+        self.assertEqual(len(digests), 2)
+        self.assertEqual(len(set(digests)), 1)
+
+    def test_resume_is_served_as_pdf(self):
+        self.upload('intro.webm', 'videos')
+        resume = self.upload('cv.pdf', 'resumes')
+
+        response = self.app.test_client().get(f"/uploads/{resume}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/pdf')
+        response.close()
+
+    def test_same_kind_and_extension_is_deduplicated(self):
+        first = self.upload('cv.pdf', 'resumes')
+        self.assertEqual(self.upload('other-name.PDF', 'resumes'), first)
+        self.assertEqual(db.session.execute(select(func.count()).select_from(UploadBlob)).scalar(), 1)
+
+    def test_other_extension_of_same_kind_gets_its_own_blob(self):
+        pdf = self.upload('cv.pdf', 'resumes')
+        docx = self.upload('cv.docx', 'resumes')
+        self.assertNotEqual(pdf, docx)
+        self.assertTrue(docx.endswith('.docx'))
+
+    def test_alias_resolves_to_its_blob_path(self):
+        resume = self.upload('cv.pdf', 'resumes')
+        db.session.add(UploadAlias(path='resumes/20240101_120000_cv.pdf', blob_path=resume))
+        db.session.commit()
+        self.assertEqual(resolve_upload_path('resumes/20240101_120000_cv.pdf'), resume)
+
+
+class LocalStoragePathTest(unittest.TestCase):
+
+    def test_keys_stay_under_the_root(self):
+        root = os.path.join(_root, 'storage')
+        storage = LocalStorage(root)
+        self.assertEqual(storage.path('resumes/ab/cv.pdf'), os.path.join(root, 'resumes', 'ab', 'cv.pdf'))
+        for key in ('/srv/secrets.pdf', '../secrets.pdf', 'resumes/../../secrets.pdf', '../storage-old/cv.pdf'):
+            with self.subTest(key), self.assertRaises(ValueError):
+                storage.path(key)
+        with self.assertRaises(ValueError):
+            with storage.local_copy('/etc/passwd'):
+                pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+"""Group commit must hand every request its own outcome, even when its batch fails.
+
+Run with: python -m unittest discover -s tests
+"""
+import os
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import support  # noqa: F401
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from app import create_app
+from app.models import db, Job, Candidate
+from app import group_commit
+from app.search import remove_job
+from app.group_commit import CommitBatcher, GroupCommitTimeout
+
+APPLICATION = {
+    'last_name': 'Rao', 'personal_email': 'asha@example.com', 'mobile_no': '9876543210',
+    'highest_educational_qualifications': 'B.Tech', 'academic_performance': '8.1 CGPA',
+    'total_experience': 3.0, 'relevant_experience': 2.0, 'primary_skills': 'Python',
+    'resume_attachments': 'resumes/cv.pdf', 'self_declaration': True,
+}
+
+
+class BlockingBatcher(CommitBatcher):
+    """Holds every commit until `release` is set"""
+
+    def __init__(self, app, **kwargs):
+        self.release = threading.Event()
+        super().__init__(app, **kwargs)
+
+    def _commit(self, batch):
+        self.release.wait()
+        super()._commit(batch)
+
+
+class GroupCommitTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+
+    def setUp(self):
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+        job = Job(title='Engineer', description='Build things')
+        job.generate_link()
+        db.session.add(job)
+        db.session.commit()
+        self.job_id = job.id
+
+    def tearDown(self):
+        # The search index lives outside the models, so drop_all() keeps it
+        remove_job(db.session.connection(), self.job_id)
+        db.session.commit()
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def candidate(self, first_name='Asha'):
+        """A Candidate for the test job; without a first name it fails only at the INSERT"""
+        candidate = Candidate(job_id=self.job_id, **APPLICATION)
+        if first_name is not None:
+            candidate.first_name = first_name
+        return candidate
+
+    def submit_all(self, batcher, candidates):
+        """Submit concurrently; returns each submission's id or exception, in order"""
+        def submit(candidate):
+            try:
+                return batcher.submit(candidate, timeout=10)
+            except Exception as e:
+                return e
+        with ThreadPoolExecutor(max_workers=len(candidates)) as pool:
+            return list(pool.map(submit, candidates))
+
+    def stored(self):
+        db.session.expire_all()
+        return db.session.execute(select(func.count()).select_from(Candidate)).scalar()
+
+    def test_burst_is_committed_in_one_batch(self):
+        batcher = BlockingBatcher(self.app, window_ms=50, max_rows=5)
+        with mock.patch.object(group_commit, 'observe_commit_batch') as observe:
+            # Rows pile up behind the held commit, then go in together
+            first = threading.Thread(target=batcher.submit, args=(self.candidate('First'),))
+            first.start()
+            threading.Timer(0.2, batcher.release.set).start()
+            outcomes = self.submit_all(batcher, [self.candidate(f"Applicant {name}") for name in 'ABCDE'])
+            first.join()
+
+        self.assertTrue(all(isinstance(outcome, int) for outcome in outcomes), outcomes)
+        self.assertEqual(len(set(outcomes)), 5)
+        self.assertEqual(self.stored(), 6)
+        self.assertIn(mock.call(5), observe.call_args_list)
+
+    def test_failed_batch_falls_back_to_one_row_per_transaction(self):
+        batcher = BlockingBatcher(self.app, window_ms=200, max_rows=3)
+        with mock.patch.object(group_commit, 'observe_commit_batch') as observe:
+            batcher.release.set()
+            outcomes = self.submit_all(batcher, [self.candidate('Good One'), self.candidate(None),
+                                                 self.candidate('Good Two')])
+
+        good = [outcome for outcome in outcomes if not isinstance(outcome, Exception)]
+        self.assertEqual(len(good), 2)
+        self.assertNotEqual(good[0], good[1])
+        self.assertIsInstance(outcomes[1], IntegrityError)
+        self.assertEqual(self.stored(), 2)
+        # The batch of three never committed; the good rows went in one at a time
+        self.assertEqual(observe.call_args_list, [mock.call(1), mock.call(1)])
+        names = set(db.session.execute(select(Candidate.first_name)).scalars())
+        self.assertEqual(names, {'Good One', 'Good Two'})
+
+    def test_submission_times_out(self):
+        batcher = BlockingBatcher(self.app, window_ms=1, max_rows=1)
+        with self.assertRaises(GroupCommitTimeout):
+            batcher.submit(self.candidate(), timeout=0.1)
+        batcher.release.set()
+        # Queued behind the timed-out row, so this returns once that row is in
+        batcher.submit(self.candidate('Later'), timeout=10)
+        self.assertEqual(self.stored(), 2)
+
+    def test_batcher_is_recreated_after_fork(self):
+        self.app.config.update(GROUP_COMMIT_WINDOW_MS=1, GROUP_COMMIT_MAX_ROWS=10)
+        with mock.patch.object(group_commit, '_batcher', None), \
+                mock.patch.object(group_commit, '_batcher_pid', None):
+            batcher = group_commit._get_batcher()
+            self.assertIs(group_commit._get_batcher(), batcher)
+            self.assertEqual(batcher.max_rows, 10)
+
+            # As seen by a worker forked after the parent started its batcher
+            group_commit._batcher_pid = os.getpid() + 1
+            forked = group_commit._get_batcher()
+            self.assertIsNot(forked, batcher)
+            self.assertEqual(group_commit._batcher_pid, os.getpid())
+            self.assertIsInstance(forked.submit(self.candidate(), timeout=10), int)
+
+    def test_save_candidate_uses_the_batcher_when_enabled(self):
+        self.app.config['GROUP_COMMIT'] = True
+        try:
+            with self.app.test_request_context(), \
+                    mock.patch.object(group_commit, '_batcher', None), \
+                    mock.patch.object(group_commit, '_batcher_pid', None):
+                candidate_id = group_commit.save_candidate(self.candidate())
+        finally:
+            self.app.config['GROUP_COMMIT'] = False
+        self.assertEqual(db.session.get(Candidate, candidate_id).first_name, 'Asha')
+
+
+if __name__ == '__main__':
+    unittest.main()
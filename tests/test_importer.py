@@ -0,0 +1,145 @@
+"""Bulk import must queue resume and video work in a fixed number of statements per batch.
+
+Run with: python -m unittest discover -s tests
+"""
+import csv
+import io
+import json
+import os
+import unittest
+
+from support import ROOT as _root
+from sqlalchemy import event, func, select
+from app import create_app
+from app.models import db, Job, Candidate, BackgroundTask, ResumeText, UploadBlob, UploadAlias
+from app.importer import import_candidates
+from app.resume_text import RESUME_TASK
+from app.media import VIDEO_TASK
+from app.search import remove_job
+
+# Tables the resume and video queueing reads or writes
+QUEUE_TABLES = ('background_task', 'upload_blob', 'upload_alias', 'resume_text', 'UPDATE candidate')
+
+ROW = {
+    'first_name': 'Asha', 'last_name': 'Rao', 'personal_email': 'asha@example.com',
+    'mobile_no': '9876543210', 'highest_educational_qualifications': 'B.Tech',
+    'academic_performance': '8.1 CGPA', 'total_experience': '3', 'relevant_experience': '2',
+    'primary_skills': 'Python, SQL', 'self_declaration': 'yes',
+}
+
+
+class ImportQueueTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        cls.app.config['UPLOAD_FOLDER'] = os.path.join(_root, 'scratch')
+
+    def setUp(self):
+        self.context = self.app.test_request_context()
+        self.context.push()
+        db.create_all()
+        job = Job(title='Engineer', description='Build things')
+        job.generate_link()
+        db.session.add(job)
+        db.session.commit()
+        self.job_id = job.id
+
+    def tearDown(self):
+        # The search index lives outside the models, so drop_all() keeps it
+        remove_job(db.session.connection(), self.job_id)
+        db.session.commit()
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def csv_stream(self, resumes, videos=None):
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=list(ROW) + ['resume_attachments', 'self_introduction_video'])
+        writer.writeheader()
+        for index, resume in enumerate(resumes):
+            writer.writerow(dict(ROW, resume_attachments=resume,
+                                 self_introduction_video=videos[index] if videos else ''))
+        return io.BytesIO(out.getvalue().encode())
+
+    def import_counting(self, resumes, videos=None):
+        """Import rows and return the number of queueing statements the import ran"""
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if any(table in statement for table in QUEUE_TABLES):
+                statements.append(statement)
+
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', count)
+        try:
+            report = import_candidates(self.csv_stream(resumes, videos), 'csv', default_job_id=self.job_id,
+                                       batch_size=10000)
+        finally:
+            event.remove(engine, 'before_cursor_execute', count)
+        self.assertEqual(report.failed, 0, report.errors)
+        return len(statements)
+
+    def tasks(self, kind):
+        return db.session.execute(select(BackgroundTask).filter_by(kind=kind)).scalars().all()
+
+    def test_statement_count_does_not_grow_with_rows(self):
+        small = self.import_counting([f"resumes/small-{i}.pdf" for i in range(10)],
+                                     [f"videos/small-{i}.webm" for i in range(10)])
+        large = self.import_counting([f"resumes/large-{i}.pdf" for i in range(600)],
+                                     [f"videos/large-{i}.webm" for i in range(600)])
+        # 600 paths span two lookup chunks, which adds one lookup per query kind
+        self.assertLessEqual(large, small + 5)
+        self.assertEqual(len(self.tasks(RESUME_TASK)), 610)
+        self.assertEqual(len(self.tasks(VIDEO_TASK)), 610)
+
+    def test_pending_tasks_are_not_queued_twice(self):
+        paths = [f"resumes/{i}.pdf" for i in range(5)]
+        self.import_counting(paths + paths[:2])
+        self.import_counting(paths)
+
+        tasks = self.tasks(RESUME_TASK)
+        self.assertEqual(sorted(task.dedupe_key for task in tasks), sorted(paths))
+        self.assertEqual(json.loads(tasks[0].payload)['path'], tasks[0].dedupe_key)
+
+    def test_extracted_resume_is_relinked_without_a_task(self):
+        digest = 'ab' * 32
+        db.session.add(UploadBlob(sha256=digest, path=f"resumes/ab/{digest}.pdf", size=10, ref_count=0))
+        db.session.add(UploadAlias(path='resumes/legacy.pdf', blob_path=f"resumes/ab/{digest}.pdf"))
+        db.session.add(ResumeText(sha256=digest, status='done', text='Experience'))
+        db.session.commit()
+
+        self.import_counting([f"resumes/ab/{digest}.pdf", 'resumes/legacy.pdf', 'resumes/new.pdf'])
+
+        linked = db.session.execute(
+            select(func.count()).where(Candidate.resume_sha256 == digest)
+        ).scalar()
+        self.assertEqual(linked, 2)
+        self.assertEqual([task.dedupe_key for task in self.tasks(RESUME_TASK)], ['resumes/new.pdf'])
+
+    def test_known_blob_is_queued_with_its_file(self):
+        digest = 'cd' * 32
+        db.session.add(UploadBlob(sha256=digest, path=f"resumes/cd/{digest}.pdf", size=10, ref_count=0))
+        db.session.add(UploadAlias(path='resumes/old.pdf', blob_path=f"resumes/cd/{digest}.pdf"))
+        db.session.commit()
+
+        self.import_counting(['resumes/old.pdf'])
+
+        payload = json.loads(self.tasks(RESUME_TASK)[0].payload)
+        self.assertEqual(payload, {'path': 'resumes/old.pdf', 'file': f"resumes/cd/{digest}.pdf",
+                                   'sha256': digest})
+
+    def test_paths_outside_the_upload_folders_are_rejected(self):
+        resumes = ['/srv/secrets.pdf', 'resumes/../../etc/cv.pdf', 'videos/cv.pdf', 'C:\\cv.pdf',
+                   'resumes\\..\\..\\cv.pdf', 'resumes/ok.pdf', 'resumes/ok.pdf']
+        videos = ['', '', '', '', '', '../intro.webm', 'videos/intro.webm']
+        report = import_candidates(self.csv_stream(resumes, videos), 'csv', default_job_id=self.job_id)
+
+        self.assertEqual((report.imported, report.failed), (1, 6))
+        fields = [set(error['errors']) for error in report.errors]
+        self.assertEqual(fields, [{'resume_attachments'}] * 5 + [{'self_introduction_video'}])
+        self.assertEqual([task.dedupe_key for task in self.tasks(RESUME_TASK)], ['resumes/ok.pdf'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""Upgrading a database built before blobs were keyed by path.
+
+The initial revision skips tables db.create_all() already made, so only a
+database migrated at an older revision exercises these upgrades. Each test
+runs `flask db` against a scratch database of its own.
+
+Run with: python -m unittest discover -s tests
+"""
+import os
+import shutil
+import subprocess
+import sys
+import unittest
+
+from support import ROOT as _root
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+from app.models import UploadBlob, UploadAlias
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIGEST_KEYED = 'c2e7a9d4f1b6'
+DIGEST = 'ab' * 32
+
+
+class UploadBlobMigrationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = os.path.join(_root, 'migrations')
+        os.makedirs(self.folder, exist_ok=True)
+        self.url = f"sqlite:///{os.path.join(self.folder, 'upgrade.db')}"
+        self.engine = create_engine(self.url)
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def flask_db(self, *args):
+        # SCHEMA_CHECK=none keeps create_app() from creating the current tables
+        env = dict(os.environ, DATABASE_URL=self.url, SCHEMA_CHECK='none', FLASK_APP='run.py')
+        result = subprocess.run([sys.executable, '-m', 'flask', 'db', *args], cwd=REPO, env=env,
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def build_digest_keyed(self):
+        self.flask_db('upgrade', DIGEST_KEYED)
+        with self.engine.begin() as conn:
+            conn.execute(text("INSERT INTO upload_blob (sha256, path, size, ref_count) "
+                              "VALUES (:sha256, :path, 3, 1)"),
+                         {'sha256': DIGEST, 'path': f"resumes/ab/{DIGEST}.pdf"})
+            conn.execute(text("INSERT INTO upload_alias (path, sha256) VALUES ('resumes/old.pdf', :sha256)"),
+                         {'sha256': DIGEST})
+
+    def assert_path_keyed(self):
+        inspector = inspect(self.engine)
+        self.assertEqual(inspector.get_pk_constraint('upload_blob')['constrained_columns'], ['path'])
+        self.assertNotIn('sha256', {column['name'] for column in inspector.get_columns('upload_alias')})
+        self.assertEqual([fk['referred_columns'] for fk in inspector.get_foreign_keys('upload_alias')],
+                         [['path']])
+
+        with Session(self.engine) as session:
+            self.assertEqual(session.get(UploadAlias, 'resumes/old.pdf').blob_path, f"resumes/ab/{DIGEST}.pdf")
+            # The same digest stored as another kind, with an alias of its own
+            session.add(UploadBlob(path=f"videos/ab/{DIGEST}.webm", sha256=DIGEST, size=3, ref_count=1))
+            session.add(UploadAlias(path='videos/old.webm', blob_path=f"videos/ab/{DIGEST}.webm"))
+            session.commit()
+        with Session(self.engine) as session:
+            alias = session.get(UploadAlias, 'videos/old.webm')
+            self.assertEqual((alias.blob.sha256, alias.blob.path), (DIGEST, f"videos/ab/{DIGEST}.webm"))
+
+    def test_upgrade_from_digest_keyed_blobs(self):
+        self.build_digest_keyed()
+        self.flask_db('upgrade')
+        self.assert_path_keyed()
+
+    def test_upgrade_resumes_after_a_partial_run(self):
+        self.build_digest_keyed()
+        # An earlier attempt added the alias column before stopping
+        with self.engine.begin() as conn:
+            conn.execute(text("ALTER TABLE upload_alias ADD COLUMN blob_path VARCHAR(255)"))
+        self.flask_db('upgrade')
+        self.assert_path_keyed()
+
+    def test_downgrade_restores_digest_keys(self):
+        self.build_digest_keyed()
+        self.flask_db('upgrade')
+        self.flask_db('downgrade', DIGEST_KEYED)
+        self.assertEqual(inspect(self.engine).get_pk_constraint('upload_blob')['constrained_columns'],
+                         ['sha256'])
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(text("SELECT sha256 FROM upload_alias")).scalar(), DIGEST)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+"""Keyset paging, cursor validation and skill filtering for candidate listings.
+
+Run with: python -m unittest discover -s tests
+"""
+import base64
+import json
+import unittest
+from datetime import datetime, timedelta
+
+import support  # noqa: F401
+from app import create_app
+from app.models import db, Job, Candidate
+from app.queries import CandidateFilters, InvalidQuery, encode_cursor, paginate_candidates
+from app.search import remove_job
+
+APPLICATION = {
+    'last_name': 'Rao', 'personal_email': 'asha@example.com', 'mobile_no': '9876543210',
+    'highest_educational_qualifications': 'B.Tech', 'academic_performance': '8.1 CGPA',
+    'resume_attachments': 'resumes/cv.pdf', 'self_declaration': True,
+}
+SUBMITTED = datetime(2026, 3, 1, 9, 30)
+NAMES = 'ABCDEFGH'
+
+
+def token(payload):
+    """A cursor token wrapping an arbitrary payload"""
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+class CandidateQueryTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+
+    def setUp(self):
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+        job = Job(title='Engineer', description='Build things')
+        job.generate_link()
+        db.session.add(job)
+        db.session.commit()
+        self.job_id = job.id
+
+    def tearDown(self):
+        # The search index lives outside the models, so drop_all() keeps it
+        remove_job(db.session.connection(), self.job_id)
+        db.session.commit()
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def add(self, first_name, submitted_at=SUBMITTED, total_experience=3.0, primary_skills='Python'):
+        candidate = Candidate(job_id=self.job_id, first_name=first_name, submitted_at=submitted_at,
+                              total_experience=total_experience, relevant_experience=0.0,
+                              primary_skills=primary_skills, **APPLICATION)
+        db.session.add(candidate)
+        db.session.commit()
+        return candidate.id
+
+    def walk(self, filters, limit):
+        """Follow next cursors to the end; returns the ids in page order"""
+        ids, cursor = [], None
+        while True:
+            rows, cursor = paginate_candidates(filters, cursor=cursor, limit=limit)
+            ids.extend(row.id for row in rows)
+            if cursor is None:
+                return ids
+
+    def test_pages_through_tied_submission_times(self):
+        # Most rows share a timestamp, so only the id separates them
+        ids = [self.add(f"Tied {name}") for name in NAMES[:7]]
+        earlier = self.add('Earlier', submitted_at=SUBMITTED - timedelta(minutes=1))
+        later = self.add('Later', submitted_at=SUBMITTED + timedelta(minutes=1))
+
+        for limit in (1, 2, 3, 4):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.walk(CandidateFilters(sort='newest'), limit),
+                                 [later] + sorted(ids, reverse=True) + [earlier])
+                self.assertEqual(self.walk(CandidateFilters(sort='oldest'), limit),
+                                 [earlier] + sorted(ids) + [later])
+
+    def test_pages_through_tied_experience(self):
+        experience = {self.add(f"Applicant {name}", total_experience=float(n % 3)): float(n % 3)
+                      for n, name in enumerate(NAMES)}
+        expected = sorted(experience, key=lambda i: (experience[i], i), reverse=True)
+        self.assertEqual(self.walk(CandidateFilters(sort='experience_desc'), 3), expected)
+
+    def test_cursor_resumes_after_its_row(self):
+        ids = [self.add(f"Tied {name}") for name in NAMES[:4]]
+        candidate = db.session.get(Candidate, ids[2])
+        rows, _ = paginate_candidates(CandidateFilters(sort='newest'),
+                                      cursor=encode_cursor('newest', candidate), limit=10)
+        self.assertEqual([row.id for row in rows], [ids[1], ids[0]])
+
+    def test_malformed_cursors_are_rejected(self):
+        valid = encode_cursor('newest', db.session.get(Candidate, self.add('Ravi')))
+        cursors = {
+            'not base64': '!!!',
+            'not json': base64.urlsafe_b64encode(b'{oops').decode(),
+            'not a list': token({'sort': 'newest'}),
+            'too short': token(['newest', SUBMITTED.isoformat()]),
+            'bad id': token(['newest', SUBMITTED.isoformat(), 'seven']),
+            'bad date': token(['newest', 'yesterday', 1]),
+            'bad number': token(['experience_desc', 'lots', 1]),
+            'truncated': valid[:-6],
+        }
+        for name, cursor in cursors.items():
+            sort = 'experience_desc' if name == 'bad number' else 'newest'
+            with self.subTest(name), self.assertRaises(InvalidQuery):
+                paginate_candidates(CandidateFilters(sort=sort), cursor=cursor)
+
+    def test_cursor_for_another_sort_is_rejected(self):
+        cursor = encode_cursor('newest', db.session.get(Candidate, self.add('Asha')))
+        with self.assertRaises(InvalidQuery) as raised:
+            paginate_candidates(CandidateFilters(sort='oldest'), cursor=cursor)
+        self.assertIn('sort order', str(raised.exception))
+
+    def test_skill_wildcards_match_literally(self):
+        percent = self.add('Percent', primary_skills='SQL 100% tuning')
+        underscore = self.add('Underscore', primary_skills='snake_case APIs')
+        backslash = self.add('Backslash', primary_skills='C:\\tools')
+        self.add('Neither', primary_skills='SQL 1000 tuning, snakeXcase')
+
+        def matching(skill):
+            rows, _ = paginate_candidates(CandidateFilters(skill=skill))
+            return {row.id for row in rows}
+
+        self.assertEqual(matching('100%'), {percent})
+        self.assertEqual(matching('%'), {percent})
+        self.assertEqual(matching('e_c'), {underscore})
+        self.assertEqual(matching('_'), {underscore})
+        self.assertEqual(matching('C:\\t'), {backslash})
+        self.assertEqual(matching('SNAKE_CASE'), {underscore})
+
+
+if __name__ == '__main__':
+    unittest.main()
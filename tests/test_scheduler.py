@@ -0,0 +1,168 @@
+"""Scheduler leases, the expiry sweep and the expired-link cache it feeds.
+
+Run with: python -m unittest discover -s tests
+"""
+import threading
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import support  # noqa: F401
+from sqlalchemy import select, update
+from app import create_app
+from app.models import db, Job, SchedulerLease, CacheVersion
+from app import job_cache
+from app.job_cache import VERSION_NAME, get_job_by_link, invalidate_jobs, link_expired
+from app.scheduler import acquire_lease, expire_jobs
+
+LEASE = 'test-lease'
+NOW = datetime(2026, 1, 15, 12, 0)
+
+
+class DatabaseTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+
+    def setUp(self):
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+        invalidate_jobs()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def add_job(self, link_hash, end_date, status='active', is_active=True):
+        """Insert a job row as stored, without the ORM hook that derives its status"""
+        with db.engine.begin() as conn:
+            conn.execute(Job.__table__.insert().values(
+                title='Engineer', description='Build things', link_hash=link_hash,
+                start_date=NOW - timedelta(days=30), end_date=end_date, status=status, is_active=is_active))
+
+    def jobs_version(self):
+        return db.session.execute(select(CacheVersion.version).filter_by(name=VERSION_NAME)).scalar()
+
+
+class LeaseTest(DatabaseTestCase):
+
+    def lapse(self):
+        with db.engine.begin() as conn:
+            conn.execute(update(SchedulerLease.__table__).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+
+    def test_holder_keeps_and_renews_its_lease(self):
+        self.assertTrue(acquire_lease(LEASE, 'worker-a', 60))
+        self.assertFalse(acquire_lease(LEASE, 'worker-b', 60))
+        self.assertTrue(acquire_lease(LEASE, 'worker-a', 60))
+        self.assertEqual(db.session.get(SchedulerLease, LEASE).holder, 'worker-a')
+
+    def test_lapsed_lease_is_taken_over(self):
+        acquire_lease(LEASE, 'worker-a', 60)
+        self.lapse()
+
+        self.assertTrue(acquire_lease(LEASE, 'worker-b', 60))
+        # The old holder's renewal no longer matches the row
+        self.assertFalse(acquire_lease(LEASE, 'worker-a', 60))
+        self.assertEqual(db.session.get(SchedulerLease, LEASE).holder, 'worker-b')
+
+    def race(self, holders):
+        """Call acquire_lease from every holder at once; returns the winners"""
+        barrier = threading.Barrier(len(holders))
+        winners = []
+
+        def contend(holder):
+            with self.app.app_context():
+                barrier.wait()
+                if acquire_lease(LEASE, holder, 60):
+                    winners.append(holder)
+
+        threads = [threading.Thread(target=contend, args=(holder,)) for holder in holders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return winners
+
+    def test_one_holder_wins_a_lapsed_lease(self):
+        acquire_lease(LEASE, 'worker-old', 60)
+        self.lapse()
+        winners = self.race(['worker-a', 'worker-b', 'worker-c'])
+        self.assertEqual(len(winners), 1)
+        self.assertEqual(db.session.get(SchedulerLease, LEASE).holder, winners[0])
+
+    def test_one_holder_wins_a_new_lease(self):
+        winners = self.race(['worker-a', 'worker-b', 'worker-c'])
+        self.assertEqual(len(winners), 1)
+        self.assertEqual(db.session.get(SchedulerLease, LEASE).holder, winners[0])
+
+
+class ExpireJobsTest(DatabaseTestCase):
+
+    def statuses(self):
+        rows = db.session.execute(select(Job.link_hash, Job.status, Job.is_active))
+        return {link_hash: (status, is_active) for link_hash, status, is_active in rows}
+
+    def test_sweep_expires_jobs_past_their_end_date(self):
+        self.add_job('past-active', NOW - timedelta(days=1))
+        self.add_job('past-inactive', NOW - timedelta(days=1), status='inactive', is_active=False)
+        self.add_job('future', NOW + timedelta(days=1))
+        self.add_job('open-ended', None)
+        version = self.jobs_version() or 0
+
+        self.assertEqual(expire_jobs(now=NOW), 2)
+
+        self.assertEqual(self.statuses(), {
+            'past-active': ('expired', False),
+            'past-inactive': ('expired', False),
+            'future': ('active', True),
+            'open-ended': ('active', True),
+        })
+        self.assertEqual(self.jobs_version(), version + 1)
+
+    def test_sweep_repairs_expired_jobs_left_active(self):
+        self.add_job('stale', NOW + timedelta(days=1), status='expired', is_active=True)
+        self.assertEqual(expire_jobs(now=NOW), 1)
+        self.assertEqual(self.statuses()['stale'], ('expired', False))
+
+    def test_sweep_without_changes_keeps_the_version(self):
+        self.add_job('future', NOW + timedelta(days=1))
+        self.add_job('done', NOW - timedelta(days=1), status='expired', is_active=False)
+        version = self.jobs_version()
+
+        self.assertEqual(expire_jobs(now=NOW), 0)
+        self.assertEqual(self.jobs_version(), version)
+
+
+class ExpiredLinkCacheTest(DatabaseTestCase):
+
+    def test_version_bump_clears_cached_expired_links(self):
+        self.add_job('closed', datetime.utcnow() - timedelta(days=1), status='expired', is_active=False)
+        with mock.patch.object(job_cache, 'VERSION_CHECK_SECONDS', 0):
+            self.assertFalse(link_expired('closed'))
+            self.assertTrue(get_job_by_link('closed').is_expired())
+            self.assertTrue(link_expired('closed'))
+
+            # Another worker reopens the job and bumps the shared version
+            with db.engine.begin() as conn:
+                conn.execute(update(Job.__table__).where(Job.link_hash == 'closed')
+                             .values(end_date=datetime.utcnow() + timedelta(days=5), status='active',
+                                     is_active=True))
+                conn.execute(update(CacheVersion.__table__).where(CacheVersion.name == VERSION_NAME)
+                             .values(version=CacheVersion.version + 1))
+
+            self.assertFalse(link_expired('closed'))
+            self.assertFalse(get_job_by_link('closed').is_expired())
+
+    def test_expired_link_is_kept_until_the_version_changes(self):
+        self.add_job('closed', datetime.utcnow() - timedelta(days=1), status='expired', is_active=False)
+        with mock.patch.object(job_cache, 'VERSION_CHECK_SECONDS', 0):
+            get_job_by_link('closed')
+            self.assertTrue(link_expired('closed'))
+            self.assertTrue(link_expired('closed'))
+
+
+if __name__ == '__main__':
+    unittest.main()
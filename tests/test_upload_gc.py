@@ -0,0 +1,85 @@
+"""Upload garbage collection must keep blobs that a new upload deduplicated into.
+
+Run with: python -m unittest discover -s tests
+"""
+import io
+import os
+import shutil
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from support import ROOT as _root
+from werkzeug.datastructures import FileStorage
+from app import create_app
+from app.models import db, UploadBlob
+from app.storage import get_storage
+from app.uploads import save_file
+from app.upload_gc import collect_uploads, schedule_file_cleanup
+
+GRACE_HOURS = 1
+LONG_AGO = datetime.utcnow() - timedelta(days=3)
+
+
+class UploadGCTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        cls.app.config['UPLOAD_FOLDER'] = os.path.join(_root, 'scratch')
+
+    def setUp(self):
+        self.context = self.app.test_request_context()
+        self.context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+        shutil.rmtree(os.path.join(_root, 'storage'), ignore_errors=True)
+
+    def upload(self, content, filename='resume.pdf'):
+        return save_file(FileStorage(io.BytesIO(content), filename=filename), 'resumes')
+
+    def abandon(self, path):
+        """Age an upload past the grace period, as if its application was dropped days ago"""
+        stamp = time.mktime(LONG_AGO.timetuple())
+        os.utime(get_storage().path(path), (stamp, stamp))
+        blob = db.session.execute(db.select(UploadBlob).filter_by(path=path)).scalar_one()
+        blob.created_at = blob.last_used_at = LONG_AGO
+        db.session.commit()
+
+    def test_deduplicated_upload_survives_collection(self):
+        path = self.upload(b'%PDF-1.4 same resume')
+        self.abandon(path)
+        # A new applicant sends identical content: it resolves to the old blob
+        self.assertEqual(self.upload(b'%PDF-1.4 same resume'), path)
+
+        collect_uploads(grace_hours=GRACE_HOURS, rate=1000)
+
+        self.assertTrue(get_storage().exists(path))
+        self.assertIsNotNone(db.session.execute(db.select(UploadBlob).filter_by(path=path)).scalar())
+
+    def test_abandoned_upload_is_collected(self):
+        path = self.upload(b'%PDF-1.4 abandoned resume')
+        self.abandon(path)
+
+        report = collect_uploads(grace_hours=GRACE_HOURS, rate=1000)
+
+        self.assertEqual(report.deleted, 1)
+        self.assertFalse(get_storage().exists(path))
+        self.assertIsNone(db.session.execute(db.select(UploadBlob).filter_by(path=path)).scalar())
+
+    def test_cleanup_skips_recently_deduplicated_blob(self):
+        path = self.upload(b'%PDF-1.4 shared resume')
+        self.abandon(path)
+        self.upload(b'%PDF-1.4 shared resume')
+
+        self.assertEqual(schedule_file_cleanup(db.session.connection(), [path]), 0)
+        db.session.commit()
+        self.assertTrue(get_storage().exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
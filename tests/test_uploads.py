@@ -0,0 +1,156 @@
+"""Resumable chunked uploads: offsets, chunk and file checksums, resuming and ownership.
+
+Run with: python -m unittest discover -s tests
+"""
+import hashlib
+import io
+import os
+import shutil
+import unittest
+
+from support import ROOT as _root
+from app import create_app
+from app.models import db
+from app.storage import get_storage
+from app.uploads import UploadError, create_upload, current_offset, write_chunk
+
+CONTENT = b'%PDF-1.4\n' + bytes(range(256)) * 40 + b'\n%%EOF\n'
+CHUNK = 4096
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class ChunkedUploadTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        cls.app.config['UPLOAD_FOLDER'] = os.path.join(_root, 'scratch')
+
+    def setUp(self):
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+        shutil.rmtree(os.path.join(_root, 'storage'), ignore_errors=True)
+        shutil.rmtree(os.path.join(_root, 'scratch'), ignore_errors=True)
+
+    def start(self, client=None, **fields):
+        body = dict({'kind': 'resume', 'filename': 'cv.pdf', 'size': len(CONTENT)}, **fields)
+        response = (client or self.client).post('/api/uploads', json=body)
+        self.assertEqual(response.status_code, 201, response.get_json())
+        return response.get_json()['upload_id']
+
+    def put(self, upload_id, offset, data, client=None, chunk_sha256=None):
+        headers = {'X-Chunk-SHA256': chunk_sha256} if chunk_sha256 else {}
+        return (client or self.client).put(f"/api/uploads/{upload_id}?offset={offset}", data=data,
+                                           headers=headers, content_type='application/octet-stream')
+
+    def offset(self, upload_id):
+        return self.client.get(f"/api/uploads/{upload_id}").get_json()['offset']
+
+    def send_all(self, upload_id, start=0):
+        for offset in range(start, len(CONTENT), CHUNK):
+            response = self.put(upload_id, offset, CONTENT[offset:offset + CHUNK])
+            self.assertEqual(response.status_code, 200, response.get_json())
+
+    def complete(self, upload_id, client=None):
+        return (client or self.client).post(f"/api/uploads/{upload_id}/complete")
+
+    def stored_content(self):
+        with self.client.session_transaction() as session:
+            path = session['candidate_data']['resume_attachments']
+        with get_storage().local_copy(path) as local, open(local, 'rb') as f:
+            return path, f.read()
+
+    def test_offset_mismatch_reports_the_current_offset(self):
+        upload_id = self.start()
+        response = self.put(upload_id, CHUNK, CONTENT[CHUNK:2 * CHUNK])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['offset'], 0)
+
+        self.assertEqual(self.put(upload_id, 0, CONTENT[:CHUNK]).status_code, 200)
+        # A resent chunk that already arrived is refused, not appended twice
+        response = self.put(upload_id, 0, CONTENT[:CHUNK])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['offset'], CHUNK)
+        self.assertEqual(self.offset(upload_id), CHUNK)
+
+    def test_chunk_checksum_mismatch_truncates_the_chunk(self):
+        upload_id = self.start()
+        self.assertEqual(self.put(upload_id, 0, CONTENT[:CHUNK]).status_code, 200)
+
+        chunk = CONTENT[CHUNK:2 * CHUNK]
+        response = self.put(upload_id, CHUNK, chunk, chunk_sha256=sha256(b'something else'))
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.get_json()['offset'], CHUNK)
+        self.assertEqual(self.offset(upload_id), CHUNK)
+
+        response = self.put(upload_id, CHUNK, chunk, chunk_sha256=sha256(chunk).upper())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['offset'], 2 * CHUNK)
+
+    def test_interrupted_chunk_can_be_resumed(self):
+        with self.app.test_request_context():
+            meta = create_upload('resume', 'cv.pdf', size=len(CONTENT))
+            self.assertEqual(write_chunk(meta, 0, io.BytesIO(CONTENT[:CHUNK]), CHUNK), CHUNK)
+
+            # The connection drops halfway through the second chunk
+            with self.assertRaises(UploadError) as raised:
+                write_chunk(meta, CHUNK, io.BytesIO(CONTENT[CHUNK:CHUNK + 100]), CHUNK)
+            self.assertEqual((raised.exception.status, raised.exception.offset), (400, CHUNK))
+            self.assertEqual(current_offset(meta), CHUNK)
+
+            offset = current_offset(meta)
+            while offset < len(CONTENT):
+                chunk = CONTENT[offset:offset + CHUNK]
+                offset = write_chunk(meta, offset, io.BytesIO(chunk), len(chunk))
+            self.assertEqual(offset, len(CONTENT))
+
+    def test_resumed_upload_completes_with_the_whole_file(self):
+        upload_id = self.start(sha256=sha256(CONTENT))
+        self.assertEqual(self.put(upload_id, 0, CONTENT[:CHUNK]).status_code, 200)
+        # A new page load asks where to carry on
+        self.send_all(upload_id, start=self.offset(upload_id))
+
+        self.assertEqual(self.complete(upload_id).status_code, 200)
+        path, stored = self.stored_content()
+        self.assertEqual(stored, CONTENT)
+        self.assertTrue(path.endswith(f"{sha256(CONTENT)}.pdf"))
+
+    def test_whole_file_checksum_is_verified(self):
+        upload_id = self.start(sha256=sha256(b'a different file'))
+        self.send_all(upload_id)
+
+        response = self.complete(upload_id)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.get_json()['offset'], len(CONTENT))
+        with self.client.session_transaction() as session:
+            self.assertNotIn('resume_attachments', session.get('candidate_data', {}))
+
+    def test_incomplete_upload_cannot_be_completed(self):
+        upload_id = self.start()
+        self.put(upload_id, 0, CONTENT[:CHUNK])
+        response = self.complete(upload_id)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['offset'], CHUNK)
+
+    def test_other_sessions_cannot_use_an_upload(self):
+        upload_id = self.start()
+        other = self.app.test_client()
+
+        self.assertEqual(other.get(f"/api/uploads/{upload_id}").status_code, 404)
+        self.assertEqual(self.put(upload_id, 0, CONTENT[:CHUNK], client=other).status_code, 404)
+        self.assertEqual(self.complete(upload_id, client=other).status_code, 404)
+        self.assertEqual(self.offset(upload_id), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
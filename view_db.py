@@ -1,6 +1,10 @@
 from app import create_app, db
 from app.models import Candidate, Job
+from app.queries import CandidateFilters
+from app.export import EXPORT_FORMATS, export_candidates
 from datetime import datetime
+import argparse
+import sys
 
 def view_database():
     app = create_app()
@@ -14,13 +18,12 @@ def view_database():
             print("-" * 50)
         
         print("\n=== Candidates ===")
-        candidates = Candidate.query.all()
-        
-        if not candidates:
+        if not db.session.query(Candidate.query.exists()).scalar():
             print("No candidates found in the database.")
             return
         
-        for candidate in candidates:
+        # Stream rows in batches instead of loading every candidate at once
+        for candidate in Candidate.query.order_by(Candidate.id).yield_per(500):
             print("\nCandidate Details:")
             print("=" * 50)
             print(f"ID: {candidate.id}")
@@ -43,7 +46,42 @@ def view_database():
             print(f"Submitted At: {candidate.submitted_at.strftime('%Y-%m-%d %H:%M:%S') if candidate.submitted_at else 'N/A'}")
             print("=" * 50)
 
+def export_database(args):
+    app = create_app()
+    with app.app_context():
+        filters = CandidateFilters(
+            job_id=args.job_id,
+            submitted_from=datetime.strptime(args.date_from, '%Y-%m-%d') if args.date_from else None,
+            submitted_to=datetime.strptime(args.date_to, '%Y-%m-%d') if args.date_to else None,
+        )
+        output = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+        try:
+            for chunk in export_candidates(filters, args.format, args.gzip):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+            else:
+                output.flush()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="RecruitEase Database Viewer")
+    subparsers = parser.add_subparsers(dest='command')
+    export = subparsers.add_parser('export', help='Stream candidates as CSV or NDJSON')
+    export.add_argument('--job-id', type=int, help='Only export candidates for this job')
+    export.add_argument('--from', dest='date_from', help='Submitted on or after (YYYY-MM-DD)')
+    export.add_argument('--to', dest='date_to', help='Submitted on or before (YYYY-MM-DD)')
+    export.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+    export.add_argument('--gzip', action='store_true', help='Gzip the output')
+    export.add_argument('--output', '-o', default='-', help="Output file, or '-' for stdout")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    if args.command == 'export':
+        export_database(args)
+        return
+
     print("RecruitEase Database Viewer")
     print("=" * 30)
     try: